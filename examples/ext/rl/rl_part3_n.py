@@ -3,7 +3,7 @@
 from itertools import product
 
 import sdl2
-from sdl2.ext import manager
+from sdl2.ext import manager, sprite
 
 MAP_WIDTH = 40
 MAP_HEIGHT = 22
@@ -24,12 +24,18 @@ class SceneRogueLike(manager.SceneBase):
         [self.obj_factory.create_tile(x, y, "floor")
          for x in range(MAP_WIDTH)
          for y in range(MAP_HEIGHT)]
+        # the tiles never change, so they are drawn once into a texture,
+        # which is then copied to the screen at once
+        self.floor = sprite.StaticLayer(
+            self.manager.renderer,
+            [cell.tile.sprite for cell in self.map.values()])
         # print(self.map)
         self.objects = [self.map, self.player, npc]
 
     def on_update(self):
         """Graphical logic."""
         # render it
+        self.spriterenderer.render(self.floor.bake())
         [obj.render() for obj in self.objects]
 
     def on_key_release(self, event, sym, mod):
@@ -102,8 +108,8 @@ class Cell(object):
         self.items = items
 
     def render(self):
-        objs = [obj for obj in (self.tile, self.feature, self.creature)
-                if obj]
+        # the tile is drawn by the floor layer of the scene
+        objs = [obj for obj in (self.feature, self.creature) if obj]
         if self.items:
             objs += self.items
 
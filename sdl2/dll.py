@@ -93,6 +93,23 @@ class DLL(object):
         func.restype = returns
         return func
 
+    def get_function(self, funcname, args=None, returns=None):
+        """Gets a new function object for the specified function, with the
+        passed argument and return value types.
+
+        Unlike bind_function(), the function object is not shared, so that
+        its types can differ from the ones of the bound function, e.g. to
+        pass plain addresses as c_void_p instead of pointer objects.
+        """
+        try:
+            func = self._dll[funcname]
+        except AttributeError:
+            raise ValueError("could not find function '%s' in %r" %
+                             (funcname, self._dll))
+        func.argtypes = args
+        func.restype = returns
+        return func
+
     @property
     def libfile(self):
         """Gets the filename of the loaded library."""
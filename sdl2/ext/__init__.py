@@ -11,14 +11,20 @@ from .resources import *
 from .events import *
 from .ebs import *
 
+from .animation import *
+from .broadphase import *
 from .common import *
+from .console import *
 from .draw import *
 from .font import *
 from .gui import *
 from .image import *
+from .loader import *
 from .pixelaccess import *
 from .sprite import *
+from .spritebatch import *
 from .surface import *
+from .tilemap import *
 from .window import *
 
 from .manager import *
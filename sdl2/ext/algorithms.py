@@ -1,7 +1,8 @@
 """Common algorithms."""
 import sys
 
-__all__ = ["liangbarsky", "cohensutherland", "clipline", "point_on_line"]
+__all__ = ["liangbarsky", "cohensutherland", "clipline", "point_on_line",
+           "pack_rects"]
 
 
 def cohensutherland(left, top, right, bottom, x1, y1, x2, y2):
@@ -122,3 +123,69 @@ def point_on_line(p1, p2, point):
         return False
     return (min(x1, x2) <= px <= max(x1, x2) and
             min(y1, y2) <= py <= max(y1, y2))
+
+
+def pack_rects(sizes, width, height, padding=0):
+    """Packs rectangles of the passed sizes into a width x height area.
+
+    This implements the skyline bottom-left bin packing heuristic. The
+    rectangles are placed tallest first, each at the lowest (then leftmost)
+    position of the skyline formed by the rectangles placed before it.
+    padding denotes the free space to be kept between two rectangles.
+
+    sizes is a sequence of (w, h) tuples. A list with the (x, y) position of
+    each size, in the same order, is returned. Rectangles that could not be
+    placed get None as position.
+    """
+    width += padding
+    height += padding
+    positions = [None] * len(sizes)
+    order = sorted(range(len(sizes)),
+                   key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    # (x, y, w) segments, sorted by x and covering the whole width
+    skyline = [(0, 0, width)]
+    for i in order:
+        w = sizes[i][0] + padding
+        h = sizes[i][1] + padding
+        best = None
+        for idx, (x, _, _) in enumerate(skyline):
+            if x + w > width:
+                break
+            y = 0
+            remaining = w
+            j = idx
+            while remaining > 0:
+                y = max(y, skyline[j][1])
+                remaining -= skyline[j][2]
+                j += 1
+            if y + h > height:
+                continue
+            if best is None or (y, x) < best[:2]:
+                best = (y, x, idx)
+        if best is None:
+            continue
+        y, x, idx = best
+        positions[i] = (x, y)
+
+        # raise the skyline over the placed rectangle
+        skyline.insert(idx, (x, y + h, w))
+        j = idx + 1
+        while j < len(skyline):
+            sx, sy, sw = skyline[j]
+            cut = x + w - sx
+            if cut <= 0:
+                break
+            if cut >= sw:
+                del skyline[j]
+            else:
+                skyline[j] = (sx + cut, sy, sw - cut)
+                break
+        j = 0
+        while j < len(skyline) - 1:
+            if skyline[j][1] == skyline[j + 1][1]:
+                sx, sy, sw = skyline[j]
+                skyline[j] = (sx, sy, sw + skyline[j + 1][2])
+                del skyline[j + 1]
+            else:
+                j += 1
+    return positions
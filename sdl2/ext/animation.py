@@ -0,0 +1,224 @@
+"""Time-based sprite animations."""
+from bisect import bisect_right
+
+from ..rect import SDL_Rect
+from ..timer import SDL_GetTicks
+from .ebs import System
+from .rect import NonIterableRect, Rect
+from .sprite import SpriteSheet, _show_frame
+
+__all__ = ["AnimationClip", "Animation", "AnimationSystem"]
+
+_MODES = ("loop", "once", "pingpong")
+
+
+class AnimationClip(object):
+    """A sequence of frames of a sprite sheet, with their durations.
+
+    The source rects of the frames are created once, as an array of
+    SDL_Rect structures (the table attribute), and shared by all
+    :class:`Animation` components playing the clip. Switching frames
+    thus only assigns an existing SDL_Rect to the sprite. Clips created
+    from a :class:`sdl2.ext.sprite.SpriteSheet` or its SDL_Rect
+    structures share those of the sheet instead.
+    """
+    def __init__(self, frames, durations=100, mode="loop"):
+        """Creates a new AnimationClip.
+
+        Args:
+            frames: the (x, y, w, h) source rects of the frames on the
+                sprite's texture, as SpriteSheet, ctypes array of SDL_Rect
+                structures or sequence of rect-like objects. SDL_Rect
+                structures are used as they are.
+            durations: the duration of every frame in milliseconds, or a
+                sequence with a duration per frame.
+            mode (str): "loop" to start over after the last frame, "once"
+                to stop at the last frame or "pingpong" to play the frames
+                forth and back.
+
+        Raises:
+            ValueError: if there are no frames, the number of durations
+                does not match, a duration is not positive or the mode is
+                unknown.
+        """
+        if mode not in _MODES:
+            raise ValueError("mode must be one of %s" % ", ".join(_MODES))
+        count = len(frames)
+        if count == 0:
+            raise ValueError("frames must not be empty")
+        if isinstance(durations, (int, float)):
+            durations = [durations] * count
+        else:
+            durations = list(durations)
+            if len(durations) != count:
+                raise ValueError("durations must match the number of frames")
+        if min(durations) <= 0:
+            raise ValueError("durations must be greater than 0")
+
+        if isinstance(frames, SpriteSheet):
+            self.table = frames.table
+            self.rects = frames.rects
+        elif isinstance(frames, SDL_Rect * count):
+            self.table = frames
+            # SDL_Rect views on the table, created once to be reused
+            self.rects = [frames[i] for i in range(count)]
+        elif all(isinstance(frame, SDL_Rect) for frame in frames):
+            self.table = None
+            self.rects = list(frames)
+        else:
+            self.table = table = (SDL_Rect * count)()
+            for i, frame in enumerate(frames):
+                if not isinstance(frame, NonIterableRect):
+                    frame = Rect(frame)
+                table[i] = SDL_Rect(frame.x, frame.y, frame.w, frame.h)
+            self.rects = [table[i] for i in range(count)]
+        self.mode = mode
+
+        order = list(range(count))
+        if mode == "pingpong":
+            order += order[-2:0:-1]
+        self.order = order
+        self.durations = [durations[i] for i in order]
+        self.starts = [0] * len(order)
+        for step in range(1, len(order)):
+            self.starts[step] = self.starts[step - 1] + \
+                self.durations[step - 1]
+        self.duration = self.starts[-1] + self.durations[-1]
+
+    def __len__(self):
+        return len(self.rects)
+
+
+class Animation(object):
+    """The animation state of a sprite, processed by the AnimationSystem.
+
+    The step attribute is the position within the played sequence of
+    frames (which differs from the frame index for "pingpong" clips) and
+    time the milliseconds spent on it so far. speed scales the elapsed
+    time.
+    """
+    def __init__(self, sprite, clip, speed=1.0, playing=True):
+        """Creates a new Animation, showing the first frame of the clip.
+
+        Args:
+            sprite (Sprite): the sprite to set the frames on.
+            clip (AnimationClip): the clip to play.
+            speed (float): the factor to scale the elapsed time by.
+            playing (bool): whether to start playing right away.
+        """
+        super(Animation, self).__init__()
+        self.sprite = sprite
+        self.speed = speed
+        self.play(clip)
+        self.playing = playing
+
+    @property
+    def frame(self):
+        """The index of the shown frame of the clip."""
+        return self.clip.order[self.step]
+
+    def play(self, clip=None, restart=True):
+        """Starts playing the animation.
+
+        Args:
+            clip (AnimationClip): the clip to switch to, if any.
+            restart (bool): whether to start over from the first frame.
+        """
+        if clip is not None:
+            self.clip = clip
+        if restart or clip is not None:
+            self.step = 0
+            self.time = 0
+            self.finished = False
+            _show_frame(self.sprite, self.clip.rects[0])
+        self.playing = True
+
+    def stop(self):
+        """Stops playing the animation, keeping the current frame."""
+        self.playing = False
+
+
+class AnimationSystem(System):
+    """A processing system advancing Animation components by time.
+
+    On every :meth:`process` call, the animations are advanced by the
+    milliseconds elapsed since the previous call (measured with
+    SDL_GetTicks), unless the dt attribute is set to a fixed time step.
+    Only the animations, whose current frame elapsed, are touched: their
+    sprites get the precomputed source rect of the new frame, without
+    anything being allocated.
+
+    Animations of "once" clips stop on their last frame and are passed to
+    the optional endfunc callback:
+
+        def endfunc(world, finished_animations):
+            ...
+    """
+    def __init__(self):
+        """Creates a new AnimationSystem."""
+        super(AnimationSystem, self).__init__()
+        self.componenttypes = (Animation,)
+        self.dt = None
+        self._last = None
+        self._endfunc = None
+
+    def process(self, world, components):
+        """Advances the passed Animation components by the elapsed time."""
+        if self.dt is not None:
+            ms = self.dt
+        else:
+            now = SDL_GetTicks()
+            ms = 0 if self._last is None else now - self._last
+            self._last = now
+        finished = self.advance(components, ms)
+        if finished and self._endfunc is not None:
+            self._endfunc(world, finished)
+
+    def advance(self, components, ms):
+        """Advances the passed Animation components by ms milliseconds.
+
+        Returns:
+            list: the animations, which finished playing.
+        """
+        finished = []
+        for anim in components:
+            if not anim.playing:
+                continue
+            time = anim.time + ms * anim.speed
+            clip = anim.clip
+            step = anim.step
+            if time < clip.durations[step]:
+                anim.time = time
+                continue
+            # the frame elapsed: find the new one from the clip's start
+            # times, which also copes with several frames per call
+            time += clip.starts[step]
+            if time >= clip.duration:
+                if clip.mode == "once":
+                    step = len(clip.order) - 1
+                    anim.step = step
+                    anim.time = clip.durations[step]
+                    anim.playing = False
+                    anim.finished = True
+                    _show_frame(anim.sprite, clip.rects[clip.order[step]])
+                    finished.append(anim)
+                    continue
+                time %= clip.duration
+            step = bisect_right(clip.starts, time) - 1
+            anim.time = time - clip.starts[step]
+            if step != anim.step:
+                anim.step = step
+                _show_frame(anim.sprite, clip.rects[clip.order[step]])
+        return finished
+
+    @property
+    def endfunc(self):
+        """The function called with the animations that finished."""
+        return self._endfunc
+
+    @endfunc.setter
+    def endfunc(self, value):
+        """The function called with the animations that finished."""
+        if value is not None and not callable(value):
+            raise TypeError("endfunc must be callable")
+        self._endfunc = value
@@ -0,0 +1,234 @@
+"""A sweep-and-prune collision broadphase."""
+from .ebs import System
+from .sprite import Sprite
+
+__all__ = ["BroadphaseSystem"]
+
+# Upper edges sort before lower edges of the same value, so that
+# components merely touching each other do not overlap.
+_UPPER, _LOWER = 0, 1
+
+
+class _Box(object):
+    """The bounds of a component, as of the last process() call."""
+
+    __slots__ = ("serial", "component", "x1", "y1", "x2", "y2", "edges")
+
+    def __init__(self, serial, component):
+        self.serial = serial
+        self.component = component
+        self.x1 = self.y1 = self.x2 = self.y2 = 0
+        self.edges = None
+
+
+class BroadphaseSystem(System):
+    """A sweep-and-prune collision broadphase.
+
+    The BroadphaseSystem keeps the lower and upper edges of the bounds
+    (x, y, w and h attributes) of its components in two lists, sorted
+    along the x and the y axis. As components usually move only a little
+    from one frame to the next, the lists are re-sorted with an insertion
+    sort that costs a single pass and a few swaps. Two components can only
+    start or stop overlapping, when an edge of one passes an edge of the
+    other, so that only the pairs of swapped edges are tested; pairs that
+    stay apart or stay overlapping cost nothing.
+
+    The overlapping pairs of the last :meth:`process` call are kept in
+    the pairs attribute. Pairs are (first, second) tuples of components,
+    with the component added to the system first coming first. To get
+    their entities, use :meth:`sdl2.ext.ebs.World.get_entities`.
+    """
+    def __init__(self, componenttype=Sprite):
+        """Creates a new BroadphaseSystem.
+
+        Args:
+            componenttype (type): the component type to process, whose
+                instances have x, y, w and h attributes.
+        """
+        super(BroadphaseSystem, self).__init__()
+        self.componenttypes = (componenttype,)
+        self.pairs = set()
+        self._boxes = {}
+        self._xedges = []
+        self._yedges = []
+        self._serial = 0
+        self._began = set()
+        self._ended = set()
+        self._beginfunc = None
+        self._endfunc = None
+        self._overlapfunc = None
+
+    def __len__(self):
+        return len(self._boxes)
+
+    def __contains__(self, component):
+        return component in self._boxes
+
+    def _add(self, component):
+        self._serial += 1
+        box = _Box(self._serial, component)
+        # the edges enter at the upper end of the lists, after all other
+        # edges, and are sorted into place by the next _sort() calls
+        box.edges = edges = ([0, _LOWER, box], [0, _UPPER, box],
+                             [0, _LOWER, box], [0, _UPPER, box])
+        self._xedges.extend(edges[:2])
+        self._yedges.extend(edges[2:])
+        self._boxes[component] = box
+
+    def _sync(self, components):
+        """Adds new components and removes the vanished ones."""
+        boxes = self._boxes
+        if not hasattr(components, "__len__"):
+            components = list(components)
+        if len(components) == len(boxes) and \
+                all(map(boxes.__contains__, components)):
+            return
+        current = set(components)
+        gone = set(c for c in boxes if c not in current)
+        if gone:
+            self._xedges = [e for e in self._xedges
+                            if e[2].component not in gone]
+            self._yedges = [e for e in self._yedges
+                            if e[2].component not in gone]
+            for pair in [p for p in self.pairs
+                         if p[0] in gone or p[1] in gone]:
+                self._set_pair(pair, False)
+            for component in gone:
+                del boxes[component]
+        for component in components:
+            if component not in boxes:
+                self._add(component)
+
+    def _set_pair(self, pair, overlapping):
+        """Records a pair as overlapping or not, tracking the changes."""
+        pairs = self.pairs
+        if overlapping:
+            if pair in pairs:
+                return
+            pairs.add(pair)
+            if pair in self._ended:
+                self._ended.discard(pair)
+            else:
+                self._began.add(pair)
+        elif pair in pairs:
+            pairs.discard(pair)
+            if pair in self._began:
+                self._began.discard(pair)
+            else:
+                self._ended.add(pair)
+
+    def _sort(self, edges):
+        """Sorts a list of edges, testing the boxes whose edges swap.
+
+        Only a lower edge passing an upper edge (or vice versa) can change
+        whether two boxes overlap.
+        """
+        set_pair = self._set_pair
+        for i in range(1, len(edges)):
+            edge = edges[i]
+            value, kind, box = edge
+            j = i - 1
+            other = edges[j]
+            while j >= 0 and (other[0] > value or
+                              (other[0] == value and other[1] > kind)):
+                obox = other[2]
+                if other[1] != kind and obox is not box:
+                    if box.serial < obox.serial:
+                        a, b = box, obox
+                    else:
+                        a, b = obox, box
+                    set_pair((a.component, b.component),
+                             a.x1 < b.x2 and a.y1 < b.y2 and
+                             a.x2 > b.x1 and a.y2 > b.y1)
+                edges[j + 1] = other
+                j -= 1
+                other = edges[j]
+            edges[j + 1] = edge
+
+    def process(self, world, components):
+        """Updates the overlapping pairs of the passed components.
+
+        Components entering or leaving the system are added or removed,
+        the edges of all components are updated and re-sorted, and the
+        pairs of components whose edges passed each other are tested for
+        overlapping, as for :meth:`sdl2.ext.rect.Rect.colliderect`.
+        Afterwards the callbacks, which are set, are invoked:
+
+            def beginfunc(world, pairs_starting_to_overlap):
+                ...
+
+            def endfunc(world, pairs_no_longer_overlapping):
+                ...
+
+            def overlapfunc(world, all_overlapping_pairs):
+                ...
+
+        The pairs are passed as lists. Pairs, of which a component was
+        removed, are passed to endfunc.
+        """
+        self._began = set()
+        self._ended = set()
+        self._sync(components)
+        for component, box in self._boxes.items():
+            x, y = component.x, component.y
+            box.x1 = x
+            box.y1 = y
+            box.x2 = x2 = x + component.w
+            box.y2 = y2 = y + component.h
+            edges = box.edges
+            edges[0][0] = x
+            edges[1][0] = x2
+            edges[2][0] = y
+            edges[3][0] = y2
+        self._sort(self._xedges)
+        self._sort(self._yedges)
+
+        if self._beginfunc is not None and self._began:
+            self._beginfunc(world, list(self._began))
+        if self._endfunc is not None and self._ended:
+            self._endfunc(world, list(self._ended))
+        if self._overlapfunc is not None:
+            self._overlapfunc(world, list(self.pairs))
+
+    def clear(self):
+        """Removes all components, without invoking the callbacks."""
+        self.pairs = set()
+        self._boxes = {}
+        self._xedges = []
+        self._yedges = []
+
+    @property
+    def beginfunc(self):
+        """The function called with the pairs starting to overlap."""
+        return self._beginfunc
+
+    @beginfunc.setter
+    def beginfunc(self, value):
+        """The function called with the pairs starting to overlap."""
+        if value is not None and not callable(value):
+            raise TypeError("beginfunc must be callable")
+        self._beginfunc = value
+
+    @property
+    def endfunc(self):
+        """The function called with the pairs no longer overlapping."""
+        return self._endfunc
+
+    @endfunc.setter
+    def endfunc(self, value):
+        """The function called with the pairs no longer overlapping."""
+        if value is not None and not callable(value):
+            raise TypeError("endfunc must be callable")
+        self._endfunc = value
+
+    @property
+    def overlapfunc(self):
+        """The function called with all overlapping pairs on every call."""
+        return self._overlapfunc
+
+    @overlapfunc.setter
+    def overlapfunc(self, value):
+        """The function called with all overlapping pairs on every call."""
+        if value is not None and not callable(value):
+            raise TypeError("overlapfunc must be callable")
+        self._overlapfunc = value
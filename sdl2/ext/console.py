@@ -0,0 +1,247 @@
+"""A tile-based text console."""
+from .. import blendmode, pixels, rect, render
+from .color import Color, convert_to_color
+from .common import SDLError
+from .compat import UnsupportedError
+from .sprite import Renderer, TextureSprite, _texture_mods
+from .tilemap import _tile_sheet
+
+_HASNUMPY = True
+try:
+    import numpy
+except ImportError:
+    _HASNUMPY = False
+
+__all__ = ["Console"]
+
+
+def _pack(color):
+    """Packs a color value into a 32-bit RGBA integer.
+
+    Unlike for convert_to_color(), (r, g, b) sequences are opaque.
+    """
+    if isinstance(color, (tuple, list)) and len(color) == 3:
+        color = tuple(color) + (255,)
+    c = convert_to_color(color)
+    return (c.r << 24) | (c.g << 16) | (c.b << 8) | c.a
+
+
+def _unpack(value):
+    """Unpacks a 32-bit RGBA integer into a Color."""
+    return Color(value >> 24, (value >> 16) & 0xFF, (value >> 8) & 0xFF,
+                 value & 0xFF)
+
+
+class Console(object):
+    """A grid of character cells drawn from a tileset.
+
+    Every cell has a glyph (a tile id of the tileset, such as
+    ``ord(char)``), a foreground and a background color. The cells are
+    written to back buffers; :meth:`present` redraws only the cells that
+    differ from what was drawn before into a persistent target texture,
+    which is then copied to the renderer in a single call.
+
+    The glyphs, fg and bg attributes are the back buffers, as NumPy arrays
+    of shape (rows, cols), which may also be modified directly. Colors are
+    stored as 32-bit RGBA integers.
+    """
+    def __init__(self, renderer, tileset, tile_size, cols, rows,
+                 fg=(255, 255, 255), bg=(0, 0, 0), blank=ord(" ")):
+        """Creates a new Console.
+
+        Args:
+            renderer (Renderer): the renderer to draw with.
+            tileset (TextureSprite, SpriteSheet): the sprite containing the
+                glyphs, or a sheet of it.
+            tile_size (int): the size of a (square) cell's side in pixels.
+            cols, rows (int): the number of columns and rows.
+            fg, bg: the default foreground and background colors.
+            blank (int): a glyph id, for which only the background is drawn.
+
+        Raises:
+            UnsupportedError: if NumPy is not available.
+        """
+        if not _HASNUMPY:
+            raise UnsupportedError(Console, "numpy module could not be loaded")
+        if not isinstance(renderer, Renderer):
+            raise TypeError("renderer must be a Renderer")
+        tileset, sheet = _tile_sheet(tileset, tile_size)
+        if cols <= 0 or rows <= 0:
+            raise ValueError("cols and rows must be greater than 0")
+        self.renderer = renderer
+        self.tileset = tileset
+        self.tile_size = tile_size
+        self.blank = blank
+        self.default_fg = _pack(fg)
+        self.default_bg = _pack(bg)
+        self.glyphs = numpy.full((rows, cols), blank, dtype=numpy.int32)
+        self.fg = numpy.full((rows, cols), self.default_fg,
+                             dtype=numpy.uint32)
+        self.bg = numpy.full((rows, cols), self.default_bg,
+                             dtype=numpy.uint32)
+        self._front = (self.glyphs.copy(), self.fg.copy(), self.bg.copy())
+        self.sheet = sheet
+        self._sources = sheet.rects
+        self._full = True
+        self.redrawn = 0
+
+        texture = render.SDL_CreateTexture(
+            renderer.sdlrenderer, pixels.SDL_PIXELFORMAT_RGBA8888,
+            render.SDL_TEXTUREACCESS_TARGET, cols * tile_size,
+            rows * tile_size)
+        if not texture:
+            raise SDLError()
+        self.sprite = TextureSprite(texture.contents)
+        if render.SDL_SetTextureBlendMode(
+                self.sprite.texture, blendmode.SDL_BLENDMODE_BLEND) != 0:
+            raise SDLError()
+
+    @property
+    def shape(self):
+        """The (rows, cols) size of the console."""
+        return self.glyphs.shape
+
+    def put(self, x, y, char, fg=None, bg=None):
+        """Sets the glyph and, optionally, the colors of a cell.
+
+        char may be a one-character string or a glyph id.
+        """
+        if not isinstance(char, int):
+            char = ord(char)
+        self.glyphs[y, x] = char
+        if fg is not None:
+            self.fg[y, x] = _pack(fg)
+        if bg is not None:
+            self.bg[y, x] = _pack(bg)
+
+    def write(self, x, y, text, fg=None, bg=None):
+        """Writes a line of text, starting at a cell.
+
+        The text is cut at the right edge of the console.
+        """
+        rows, cols = self.glyphs.shape
+        text = text[:max(cols - x, 0)]
+        if not text or not 0 <= y < rows:
+            return
+        end = x + len(text)
+        self.glyphs[y, x:end] = [ord(c) for c in text]
+        if fg is not None:
+            self.fg[y, x:end] = _pack(fg)
+        if bg is not None:
+            self.bg[y, x:end] = _pack(bg)
+
+    def clear(self, char=None, fg=None, bg=None):
+        """Resets all cells to a glyph and colors.
+
+        The blank glyph and the default colors are used for None values.
+        """
+        if char is None:
+            char = self.blank
+        elif not isinstance(char, int):
+            char = ord(char)
+        self.glyphs.fill(char)
+        self.fg.fill(self.default_fg if fg is None else _pack(fg))
+        self.bg.fill(self.default_bg if bg is None else _pack(bg))
+
+    def invalidate(self):
+        """Redraws all cells on the next :meth:`present` call.
+
+        This is needed, if the renderer lost its targets
+        (SDL_RENDER_TARGETS_RESET event).
+        """
+        self._full = True
+
+    def update(self):
+        """Redraws the changed cells into the console texture.
+
+        Returns:
+            int: the number of redrawn cells, also stored in the redrawn
+            attribute.
+        """
+        glyphs, fg, bg = self.glyphs, self.fg, self.bg
+        front = self._front
+        if self._full:
+            changed = numpy.ones(glyphs.shape, dtype=bool)
+        else:
+            changed = ((glyphs != front[0]) | (fg != front[1]) |
+                       (bg != front[2]))
+        rows, cols = numpy.nonzero(changed)
+        self.redrawn = len(rows)
+        if not self.redrawn:
+            return 0
+        size = self.tile_size
+        rects = numpy.empty((len(rows), 4), dtype=numpy.int32)
+        rects[:, 0] = cols * size
+        rects[:, 1] = rows * size
+        rects[:, 2:] = size
+        cell_bg = bg[rows, cols]
+        cell_fg = fg[rows, cols]
+        cell_glyphs = glyphs[rows, cols]
+
+        renderer = self.renderer
+        target, mode = renderer.target, renderer.blendmode
+        try:
+            renderer.target = self.sprite
+            renderer.blendmode = blendmode.SDL_BLENDMODE_NONE
+            for color in numpy.unique(cell_bg).tolist():
+                # boolean indexing gives contiguous copies, passed as-is
+                renderer.fill(rects[cell_bg == color], _unpack(color))
+            self._draw_glyphs(rects, cell_glyphs, cell_fg)
+        finally:
+            renderer.blendmode = mode
+            renderer.target = target
+        for buf, back in zip(front, (glyphs, fg, bg)):
+            numpy.copyto(buf, back)
+        self._full = False
+        return self.redrawn
+
+    def _draw_glyphs(self, rects, cell_glyphs, cell_fg):
+        """Copies the glyphs of the redrawn cells, grouped by color."""
+        sources = self._sources
+        count = len(sources)
+        drawn = ((cell_glyphs >= 0) & (cell_glyphs < count) &
+                 (cell_glyphs != self.blank))
+        if not drawn.any():
+            return
+        order = numpy.argsort(cell_fg[drawn], kind="stable")
+        rects = rects[drawn][order].tolist()
+        ids = cell_glyphs[drawn][order].tolist()
+        colors = cell_fg[drawn][order].tolist()
+        # the glyphs are copied without a batch, after the fills
+        self.renderer._flush_batch()
+        sdlrenderer = self.renderer.sdlrenderer
+        texture = self.tileset.texture
+        mods = _texture_mods(texture)
+        dst = rect.SDL_Rect()
+        rcopy = render.SDL_RenderCopy
+        last = None
+        try:
+            for (dst.x, dst.y, dst.w, dst.h), tid, color in zip(rects, ids,
+                                                               colors):
+                if color != last:
+                    last = color
+                    if (render.SDL_SetTextureColorMod(
+                            texture, color >> 24, (color >> 16) & 0xFF,
+                            (color >> 8) & 0xFF) or
+                            render.SDL_SetTextureAlphaMod(texture,
+                                                          color & 0xFF)):
+                        raise SDLError()
+                if rcopy(sdlrenderer, texture, sources[tid], dst) != 0:
+                    raise SDLError()
+        finally:
+            # leave the tileset as it would be without the console
+            render.SDL_SetTextureColorMod(texture, *mods[0])
+            render.SDL_SetTextureAlphaMod(texture, mods[1])
+
+    def present(self, x=0, y=0):
+        """Redraws the changed cells and copies the console to the renderer.
+
+        This does not call SDL_RenderPresent.
+
+        Returns:
+            int: the number of redrawn cells.
+        """
+        redrawn = self.update()
+        w, h = self.sprite.size
+        self.renderer.copy(self.sprite, dstrect=(x, y, w, h))
+        return redrawn
@@ -91,6 +91,7 @@ class Entity(object):
                 if clstype not in wctypes:
                     self._world.add_componenttype(clstype)
                 self._world.components[clstype][self] = value
+            self._world._revision += 1
 
     def __delattr__(self, name):
         """Delete the component data related to the Entity."""
@@ -102,6 +103,7 @@ class Entity(object):
             raise AttributeError("object '%s' has no attribute '%s'" %
                                  (self.__class__.__name__, name))
         del self._world.components[ctype][self]
+        self._world._revision += 1
 
     def delete(self):
         """Remove the Entity from the world it belongs to."""
@@ -141,6 +143,7 @@ class World(object):
         self._systems = []
         self.components = {}
         self._componenttypes = {}
+        self._revision = 0
 
     def _system_is_valid(self, system):
         """Checks, if the passed object fulfills the requirements for being
@@ -172,6 +175,7 @@ class World(object):
         for componentset in self.components.values():
             componentset.pop(entity, None)
         self.entities.discard(entity)
+        self._revision += 1
 
     def delete_entities(self, entities):
         """Removes multiple entities from the World at once."""
@@ -185,6 +189,7 @@ class World(object):
                 keys = set(compset.keys()) - eids
                 self.components[compkey] = dict((k, compset[k]) for k in keys)
         self.entities -= set(entities)
+        self._revision += 1
 
     def get_components(self, componenttype):
         """Gets all existing components for a sepcific component type.
@@ -271,6 +276,16 @@ class World(object):
         """Gets the supported component types of the world."""
         return self._componenttypes.values()
 
+    @property
+    def revision(self):
+        """A counter increased whenever components are set or removed.
+
+        Systems can compare it to the value of their last call, to skip
+        work on unchanged component sets. Changes made to the components
+        dictionaries directly are not counted.
+        """
+        return self._revision
+
 
 class System(object):
     """A processing system for component data.
@@ -0,0 +1,202 @@
+"""Background loading of image files into sprites."""
+from concurrent.futures import Future, ThreadPoolExecutor
+import os
+import queue
+
+from .. import surface
+from .image import load_image
+
+__all__ = ["AsyncImageLoader"]
+
+
+class AsyncImageLoader(object):
+    """Loads image files into sprites without stalling the game loop.
+
+    Image files are decoded into SDL_Surface objects on a pool of worker
+    threads (IMG_Load and PIL release the GIL for most of the work). The
+    decoded surfaces are queued and turned into sprites by the
+    :class:`sdl2.ext.sprite.SpriteFactory` of the loader, when
+    :meth:`process` is called on the render thread, usually once per
+    frame. To keep frames short, only `max_uploads` surfaces or
+    `max_bytes` of pixels are turned into sprites per call.
+
+    :meth:`load` returns a :class:`concurrent.futures.Future`, which
+    resolves to the sprite (or the error raised by loading it) within a
+    :meth:`process` call, so that its callbacks run on the render thread:
+
+        future = loader.load("level2/tiles.png")
+        future.add_done_callback(lambda f: ...)
+        ...
+        while running:
+            loader.process()
+            ...
+
+    Files, whose texture is already held by the factory's
+    :class:`sdl2.ext.sprite.TextureCache`, resolve right away. Loading a
+    file, which is still being loaded, returns the future of the first
+    load, so that cancelling it cancels both.
+    """
+    def __init__(self, factory, max_workers=None, max_uploads=4,
+                 max_bytes=None):
+        """Creates a new AsyncImageLoader.
+
+        Args:
+            factory (SpriteFactory): the factory to create the sprites with.
+            max_workers (int): the number of threads to decode the images
+                on. Defaults to the one of
+                :class:`concurrent.futures.ThreadPoolExecutor`.
+            max_uploads (int): the number of sprites to create per
+                :meth:`process` call or None for no limit.
+            max_bytes (int): the size of the pixels of the surfaces to turn
+                into sprites per :meth:`process` call or None for no limit.
+                A surface larger than max_bytes is still processed on its
+                own.
+        """
+        if max_uploads is not None and max_uploads <= 0:
+            raise ValueError("max_uploads must be greater than 0")
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("max_bytes must be greater than 0")
+        self.factory = factory
+        self.max_uploads = max_uploads
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(max_workers)
+        # (future, key, fname, surface, error) of the decoded files
+        self._decoded = queue.Queue()
+        # a decoded file, which exceeded the budget of the last call
+        self._next = None
+        self._pending = 0
+        # (path, enforce) -> future of the files being loaded
+        self._loading = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def pending(self):
+        """The number of files, which have not been resolved yet."""
+        return self._pending
+
+    def load(self, fname, enforce=None):
+        """Starts loading an image file in the background.
+
+        Args:
+            fname (str): the path of the image file.
+            enforce (str): the library to load the image with, see
+                :func:`sdl2.ext.image.load_image`.
+
+        Returns:
+            concurrent.futures.Future: the future of the sprite.
+        """
+        key = os.path.realpath(fname), enforce
+        future = self._loading.get(key)
+        if future is not None:
+            return future
+        future = Future()
+        sprite = self.factory._cached_image(fname)
+        if sprite is not None:
+            future.set_running_or_notify_cancel()
+            future.set_result(sprite)
+            return future
+        self._pending += 1
+        self._loading[key] = future
+        self._executor.submit(self._decode, future, key, fname, enforce)
+        return future
+
+    def _decode(self, future, key, fname, enforce):
+        """Decodes an image file on a worker thread."""
+        if future.cancelled():
+            self._decoded.put((future, key, fname, None, None))
+            return
+        try:
+            sf = load_image(fname, enforce)
+        except Exception as exc:
+            self._decoded.put((future, key, fname, None, exc))
+        else:
+            self._decoded.put((future, key, fname, sf, None))
+
+    def _resolve(self, item):
+        """Resolves the future of a decoded file."""
+        future, key, fname, sf, error = item
+        self._pending -= 1
+        del self._loading[key]
+        if not future.set_running_or_notify_cancel():
+            if sf is not None:
+                surface.SDL_FreeSurface(sf)
+            return
+        if error is None:
+            try:
+                sprite = self.factory._image_sprite(fname, sf)
+            except Exception as exc:
+                error = exc
+        if error is None:
+            future.set_result(sprite)
+        else:
+            future.set_exception(error)
+
+    def process(self):
+        """Creates the sprites of the decoded files, within the budget.
+
+        Returns:
+            int: the number of files resolved.
+        """
+        decoded = self._decoded
+        done = 0
+        nbytes = 0
+        while self.max_uploads is None or done < self.max_uploads:
+            item = self._next
+            if item is None:
+                try:
+                    item = decoded.get_nowait()
+                except queue.Empty:
+                    break
+            self._next = None
+            sf = item[3]
+            if sf is not None and self.max_bytes is not None:
+                size = sf.pitch * sf.h
+                if done and nbytes + size > self.max_bytes:
+                    self._next = item
+                    break
+                nbytes += size
+            self._resolve(item)
+            done += 1
+        return done
+
+    def flush(self, timeout=None):
+        """Waits for all pending files and resolves them, ignoring the
+        budget.
+
+        Raises:
+            queue.Empty: if no file was decoded within timeout seconds.
+        """
+        if self._next is not None:
+            item, self._next = self._next, None
+            self._resolve(item)
+        while self._pending:
+            self._resolve(self._decoded.get(timeout=timeout))
+
+    def close(self):
+        """Cancels the pending files and stops the worker threads.
+
+        Files, which are being decoded, are waited for and freed.
+        """
+        # cancelled files are skipped by the workers, so that shutting
+        # down only waits for the files already being decoded
+        for future in self._loading.values():
+            future.cancel()
+        self._executor.shutdown(wait=True)
+        items = [] if self._next is None else [self._next]
+        self._next = None
+        while True:
+            try:
+                items.append(self._decoded.get_nowait())
+            except queue.Empty:
+                break
+        for future, key, fname, sf, error in items:
+            self._pending -= 1
+            del self._loading[key]
+            future.cancel()
+            if sf is not None:
+                surface.SDL_FreeSurface(sf)
@@ -2,7 +2,7 @@
 
 import ctypes
 
-from . import common, font, resources, sprite, time, window
+from . import common, console, font, resources, sprite, time, window
 from .. import events, keycode, mouse, render, video
 from ..util import get_cfg, sdl2_path
 
@@ -19,7 +19,8 @@ class Manager(object):
 
     def __init__(
         self, width=None, height=None, tile_size=None,
-        limit_fps=None, window_color=None, resources_path=None
+        limit_fps=None, window_color=None, resources_path=None,
+        headless=False
     ):
         """Initialization.
 
@@ -35,6 +36,9 @@ class Manager(object):
             window_color (4-tuple): the window's background color, as a tuple
                 of 4 integers representing Red, Greehn, Blue and Alpha values
                 (0-255).
+            headless (bool): if True, draw into a
+                :class:`sdl2.ext.window.Offscreen` instead of a window, e.g.
+                for rendering with the "dummy" video driver.
 
         Usage:
             m = Manager()  # start with default parameters
@@ -49,13 +53,12 @@ class Manager(object):
         common.init()
 
         # Set the default arguments
-        desk_x, desk_y = window.get_display_mode()
-        self.width = (width or
-                      get_cfg("MANAGER", "SCREEN_WIDTH", True) or
-                      desk_x)
-        self.height = (height or
-                       get_cfg("MANAGER", "SCREEN_HEIGHT", True) or
-                       desk_y)
+        self.width = width or get_cfg("MANAGER", "SCREEN_WIDTH", True)
+        self.height = height or get_cfg("MANAGER", "SCREEN_HEIGHT", True)
+        if not self.width or not self.height:
+            desk_x, desk_y = window.get_display_mode()
+            self.width = self.width or desk_x
+            self.height = self.height or desk_y
         self.tile_size = tile_size or get_cfg("MANAGER", "TILE_SIZE", True)
         self.limit_fps = limit_fps or get_cfg("MANAGER", "LIMIT_FPS", True)
         self.window_color = window_color or get_cfg("MANAGER",
@@ -71,9 +74,15 @@ class Manager(object):
         # Create a new window (like your browser window or editor window,
         # etc.) and give it a meaningful title and size. We definitely need
         # this, if we want to present something to the user.
-        self.window = window.Window(
-            "Tiles", size=(self.width, self.height),
-            flags=video.SDL_WINDOW_BORDERLESS)
+        # In headless mode, an Offscreen surface takes the window's place.
+        self.headless = headless
+        if headless:
+            self.window = window.Offscreen((self.width, self.height),
+                                           title="Tiles")
+        else:
+            self.window = window.Window(
+                "Tiles", size=(self.width, self.height),
+                flags=video.SDL_WINDOW_BORDERLESS)
 
         # Create a renderer that supports hardware-accelerated sprites.
         self.renderer = sprite.Renderer(self.window)
@@ -95,22 +104,23 @@ class Manager(object):
         fname = self.resources.get_path("DejaVuSansMono-Bold32.png")
 
         # use the pysdl2 factory to create a tileset sprite from an image
-        tileset = self.factory.from_image(fname)
+        self.tileset = self.factory.from_image(fname)
 
         # use the new load_tileset function create on the factory
-        self.factory.load_tileset(tileset, self.tile_size)
+        self.factory.load_tileset(self.tileset, self.tile_size)
 
         # Creates a simple rendering system for the Window. The
         # SpriteRenderSystem can draw Sprite objects on the window.
         self.spriterenderer = self.factory.create_sprite_render_system(
             present=False)
 
-        # By default, every Window is hidden, not shown on the screen right
-        # after creation. Thus we need to tell it to be shown now.
-        self.window.show()
+        if not headless:
+            # By default, every Window is hidden, not shown on the screen
+            # right after creation. Thus we need to tell it to be shown now.
+            self.window.show()
 
-        # Enforce window raising just to be sure.
-        video.SDL_RaiseWindow(self.window.window)
+            # Enforce window raising just to be sure.
+            video.SDL_RaiseWindow(self.window.window)
 
         # Initialize the keyboard state controller.
         # PySDL2/SDL2 shouldn't need this but the basic procedure for getting
@@ -147,12 +157,24 @@ class Manager(object):
         # Now we hope we're never going to deal with this kind of stuff again
         return self._mouse_x, self._mouse_y
 
-    def run(self):
-        """Main loop handling events and updates."""
+    def run(self, frames=None):
+        """Main loop handling events and updates.
+
+        Args:
+            frames (int): the number of frames to run the loop for, e.g. to
+                render a replay headless. By default, the loop runs until
+                the manager is not alive anymore.
+        """
         while self.alive:
+            if frames is not None:
+                if frames <= 0:
+                    break
+                frames -= 1
             self.on_event()
             self.clock.tick(self.limit_fps)
             self.on_update()
+        # the fonts can't be closed anymore, once SDL_ttf has quit
+        self.factory.default_args["fontmanager"].close()
         return common.quit()
 
     def draw_fps(self):
@@ -255,6 +277,18 @@ class Manager(object):
         """Flip the GPU buffer."""
         render.SDL_RenderPresent(self.spriterenderer.sdlrenderer)
 
+    def create_console(self, fg=(255, 255, 255), bg=(0, 0, 0)):
+        """Create a Console covering the screen, using the tileset.
+
+        Args:
+            fg, bg: the default foreground and background colors.
+
+        Returns:
+            sdl2.ext.console.Console with `cols` columns and `rows` rows.
+        """
+        return console.Console(self.renderer, self.factory.tilesheet,
+                               self.tile_size, self.cols, self.rows, fg, bg)
+
     def set_scene(self, scene=None, **kwargs):
         """Set the scene.
 
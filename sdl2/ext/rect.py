@@ -38,7 +38,17 @@
 master/src/pygame_sdl2/rect.pyx
 """
 
+from itertools import chain
+from operator import attrgetter
+
 from ..rect import SDL_Rect
+from .compat import UnsupportedError
+
+_HASNUMPY = True
+try:
+    import numpy
+except ImportError:
+    _HASNUMPY = False
 
 
 def flatten(*args):
@@ -71,11 +81,20 @@ def to_sdl_rect(rl):
 
 
 class RectAbstract(object):
-    pass
+    __slots__ = ()
 
 
 class NonIterableRect(RectAbstract):
-    """Object for storing rectangular coordinates."""
+    """Object for storing rectangular coordinates.
+
+    The coordinates are kept in slots. Subclasses, which do not define
+    `__slots__` themselves, such as :class:`Rect`, have an instance
+    dictionary for further attributes and support weak references, while
+    :class:`CompactRect` does not. NonIterableRect objects themselves have
+    neither, so no further attributes can be set on them.
+    """
+
+    __slots__ = ("x", "y", "w", "h")
 
     def __init__(self, *args):
         """Initialization.
@@ -466,7 +485,7 @@ class NonIterableRect(RectAbstract):
             None
 
         """
-        if not isinstance(other, Rect):
+        if not isinstance(other, NonIterableRect):
             other = Rect(other)
 
         if self.w > other.w or self.h > other.h:
@@ -497,7 +516,7 @@ class NonIterableRect(RectAbstract):
         if type(other) == int:
             other = Rect(other, y, w, h)
 
-        if not isinstance(other, Rect):
+        if not isinstance(other, NonIterableRect):
             other = Rect(other)
 
         if not self.colliderect(other):
@@ -554,7 +573,7 @@ class NonIterableRect(RectAbstract):
         Returns:
             None
         """
-        if not isinstance(other, Rect):
+        if not isinstance(other, NonIterableRect):
             other = Rect(other)
 
         x = min(self.x, other.x)
@@ -608,7 +627,7 @@ class NonIterableRect(RectAbstract):
             Rect (a new Rect instance)
 
         """
-        if not isinstance(other, Rect):
+        if not isinstance(other, NonIterableRect):
             other = Rect(other)
 
         # Not sure if this is entirely correct. Docs and tests are ambiguous.
@@ -653,7 +672,7 @@ class NonIterableRect(RectAbstract):
         Returns:
             bool
         """
-        if not isinstance(other, Rect):
+        if not isinstance(other, NonIterableRect):
             other = Rect(other)
 
         return (other.x >= self.x and other.right <= self.right and
@@ -692,7 +711,7 @@ class NonIterableRect(RectAbstract):
         Returns:
             bool
         """
-        if not isinstance(other, Rect):
+        if not isinstance(other, NonIterableRect):
             other = Rect(other)
 
         return (self.left < other.right and self.top < other.bottom and
@@ -795,6 +814,8 @@ class NonIterableRect(RectAbstract):
 
 class IterableRect(RectAbstract):
 
+    __slots__ = ()
+
     def __len__(self):
         """..."""
         return 4
@@ -823,3 +844,782 @@ class IterableRect(RectAbstract):
 class Rect(NonIterableRect, IterableRect):
     pass
 
+
+class CompactRect(NonIterableRect, IterableRect):
+    """A Rect without instance dictionary.
+
+    CompactRect objects behave like :class:`Rect` objects, but only store
+    their coordinates, so that they take less memory and their attributes
+    are accessed faster. No other attributes can be set on them. Methods
+    returning a new rectangle return a CompactRect, where they would
+    return a copy of a Rect.
+    """
+
+    __slots__ = ()
+
+    def copy(self):
+        """Copy the rectangle.
+
+        Returns:
+            CompactRect (a new CompactRect instance)
+        """
+        return CompactRect(self)
+
+
+_xywh = attrgetter("x", "y", "w", "h")
+
+
+def _columns(other):
+    """Get the x, y, w and h of a rect-like object or RectArray.
+
+    For a RectArray, the columns are returned as arrays, so that they
+    broadcast against those of another RectArray of the same length.
+    """
+    if isinstance(other, RectArray):
+        array = other.array
+        return array[:, 0], array[:, 1], array[:, 2], array[:, 3]
+    if not isinstance(other, (NonIterableRect, SDL_Rect)):
+        other = Rect(other)
+    return _xywh(other)
+
+
+class RectArray(object):
+    """Many rectangles, stored in a single NumPy array.
+
+    The rectangles are kept as rows of (x, y, w, h) values in an int32
+    array of shape (n, 4), which is laid out like a C array of SDL_Rect
+    structures. The collision and geometry methods work on all rectangles
+    at once and return boolean masks, index arrays or new RectArray
+    objects instead of looping over Rect objects in Python.
+
+    Methods taking another rectangle accept a rect-like object, which is
+    used for all rectangles, or a RectArray of the same length, whose
+    rectangles are used row by row.
+    """
+
+    def __init__(self, rects=()):
+        """Creates a new RectArray.
+
+        Args:
+            rects: an array-like of shape (n, 4), a ctypes array of SDL_Rect
+                structures or a sequence of Rect (or other objects having
+                x, y, w and h attributes) objects. NumPy arrays of int32 are
+                used as they are, all other values are copied.
+
+        Raises:
+            UnsupportedError: if NumPy is not available.
+        """
+        if not _HASNUMPY:
+            raise UnsupportedError(RectArray,
+                                   "numpy module could not be loaded")
+        if isinstance(rects, RectArray):
+            array = rects.array.copy()
+        elif isinstance(rects, numpy.ndarray):
+            array = numpy.ascontiguousarray(rects, dtype=numpy.int32)
+        elif len(rects) and isinstance(rects[0], (RectAbstract, SDL_Rect)):
+            if isinstance(rects[0], SDL_Rect) and \
+                    not isinstance(rects, (list, tuple)):
+                # a ctypes array of SDL_Rect structures
+                array = numpy.frombuffer(rects, dtype=numpy.int32).copy()
+            else:
+                array = numpy.fromiter(chain.from_iterable(map(_xywh, rects)),
+                                       dtype=numpy.int32,
+                                       count=4 * len(rects))
+        else:
+            array = numpy.array(rects, dtype=numpy.int32)
+        array = array.reshape(-1, 4)
+        self.array = array
+
+    @classmethod
+    def _from_columns(cls, x, y, w, h):
+        """Creates a RectArray from (broadcastable) coordinate columns."""
+        x, y, w, h = numpy.broadcast_arrays(x, y, w, h)
+        return cls(numpy.stack((x, y, w, h), axis=1).astype(numpy.int32))
+
+    def __len__(self):
+        return len(self.array)
+
+    def __repr__(self):
+        return "RectArray(%d)" % len(self.array)
+
+    def __getitem__(self, key):
+        """Gets a single rectangle as Rect, or a RectArray for a slice,
+        index array or boolean mask."""
+        if isinstance(key, (int, numpy.integer)):
+            return Rect(*self.array[key].tolist())
+        return RectArray(self.array[key])
+
+    def __setitem__(self, key, rect):
+        if isinstance(rect, RectArray):
+            rect = rect.array
+        elif not isinstance(rect, numpy.ndarray):
+            rect = _columns(rect)
+        self.array[key] = rect
+
+    @property
+    def x(self):
+        """The x coordinates of the rectangles, as view."""
+        return self.array[:, 0]
+
+    @property
+    def y(self):
+        """The y coordinates of the rectangles, as view."""
+        return self.array[:, 1]
+
+    @property
+    def w(self):
+        """The widths of the rectangles, as view."""
+        return self.array[:, 2]
+
+    @property
+    def h(self):
+        """The heights of the rectangles, as view."""
+        return self.array[:, 3]
+
+    @property
+    def right(self):
+        """The right edges of the rectangles, as new array."""
+        return self.array[:, 0] + self.array[:, 2]
+
+    @property
+    def bottom(self):
+        """The bottom edges of the rectangles, as new array."""
+        return self.array[:, 1] + self.array[:, 3]
+
+    def copy(self):
+        """Copy the rectangles.
+
+        Returns:
+            RectArray (a new RectArray instance)
+        """
+        return RectArray(self.array.copy())
+
+    def to_rects(self, cls=Rect):
+        """Converts the rectangles into a list of Rect objects.
+
+        Args:
+            cls (type): the Rect class to create, e.g. :class:`CompactRect`.
+
+        Returns:
+            list
+        """
+        return list(map(cls, self.array.tolist()))
+
+    def to_sdl_rects(self):
+        """Gets the rectangles as a ctypes array of SDL_Rect structures.
+
+        The ctypes array shares the memory of the RectArray, so that it can
+        be passed to SDL functions (e.g. SDL_RenderFillRects) without
+        copying, and reflects later changes to the RectArray.
+
+        Returns:
+            ctypes array of :class:`sdl2.rect.SDL_Rect`
+        """
+        return (SDL_Rect * len(self.array)).from_buffer(self.array)
+
+    def move(self, x, y):
+        """Move the rectangles.
+
+        x and y may be single values or arrays with a value per rectangle.
+
+        Returns:
+            RectArray (a new RectArray instance)
+        """
+        r = self.copy()
+        r.move_ip(x, y)
+        return r
+
+    def move_ip(self, x, y):
+        """Move the rectangles, in place.
+
+        Returns:
+            None
+        """
+        self.array[:, 0] += x
+        self.array[:, 1] += y
+
+    def collidepoint(self, x, y):
+        """Test which rectangles contain a point.
+
+        A point along the right or bottom edge is not considered to be
+        inside a rectangle, as with :meth:`Rect.collidepoint`.
+
+        Returns:
+            numpy.ndarray (a boolean mask of the rectangles containing it)
+        """
+        rx, ry, rw, rh = self.array.T
+        return (rx <= x) & (rx + rw > x) & (ry <= y) & (ry + rh > y)
+
+    def colliderect(self, other):
+        """Test which rectangles overlap another.
+
+        Usage:
+            numpy.flatnonzero(rects.colliderect(mouse_rect))
+
+        Returns:
+            numpy.ndarray (a boolean mask of the overlapping rectangles)
+        """
+        x, y, w, h = _columns(other)
+        rx, ry, rw, rh = self.array.T
+        return ((rx < x + w) & (ry < y + h) & (rx + rw > x) &
+                (ry + rh > y))
+
+    def contains(self, other):
+        """Test which rectangles completely contain another.
+
+        Returns:
+            numpy.ndarray (a boolean mask)
+        """
+        x, y, w, h = _columns(other)
+        rx, ry, rw, rh = self.array.T
+        return ((x >= rx) & (x + w <= rx + rw) & (y >= ry) &
+                (y + h <= ry + rh) & (x < rx + rw) & (y < ry + rh))
+
+    def collide_all_pairs(self, other=None):
+        """Find all pairs of overlapping rectangles.
+
+        The rectangles are sorted by their left edge, so that only the
+        pairs overlapping horizontally are tested further, instead of all
+        n * n pairs.
+
+        Args:
+            other (RectArray): the rectangles to test against. If None, the
+                rectangles are tested against each other.
+
+        Returns:
+            numpy.ndarray (an array of shape (k, 2) of (i, j) index pairs.
+            Without other, i < j indexes this RectArray; else, i indexes
+            this RectArray and j other. The pairs are sorted)
+        """
+        if other is None:
+            array = self.array
+        else:
+            array = numpy.concatenate((self.array, other.array))
+        count = len(array)
+        left = array[:, 0].astype(numpy.int64)
+        order = numpy.argsort(left, kind="stable")
+        left = left[order]
+        right = left + array[order, 2]
+        # candidates of i are i + 1 ... end - 1, which start before i ends
+        end = numpy.searchsorted(left, right, side="left")
+        counts = numpy.maximum(end - numpy.arange(1, count + 1), 0)
+        total = int(counts.sum())
+        first = numpy.repeat(numpy.arange(count), counts)
+        offsets = numpy.arange(total) - numpy.repeat(
+            numpy.cumsum(counts) - counts, counts)
+        pairs = numpy.stack((order[first], order[first + 1 + offsets]),
+                            axis=1)
+
+        a = array[pairs[:, 0]].astype(numpy.int64)
+        b = array[pairs[:, 1]].astype(numpy.int64)
+        hit = ((a[:, 0] < b[:, 0] + b[:, 2]) & (a[:, 1] < b[:, 1] + b[:, 3]) &
+               (a[:, 0] + a[:, 2] > b[:, 0]) & (a[:, 1] + a[:, 3] > b[:, 1]))
+        pairs = numpy.sort(pairs[hit], axis=1)
+        if other is not None:
+            size = len(self.array)
+            pairs = pairs[(pairs[:, 0] < size) & (pairs[:, 1] >= size)]
+            pairs[:, 1] -= size
+        return pairs[numpy.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+    def clip(self, other):
+        """Crop the rectangles inside another.
+
+        Rectangles not overlapping the other one become (0, 0, 0, 0), as
+        with :meth:`Rect.clip`.
+
+        Returns:
+            RectArray (a new RectArray instance)
+        """
+        x, y, w, h = _columns(other)
+        rx, ry, rw, rh = self.array.T
+        left = numpy.maximum(rx, x)
+        top = numpy.maximum(ry, y)
+        right = numpy.minimum(rx + rw, x + w)
+        bottom = numpy.minimum(ry + rh, y + h)
+        hit = self.colliderect(other)
+        return RectArray._from_columns(
+            numpy.where(hit, left, 0), numpy.where(hit, top, 0),
+            numpy.where(hit, right - left, 0),
+            numpy.where(hit, bottom - top, 0))
+
+    def union(self, other):
+        """Join the rectangles with another.
+
+        Returns:
+            RectArray (a new RectArray instance with the rectangles covering
+            each rectangle and the other)
+        """
+        x, y, w, h = _columns(other)
+        rx, ry, rw, rh = self.array.T
+        left = numpy.minimum(rx, x)
+        top = numpy.minimum(ry, y)
+        return RectArray._from_columns(
+            left, top, numpy.maximum(rx + rw, x + w) - left,
+            numpy.maximum(ry + rh, y + h) - top)
+
+    def unionall(self):
+        """Join all rectangles into one.
+
+        Returns:
+            Rect (a new Rect instance), or None, if the RectArray is empty
+        """
+        if not len(self.array):
+            return None
+        rx, ry, rw, rh = self.array.T
+        left, top = int(rx.min()), int(ry.min())
+        return Rect(left, top, int((rx + rw).max()) - left,
+                    int((ry + rh).max()) - top)
+
+    def clamp(self, other):
+        """Move the rectangles inside another.
+
+        Rectangles too large to fit inside are centered on the other one,
+        as with :meth:`Rect.clamp`.
+
+        Returns:
+            RectArray (a new RectArray instance)
+        """
+        x, y, w, h = _columns(other)
+        rx, ry, rw, rh = self.array.T
+        # the order matches Rect.clamp_ip: the left and top edges win
+        cx = numpy.where(rx + rw > x + w, x + w - rw, rx)
+        cx = numpy.where(rx < x, x, cx)
+        cy = numpy.where(ry + rh > y + h, y + h - rh, ry)
+        cy = numpy.where(ry < y, y, cy)
+        large = (rw > w) | (rh > h)
+        cx = numpy.where(large, rx + (x + w // 2) - (rx + rw // 2), cx)
+        cy = numpy.where(large, ry + (y + h // 2) - (ry + rh // 2), cy)
+        return RectArray._from_columns(cx, cy, rw, rh)
+
+
+def _edges(rect):
+    """Get the (left, top, right, bottom) edges of a rect-like object."""
+    if not isinstance(rect, (NonIterableRect, SDL_Rect)):
+        rect = Rect(rect)
+    x, y = rect.x, rect.y
+    return x, y, x + rect.w, y + rect.h
+
+
+class _SpatialIndex(object):
+    """Base class for the spatial indexes of rectangles.
+
+    An index maps items to the bounds they were inserted or last moved
+    with. The items are any hashable objects, such as Rect and Sprite
+    objects, whose bounds are read from their x, y, w and h attributes,
+    or the row indices of a RectArray. As plain rectangles cannot tell
+    the index when they change, :meth:`move` has to be called for moved
+    or resized items. Inheriting classes implement _file() and _unfile().
+    """
+    def __init__(self):
+        self._bounds = {}
+
+    def __len__(self):
+        return len(self._bounds)
+
+    def __contains__(self, item):
+        return item in self._bounds
+
+    def __iter__(self):
+        return iter(self._bounds)
+
+    def _file(self, item, edges):
+        raise NotImplementedError()
+
+    def _unfile(self, item, edges):
+        raise NotImplementedError()
+
+    def insert(self, item, rect=None):
+        """Adds an item.
+
+        Args:
+            item: the item to add.
+            rect: the bounds of the item. If None, they are read from the
+                x, y, w and h attributes of the item.
+
+        Raises:
+            KeyError: if the item is already contained.
+        """
+        if item in self._bounds:
+            raise KeyError(item)
+        edges = _edges(item if rect is None else rect)
+        self._bounds[item] = edges
+        self._file(item, edges)
+
+    def insert_many(self, items, rects=None):
+        """Adds many items.
+
+        If items is a RectArray, its row indices are added as items, with
+        the rows as their bounds. Otherwise, rects may be a RectArray or a
+        sequence of rect-like objects with the bounds of the items.
+        """
+        if isinstance(items, RectArray):
+            items, rects = range(len(items)), items
+        if rects is None:
+            for item in items:
+                self.insert(item)
+            return
+        if isinstance(rects, RectArray):
+            rects = rects.array.tolist()
+        for item, rect in zip(items, rects):
+            self.insert(item, rect)
+
+    def remove(self, item):
+        """Removes an item.
+
+        Raises:
+            KeyError: if the item is not contained.
+        """
+        self._unfile(item, self._bounds.pop(item))
+
+    def move(self, item, rect=None):
+        """Updates the bounds of an item, which moved or changed its size.
+
+        Args:
+            item: the contained item.
+            rect: the new bounds of the item. If None, they are read from
+                the x, y, w and h attributes of the item.
+
+        Raises:
+            KeyError: if the item is not contained.
+        """
+        old = self._bounds[item]
+        edges = _edges(item if rect is None else rect)
+        if edges != old:
+            self._unfile(item, old)
+            self._bounds[item] = edges
+            self._file(item, edges)
+
+    def clear(self):
+        """Removes all items."""
+        for item in list(self._bounds):
+            self.remove(item)
+
+    def query_rect(self, rect):
+        """Gets the items overlapping a rectangle, in no particular order.
+
+        As for :meth:`Rect.colliderect`, items merely touching the edges
+        of the rectangle do not overlap it.
+        """
+        raise NotImplementedError()
+
+    def query_point(self, x, y):
+        """Gets the items containing a point, in no particular order.
+
+        As for :meth:`Rect.collidepoint`, a point along the right or
+        bottom edge is not inside an item.
+        """
+        raise NotImplementedError()
+
+    def query_pairs(self):
+        """Gets all pairs of overlapping items.
+
+        Returns:
+            list of (item, item) tuples, each pair being listed once
+        """
+        raise NotImplementedError()
+
+
+class UniformGrid(_SpatialIndex):
+    """A spatial index dividing the plane into square cells.
+
+    Every item is filed in all cells its bounds overlap, so that queries
+    only test the items of the cells they touch. Moving an item within
+    the same cells costs a single comparison. The grid works best with
+    items of similar sizes, with cells about twice as large as the items.
+    """
+    def __init__(self, cell_size=64):
+        """Creates a new, empty UniformGrid.
+
+        Raises:
+            ValueError: if cell_size is not a positive number.
+        """
+        super(UniformGrid, self).__init__()
+        if cell_size <= 0:
+            raise ValueError("cell_size must be greater than 0")
+        self.cell_size = cell_size
+        self._cells = {}
+        self._ranges = {}
+
+    def _cell_range(self, x1, y1, x2, y2):
+        size = self.cell_size
+        # Empty areas still occupy the cell of their position.
+        return (int(x1 // size), int(y1 // size),
+                int((max(x2, x1 + 1) - 1) // size),
+                int((max(y2, y1 + 1) - 1) // size))
+
+    def _file(self, item, edges):
+        cells = self._cell_range(*edges)
+        cx1, cy1, cx2, cy2 = cells
+        allcells = self._cells
+        for cy in range(cy1, cy2 + 1):
+            for cx in range(cx1, cx2 + 1):
+                cell = allcells.get((cx, cy))
+                if cell is None:
+                    cell = allcells[(cx, cy)] = {}
+                cell[item] = edges
+        self._ranges[item] = cells
+
+    def _unfile(self, item, edges):
+        cx1, cy1, cx2, cy2 = self._ranges.pop(item)
+        allcells = self._cells
+        for cy in range(cy1, cy2 + 1):
+            for cx in range(cx1, cx2 + 1):
+                cell = allcells[(cx, cy)]
+                del cell[item]
+                if not cell:
+                    del allcells[(cx, cy)]
+
+    def move(self, item, rect=None):
+        """Updates the bounds of an item, which moved or changed its size."""
+        old = self._bounds[item]
+        edges = _edges(item if rect is None else rect)
+        if edges == old:
+            return
+        cells = self._cell_range(*edges)
+        if cells != self._ranges[item]:
+            self._unfile(item, old)
+            self._bounds[item] = edges
+            self._file(item, edges)
+            return
+        # same cells: only the stored bounds change
+        self._bounds[item] = edges
+        cx1, cy1, cx2, cy2 = cells
+        allcells = self._cells
+        for cy in range(cy1, cy2 + 1):
+            for cx in range(cx1, cx2 + 1):
+                allcells[(cx, cy)][item] = edges
+
+    def query_rect(self, rect):
+        """Gets the items overlapping a rectangle, in no particular order."""
+        x1, y1, x2, y2 = _edges(rect)
+        cx1, cy1, cx2, cy2 = self._cell_range(x1, y1, x2, y2)
+        allcells = self._cells
+        found = {}
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > len(allcells):
+            # Cheaper to visit the occupied cells than the queried ones.
+            for (cx, cy), cell in allcells.items():
+                if cx1 <= cx <= cx2 and cy1 <= cy <= cy2:
+                    found.update(cell)
+        else:
+            for cy in range(cy1, cy2 + 1):
+                for cx in range(cx1, cx2 + 1):
+                    cell = allcells.get((cx, cy))
+                    if cell:
+                        found.update(cell)
+        return [item for item, (l, t, r, b) in found.items()
+                if l < x2 and t < y2 and r > x1 and b > y1]
+
+    def query_point(self, x, y):
+        """Gets the items containing a point, in no particular order."""
+        size = self.cell_size
+        cell = self._cells.get((int(x // size), int(y // size)))
+        if not cell:
+            return []
+        return [item for item, (l, t, r, b) in cell.items()
+                if l <= x < r and t <= y < b]
+
+    def query_pairs(self):
+        """Gets all pairs of overlapping items, each pair being listed once."""
+        ranges = self._ranges
+        pairs = []
+        append = pairs.append
+        for (cx, cy), cell in self._cells.items():
+            if len(cell) < 2:
+                continue
+            entries = list(cell.items())
+            for i, (a, (l, t, r, b)) in enumerate(entries):
+                ra = ranges[a]
+                for other, (l2, t2, r2, b2) in entries[i + 1:]:
+                    if not (l < r2 and t < b2 and r > l2 and b > t2):
+                        continue
+                    rb = ranges[other]
+                    # only report the pair in the first cell both share
+                    if max(ra[0], rb[0]) == cx and max(ra[1], rb[1]) == cy:
+                        append((a, other))
+        return pairs
+
+
+class _QuadNode(object):
+    """A node of a QuadTree, covering an area."""
+
+    __slots__ = ("x1", "y1", "x2", "y2", "depth", "items", "children")
+
+    def __init__(self, x1, y1, x2, y2, depth):
+        self.x1 = x1
+        self.y1 = y1
+        self.x2 = x2
+        self.y2 = y2
+        self.depth = depth
+        self.items = {}
+        self.children = None
+
+    def child_for(self, edges):
+        """Gets the child completely containing the edges, if any."""
+        l, t, r, b = edges
+        mx = (self.x1 + self.x2) / 2
+        my = (self.y1 + self.y2) / 2
+        if r <= mx and l >= self.x1:
+            col = 0
+        elif l >= mx and r <= self.x2:
+            col = 1
+        else:
+            return None
+        if b <= my and t >= self.y1:
+            row = 0
+        elif t >= my and b <= self.y2:
+            row = 1
+        else:
+            return None
+        return self.children[row * 2 + col]
+
+
+class QuadTree(_SpatialIndex):
+    """A spatial index recursively splitting an area into quarters.
+
+    Every item is kept in the smallest node that completely contains its
+    bounds. Nodes holding more than `max_items` items are split into four
+    children, up to a depth of `max_depth`. Items outside of the area of
+    the tree are kept in its root node. Unlike the UniformGrid, the
+    QuadTree copes well with items of very different sizes and sparse
+    worlds.
+    """
+    def __init__(self, area, max_items=8, max_depth=8):
+        """Creates a new, empty QuadTree.
+
+        Args:
+            area: the (x, y, w, h) area covered by the tree.
+            max_items (int): the number of items of a node, above which the
+                node is split.
+            max_depth (int): the maximum depth of nodes.
+
+        Raises:
+            ValueError: if the area is empty or max_items is less than 1.
+        """
+        super(QuadTree, self).__init__()
+        x1, y1, x2, y2 = _edges(area)
+        if x2 <= x1 or y2 <= y1:
+            raise ValueError("area must not be empty")
+        if max_items < 1:
+            raise ValueError("max_items must be greater than 0")
+        self.max_items = max_items
+        self.max_depth = max_depth
+        self._root = _QuadNode(x1, y1, x2, y2, 0)
+        self._nodes = {}
+
+    @property
+    def area(self):
+        """The (x, y, w, h) area covered by the tree."""
+        root = self._root
+        return root.x1, root.y1, root.x2 - root.x1, root.y2 - root.y1
+
+    def _file(self, item, edges):
+        node = self._root
+        while node.children is not None:
+            child = node.child_for(edges)
+            if child is None:
+                break
+            node = child
+        node.items[item] = edges
+        self._nodes[item] = node
+        if node.children is None and len(node.items) > self.max_items and \
+                node.depth < self.max_depth:
+            self._split(node)
+
+    def _split(self, node):
+        x1, y1, x2, y2 = node.x1, node.y1, node.x2, node.y2
+        mx, my = (x1 + x2) / 2, (y1 + y2) / 2
+        depth = node.depth + 1
+        node.children = (_QuadNode(x1, y1, mx, my, depth),
+                         _QuadNode(mx, y1, x2, my, depth),
+                         _QuadNode(x1, my, mx, y2, depth),
+                         _QuadNode(mx, my, x2, y2, depth))
+        items = node.items
+        node.items = {}
+        for item, edges in items.items():
+            self._file(item, edges)
+
+    def _unfile(self, item, edges):
+        del self._nodes.pop(item).items[item]
+
+    def move(self, item, rect=None):
+        """Updates the bounds of an item, which moved or changed its size."""
+        old = self._bounds[item]
+        edges = _edges(item if rect is None else rect)
+        if edges == old:
+            return
+        node = self._nodes[item]
+        self._bounds[item] = edges
+        l, t, r, b = edges
+        if (node is self._root or (l >= node.x1 and t >= node.y1 and
+                                   r <= node.x2 and b <= node.y2)) and \
+                (node.children is None or node.child_for(edges) is None):
+            # still the smallest node containing the item
+            node.items[item] = edges
+            return
+        del node.items[item]
+        self._file(item, edges)
+
+    def clear(self):
+        """Removes all items."""
+        self._bounds.clear()
+        self._nodes.clear()
+        root = self._root
+        self._root = _QuadNode(root.x1, root.y1, root.x2, root.y2, 0)
+
+    def query_rect(self, rect):
+        """Gets the items overlapping a rectangle, in no particular order."""
+        x1, y1, x2, y2 = _edges(rect)
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            found.extend(item for item, (l, t, r, b) in node.items.items()
+                         if l < x2 and t < y2 and r > x1 and b > y1)
+            if node.children is not None:
+                # items touching a node's edges still may overlap
+                stack.extend(c for c in node.children
+                             if c.x1 <= x2 and c.y1 <= y2 and
+                             c.x2 >= x1 and c.y2 >= y1)
+        return found
+
+    def query_point(self, x, y):
+        """Gets the items containing a point, in no particular order."""
+        found = []
+        node = self._root
+        while node is not None:
+            found.extend(item for item, (l, t, r, b) in node.items.items()
+                         if l <= x < r and t <= y < b)
+            children = node.children
+            node = None
+            if children is not None:
+                for child in children:
+                    if child.x1 <= x < child.x2 and child.y1 <= y < child.y2:
+                        node = child
+                        break
+        return found
+
+    def query_pairs(self):
+        """Gets all pairs of overlapping items, each pair being listed once."""
+        pairs = []
+        append = pairs.append
+        # the items of the ancestors, which may overlap a node's items
+        stack = [(self._root, [])]
+        while stack:
+            node, above = stack.pop()
+            entries = list(node.items.items())
+            for i, (a, (l, t, r, b)) in enumerate(entries):
+                for other, (l2, t2, r2, b2) in entries[i + 1:]:
+                    if l < r2 and t < b2 and r > l2 and b > t2:
+                        append((a, other))
+                for other, (l2, t2, r2, b2) in above:
+                    if l < r2 and t < b2 and r > l2 and b > t2:
+                        append((other, a))
+            if node.children is not None:
+                above = above + entries
+                for child in node.children:
+                    x1, y1, x2, y2 = child.x1, child.y1, child.x2, child.y2
+                    stack.append((child, [
+                        entry for entry in above
+                        if entry[1][0] <= x2 and entry[1][1] <= y2 and
+                        entry[1][2] >= x1 and entry[1][3] >= y1]))
+        return pairs
@@ -11,32 +11,162 @@ from __future__ import (absolute_import, division,
                         print_function, unicode_literals)
 from builtins import *
 
-from ctypes import byref, cast, POINTER, c_int, c_float, c_uint8
+from ctypes import (byref, cast, memmove, sizeof, addressof, string_at,
+                    POINTER, c_int, c_float, c_uint8, c_void_p)
+import bisect
+from collections import OrderedDict
+import hashlib
+from math import floor
+import os
 import warnings
+import weakref
 
 from .. import blendmode, surface, rect, video, pixels, render, rwops
 from ..stdinc import Uint8, Uint32
 from ..util import iter_nested
 
+from .algorithms import pack_rects
 from .common import SDLError
-from .color import convert_to_color
+from .color import Color, convert_to_color
 from .ebs import System
-from .surface import subsurface
-from .window import Window, get_display_mode
+from .surface import subsurface, optimize_surface, is_fast_blit
+from .window import Offscreen, Window
 from .image import load_image
 from .rect import to_sdl_rect, NonIterableRect
 
+_HASNUMPY = True
+try:
+    import numpy
+except ImportError:
+    _HASNUMPY = False
+
 __all__ = (
     "Sprite", "SoftwareSprite", "TextureSprite", "SpriteFactory",
     "SoftwareSpriteRenderSystem", "SpriteRenderSystem",
-    "TextureSpriteRenderSystem", "Renderer", "TEXTURE", "SOFTWARE")
+    "TextureSpriteRenderSystem", "SpriteIndex", "SpatialHash", "Camera",
+    "StaticLayer", "Renderer", "RenderBatch", "TextureLock", "SpriteSheet",
+    "TextureCache", "TEXTURE", "SOFTWARE")
 
 TEXTURE = 0
 SOFTWARE = 1
 
+_UNKNOWN = object()
+_color_keys = {}
+
+
+def _color_key(color):
+    """Convert a color value to a (r, g, b, a) tuple.
+
+    Conversions of hashable values (ints, strings, tuples) are memoized, so
+    that passing the same color over and over does not allocate a Color.
+    """
+    try:
+        return _color_keys[color]
+    except KeyError:
+        pass
+    except TypeError:
+        # unhashable, e.g. a Color
+        c = convert_to_color(color)
+        return (c.r, c.g, c.b, c.a)
+    c = convert_to_color(color)
+    key = (c.r, c.g, c.b, c.a)
+    if len(_color_keys) >= 1024:
+        _color_keys.clear()
+    _color_keys[color] = key
+    return key
+
+
+def _geometry_buffer(data, ctype):
+    """Wrap an int32 buffer as a ctypes array of `ctype`, without copying.
+
+    Contiguous int32 NumPy arrays of shape (N, 2) or (N, 4), array.array
+    objects with typecode "i" and any other object exporting a matching
+    buffer are accepted. Read-only buffers are copied with a single memcpy.
+
+    Args:
+        data (object): the buffer to be wrapped.
+        ctype (ctypes.Structure): `sdl2.rect.SDL_Point` or
+            `sdl2.rect.SDL_Rect`.
+
+    Returns:
+        ctypes array of `ctype`, or None if data is not such a buffer (in
+        which case the caller should fall back to element-wise conversion).
+
+    Raises:
+        ValueError if the buffer size is not a multiple of `ctype`.
+    """
+    if isinstance(data, (tuple, list)):
+        return None
+    try:
+        view = memoryview(data)
+    except TypeError:
+        return None
+    if view.itemsize != 4 or view.format.lstrip("@=") not in ("i", "l") or \
+            not view.c_contiguous:
+        return None
+    size = sizeof(ctype)
+    if view.nbytes % size or (view.ndim > 1 and view.shape[-1] * 4 != size):
+        raise ValueError("buffer does not contain a valid set of %s" %
+                         ctype.__name__)
+    arraytype = ctype * (view.nbytes // size)
+    if view.readonly:
+        return arraytype.from_buffer_copy(view)
+    return arraytype.from_buffer(view)
+
+
+def _merge_rects(rects):
+    """Merge overlapping (x, y, w, h) rects into their unions.
+
+    Empty rects are dropped. Rects that only touch each other are kept
+    apart.
+
+    Returns:
+        list of (x, y, w, h) tuples, none of which overlap.
+    """
+    merged = []
+    for x, y, w, h in rects:
+        if w <= 0 or h <= 0:
+            continue
+        x2 = x + w
+        y2 = y + h
+        idx = 0
+        while idx < len(merged):
+            mx, my, mx2, my2 = merged[idx]
+            if x < mx2 and mx < x2 and y < my2 and my < y2:
+                x, y = min(x, mx), min(y, my)
+                x2, y2 = max(x2, mx2), max(y2, my2)
+                del merged[idx]
+                # the union may now overlap rects checked before
+                idx = 0
+            else:
+                idx += 1
+        merged.append((x, y, x2, y2))
+    return [(x, y, x2 - x, y2 - y) for x, y, x2, y2 in merged]
+
+
+def _texture_mods(texture):
+    """Gets the ((r, g, b), alpha) color and alpha mod of a texture."""
+    r, g, b, a = Uint8(), Uint8(), Uint8(), Uint8()
+    if (render.SDL_GetTextureColorMod(texture, byref(r), byref(g),
+                                      byref(b)) or
+            render.SDL_GetTextureAlphaMod(texture, byref(a))):
+        raise SDLError()
+    return (r.value, g.value, b.value), a.value
+
 
 class Renderer(object):
-    """SDL2-based renderer for windows and sprites."""
+    """SDL2-based renderer for windows and sprites.
+
+    The Renderer keeps track of its draw color, blend mode, scale, viewport,
+    clip rect and render target on the Python side and only calls into SDL
+    when one of them actually changes. The :attr:`cache_hits` and
+    :attr:`cache_misses` counters show how many SDL calls were saved and
+    made. If the state is modified through the raw `sdl2.render` functions,
+    :meth:`invalidate_cache` must be called afterwards.
+    """
+
+    _batch = None
+    _drawbuffer = None
 
     def __init__(
         self, target, index=-1, logical_size=None,
@@ -46,11 +176,16 @@ class Renderer(object):
 
         If target is a Window or SDL_Window, index and flags are passed
         to the relevant sdl.render.create_renderer() call. If target is
-        a SoftwareSprite or SDL_Surface, the index and flags arguments are
-        ignored.
+        a SoftwareSprite, Offscreen or SDL_Surface, the index and flags
+        arguments are ignored.
         """
         self.sdlrenderer = None
         self.rendertaget = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._state = {}
+        self._color = None
+        self._target = None
         if isinstance(target, Window):
             self.sdlrenderer = render.SDL_CreateRenderer(target.window, index,
                                                          flags)
@@ -58,10 +193,11 @@ class Renderer(object):
         elif isinstance(target, video.SDL_Window):
             self.sdlrenderer = render.SDL_CreateRenderer(target, index, flags)
             self.rendertarget = target
-        elif isinstance(target, SoftwareSprite):
+        elif isinstance(target, (SoftwareSprite, Offscreen)):
             self.sdlrenderer = render.SDL_CreateSoftwareRenderer(
                 target.surface)
             self.rendertarget = target.surface
+            self._owner = target  # Keeps the surface alive
         elif isinstance(target, surface.SDL_Surface):
             self.sdlrenderer = render.SDL_CreateSoftwareRenderer(target)
             self.rendertarget = target
@@ -95,67 +231,263 @@ class Renderer(object):
     def logical_size(self, size):
         """The logical pixel size of the Renderer"""
         width, height = size
+        self._flush_batch()
         ret = render.SDL_RenderSetLogicalSize(self.sdlrenderer, width, height)
         if ret != 0:
             raise SDLError()
+        # SDL recalculates the scale and viewport for the logical size
+        self._state.pop("scale", None)
+        self._state.pop("viewport", None)
+
+    def invalidate_cache(self):
+        """Forget the cached render state.
+
+        The state will be read from (or written to) SDL on its next use.
+        This includes the render :attr:`target`, which is read back from SDL
+        on its next access. The drawing :attr:`color` of the Renderer is
+        kept and passed to SDL again on its next use, since the SDL draw
+        color may still hold the one of an operation with an explicit color.
+        """
+        self._state.clear()
+
+    def _flush_batch(self):
+        """Execute the commands recorded by the :class:`RenderBatch`.
+
+        Called before the render state changes and before drawing without
+        the batch, so that the recorded commands are drawn in order and
+        with the state they were recorded with.
+        """
+        if self._drawbuffer is not None:
+            self._drawbuffer.flush()
+
+    def _cached(self, key, value):
+        """Check if the cached state of key is value, counting hits/misses."""
+        if self._state.get(key, _UNKNOWN) == value:
+            self.cache_hits += 1
+            return True
+        self.cache_misses += 1
+        return False
+
+    def _current_color(self):
+        """The (r, g, b, a) tuple of :attr:`color`."""
+        if self._color is None:
+            r, g, b, a = Uint8(), Uint8(), Uint8(), Uint8()
+            ret = render.SDL_GetRenderDrawColor(
+                self.sdlrenderer, byref(r), byref(g), byref(b), byref(a))
+            if ret == -1:
+                raise SDLError()
+            self._color = (r.value, g.value, b.value, a.value)
+            self._state["color"] = self._color
+        return self._color
+
+    def _set_draw_color(self, key):
+        """Set the SDL draw color to the (r, g, b, a) tuple key."""
+        if self._cached("color", key):
+            return
+        ret = render.SDL_SetRenderDrawColor(self.sdlrenderer, *key)
+        if ret == -1:
+            self._state.pop("color", None)
+            raise SDLError()
+        self._state["color"] = key
+
+    def _use_color(self, color):
+        """Set the SDL draw color to color or, if None, to :attr:`color`.
+
+        The SDL draw color is not reset afterwards; it is set back lazily,
+        once the next operation without an explicit color happens.
+        """
+        if color is None:
+            self._set_draw_color(self._current_color())
+        else:
+            self._set_draw_color(_color_key(color))
 
     @property
     def color(self):
         """The drawing color of the Renderer."""
-        r, g, b, a = Uint8(), Uint8(), Uint8(), Uint8()
-        ret = render.SDL_GetRenderDrawColor(self.sdlrenderer, byref(r), byref(g),
-                                            byref(b), byref(a))
-        if ret == -1:
-            raise SDLError()
-        return convert_to_color((r.value, g.value, b.value, a.value))
+        return convert_to_color(self._current_color())
 
     @color.setter
     def color(self, value):
         """The drawing color of the Renderer."""
-        c = convert_to_color(value)
-        ret = render.SDL_SetRenderDrawColor(self.sdlrenderer, c.r, c.g, c.b, c.a)
-        if ret == -1:
-            raise SDLError()
+        self._color = _color_key(value)
+        self._set_draw_color(self._color)
 
     @property
     def blendmode(self):
         """The blend mode used for drawing operations (fill and line)."""
-        mode = blendmode.SDL_BlendMode()
-        ret = render.SDL_GetRenderDrawBlendMode(self.sdlrenderer, byref(mode))
-        if ret == -1:
-            raise SDLError()
-        return mode
+        if "blendmode" not in self._state:
+            mode = blendmode.SDL_BlendMode()
+            ret = render.SDL_GetRenderDrawBlendMode(self.sdlrenderer,
+                                                    byref(mode))
+            if ret == -1:
+                raise SDLError()
+            self._state["blendmode"] = mode.value
+        return blendmode.SDL_BlendMode(self._state["blendmode"])
 
     @blendmode.setter
     def blendmode(self, value):
         """The blend mode used for drawing operations (fill and line)."""
+        value = getattr(value, "value", value)
+        if self._cached("blendmode", value):
+            return
+        self._flush_batch()
         ret = render.SDL_SetRenderDrawBlendMode(self.sdlrenderer, value)
         if ret == -1:
+            self._state.pop("blendmode", None)
             raise SDLError()
+        self._state["blendmode"] = value
 
     @property
     def scale(self):
         """The horizontal and vertical drawing scale."""
-        sx = c_float(0.0)
-        sy = c_float(0.0)
-        render.SDL_RenderGetScale(self.sdlrenderer, byref(sx), byref(sy))
-        return sx.value, sy.value
+        if "scale" not in self._state:
+            sx = c_float(0.0)
+            sy = c_float(0.0)
+            render.SDL_RenderGetScale(self.sdlrenderer, byref(sx), byref(sy))
+            self._state["scale"] = sx.value, sy.value
+        return self._state["scale"]
 
     @scale.setter
     def scale(self, value):
         """The horizontal and vertical drawing scale."""
+        value = float(value[0]), float(value[1])
+        if self._cached("scale", value):
+            return
+        self._flush_batch()
         ret = render.SDL_RenderSetScale(self.sdlrenderer, value[0], value[1])
         if ret != 0:
+            self._state.pop("scale", None)
+            raise SDLError()
+        self._state["scale"] = value
+
+    def _set_rect_state(self, key, func, value):
+        """Set a rect-based state (viewport, clip rect); None resets it."""
+        if value is not None:
+            r = NonIterableRect(value)
+            value = (r.x, r.y, r.w, r.h)
+        if self._cached(key, value):
+            return
+        self._flush_batch()
+        sdlrect = None if value is None else rect.SDL_Rect(*value)
+        if func(self.sdlrenderer, sdlrect) != 0:
+            self._state.pop(key, None)
+            raise SDLError()
+        self._state[key] = value
+
+    @property
+    def viewport(self):
+        """The drawing area of the current target, as (x, y, w, h).
+
+        Setting it to None makes the entire target the drawing area.
+        """
+        value = self._state.get("viewport")
+        if value is not None:
+            return value
+        # the entire target, whose size may change with the window
+        r = rect.SDL_Rect()
+        render.SDL_RenderGetViewport(self.sdlrenderer, byref(r))
+        return r.x, r.y, r.w, r.h
+
+    @viewport.setter
+    def viewport(self, value):
+        self._set_rect_state("viewport", render.SDL_RenderSetViewport, value)
+
+    @property
+    def clip_rect(self):
+        """The clipping rectangle, as (x, y, w, h), or None if disabled."""
+        if "clip_rect" not in self._state:
+            r = rect.SDL_Rect()
+            render.SDL_RenderGetClipRect(self.sdlrenderer, byref(r))
+            if r.w == 0 and r.h == 0:
+                self._state["clip_rect"] = None
+            else:
+                self._state["clip_rect"] = r.x, r.y, r.w, r.h
+        return self._state["clip_rect"]
+
+    @clip_rect.setter
+    def clip_rect(self, value):
+        self._set_rect_state("clip_rect", render.SDL_RenderSetClipRect,
+                             value)
+
+    @property
+    def target(self):
+        """The render target: a TextureSprite, a SDL_Texture or None.
+
+        The texture must have been created with SDL_TEXTUREACCESS_TARGET.
+        None sets the default target (the window or surface). A target set
+        through the raw `sdl2.render` functions is returned as SDL_Texture,
+        once :meth:`invalidate_cache` was called.
+        """
+        if "target" not in self._state:
+            texture = render.SDL_GetRenderTarget(self.sdlrenderer)
+            key = addressof(texture.contents) if texture else None
+            current = self._target
+            if isinstance(current, TextureSprite):
+                current = current.texture
+            if key != (None if current is None else addressof(current)):
+                self._target = texture.contents if texture else None
+            self._state["target"] = key
+        return self._target
+
+    @target.setter
+    def target(self, value):
+        if isinstance(value, TextureSprite):
+            texture = value.texture
+        elif isinstance(value, render.SDL_Texture) or value is None:
+            texture = value
+        else:
+            raise TypeError("target must be a TextureSprite, SDL_Texture "
+                            "or None")
+        key = None if texture is None else addressof(texture)
+        if self._cached("target", key):
+            self._target = value
+            return
+        self._flush_batch()
+        if render.SDL_SetRenderTarget(self.sdlrenderer, texture) != 0:
+            self._state.pop("target", None)
             raise SDLError()
+        self._state["target"] = key
+        self._target = value
+        # every target has its own viewport, clip rect and scale
+        for state in ("viewport", "clip_rect", "scale"):
+            self._state.pop(state, None)
+
+    def batch(self, capacity=1024):
+        """Record the drawing operations instead of executing them.
+
+        Returns the :class:`RenderBatch` of the renderer, to be used as a
+        context manager. While it is active, :meth:`clear`, :meth:`copy`,
+        :meth:`fill`, :meth:`draw_rect`, :meth:`draw_line` and
+        :meth:`draw_point` are appended to its buffer, which is flushed once
+        the outermost ``with`` block exits. The same buffer is reused for
+        every call, so no allocation happens from one frame to the next.
+
+        Operations without an explicit color record the :attr:`color` of
+        the time they were called. Changing the :attr:`blendmode`,
+        :attr:`scale`, :attr:`viewport`, :attr:`clip_rect`, :attr:`target`
+        or :attr:`logical_size`, :meth:`present` and drawing without the
+        batch (e.g. by a :class:`TextureSpriteRenderSystem`) flush the
+        recorded commands first.
+
+        Args:
+            capacity (int): the initial number of rects and points the
+                buffer can hold before growing. Only used on the first call.
+
+        Example:
+            >>> with renderer.batch():
+            ...     for r in hud_rects:
+            ...         renderer.fill(r, color=0xFF00FF00)
+        """
+        if self._drawbuffer is None:
+            self._drawbuffer = RenderBatch(self, capacity)
+        return self._drawbuffer
 
     def clear(self, color=None):
         """Clears the renderer with the currently set or passed color."""
-        if color is not None:
-            tmp = self.color
-            self.color = color
+        if self._batch is not None:
+            return self._batch.clear(color)
+        self._use_color(color)
         ret = render.SDL_RenderClear(self.sdlrenderer)
-        if color is not None:
-            self.color = tmp
         if ret == -1:
             raise SDLError()
 
@@ -180,6 +512,9 @@ class Renderer(object):
             >>> copy(src=tileset, srcrect=(0, 0, 32, 32),
                      dstrect=(128, 64, 32, 32))
         """
+        if self._batch is not None:
+            return self._batch.copy(src, srcrect, dstrect, angle, center,
+                                    flip)
 
         if isinstance(src, TextureSprite):
             texture = src.texture
@@ -202,11 +537,79 @@ class Renderer(object):
             raise SDLError()
 
     def present(self):
-        """Refreshes the target of the Renderer."""
+        """Refreshes the target of the Renderer.
+
+        Commands recorded by an active batch are executed first.
+        """
+        self._flush_batch()
         render.SDL_RenderPresent(self.sdlrenderer)
 
+    def read_pixels(self, area=None, out=None,
+                    pformat=pixels.SDL_PIXELFORMAT_ARGB8888):
+        """Reads pixels back from the current render target.
+
+        The pixels are written into out, which can be reused for repeated
+        captures, so that no memory gets allocated. out can be a NumPy
+        array of shape (h, w) (or (h, w, 3) for 3 byte formats) with
+        contiguous rows, whose row stride is used as pitch, or a writable,
+        C-contiguous buffer, such as a bytearray, holding h rows of
+        w * bytes per pixel bytes. If out is None, a new NumPy array (or a
+        bytearray without NumPy) is created.
+
+        Reading pixels back is slow, since the GPU has to finish drawing
+        first. Recorded batch commands are flushed before reading.
+
+        Args:
+            area (tuple): x, y, w, h area to read, relative to the viewport.
+                Defaults to the entire viewport.
+            out: the buffer to write the pixels to.
+            pformat (int): the SDL_PIXELFORMAT_* value of the pixels.
+
+        Returns:
+            out or the newly created buffer.
+        """
+        self._flush_batch()
+        if area is None:
+            w, h = self.viewport[2:]
+            sdlrect = None
+        else:
+            x, y, w, h = area
+            sdlrect = rect.SDL_Rect(x, y, w, h)
+        bpp = _bytes_per_pixel(pformat)
+        if out is None:
+            if not _HASNUMPY:
+                out = bytearray(w * h * bpp)
+            else:
+                out = _pixel_array(w, h, bpp)
+        data, pitch = _pixel_buffer(out, w, h, bpp, writable=True)
+        ret = render.SDL_RenderReadPixels(self.sdlrenderer, sdlrect, pformat,
+                                          data, pitch)
+        if ret != 0:
+            raise SDLError()
+        return out
+
+    def _render_array(self, func, array, color):
+        """Pass a ctypes array of points or rects to a SDL_Render* call."""
+        self._use_color(color)
+        ret = func(self.sdlrenderer, array, len(array))
+        if ret == -1:
+            raise SDLError()
+
     def draw_line(self, points, color=None):
-        """Draws one or multiple connected lines on the renderer."""
+        """Draws one or multiple connected lines on the renderer.
+
+        points can be a flat (x1, y1, x2, y2, ...) sequence or a contiguous
+        int32 buffer of shape (N, 2), such as a NumPy array, which is passed
+        to SDL without any per-element conversion.
+        """
+        if self._batch is not None:
+            return self._batch.draw_line(points, color)
+        ptlist = _geometry_buffer(points, rect.SDL_Point)
+        if ptlist is not None:
+            if len(ptlist) < 2:
+                raise ValueError("points must contain more that one point")
+            return self._render_array(render.SDL_RenderDrawLines, ptlist,
+                                      color)
         # (x1, y1, x2, y2, ...)
         pcount = len(points)
         if (pcount % 2) != 0:
@@ -214,13 +617,9 @@ class Renderer(object):
         if pcount < 4:
             raise ValueError("points must contain more that one point")
         if pcount == 4:
-            if color is not None:
-                tmp = self.color
-                self.color = color
+            self._use_color(color)
             x1, y1, x2, y2 = points
             ret = render.SDL_RenderDrawLine(self.sdlrenderer, x1, y1, x2, y2)
-            if color is not None:
-                self.color = tmp
             if ret == -1:
                 raise SDLError()
         else:
@@ -233,30 +632,33 @@ class Renderer(object):
                 ptlist[off] = SDL_Point(points[x], points[x + 1])
                 x += 2
                 off += 1
-            if color is not None:
-                tmp = self.color
-                self.color = color
+            self._use_color(color)
             ptr = cast(ptlist, POINTER(SDL_Point))
             ret = render.SDL_RenderDrawLines(self.sdlrenderer, ptr, count)
-            if color is not None:
-                self.color = tmp
             if ret == -1:
                 raise SDLError()
 
     def draw_point(self, points, color=None):
-        """Draws one or multiple points on the renderer."""
+        """Draws one or multiple points on the renderer.
+
+        points can be a flat (x1, y1, x2, y2, ...) sequence or a contiguous
+        int32 buffer of shape (N, 2), such as a NumPy array, which is passed
+        to SDL without any per-element conversion.
+        """
+        if self._batch is not None:
+            return self._batch.draw_point(points, color)
+        ptlist = _geometry_buffer(points, rect.SDL_Point)
+        if ptlist is not None:
+            return self._render_array(render.SDL_RenderDrawPoints, ptlist,
+                                      color)
         # (x1, y1, x2, y2, ...)
         pcount = len(points)
         if (pcount % 2) != 0:
             raise ValueError("points does not contain a valid set of points")
         if pcount == 2:
-            if color is not None:
-                tmp = self.color
-                self.color = color
+            self._use_color(color)
             ret = render.SDL_RenderDrawPoint(self.sdlrenderer, points[0],
                                              points[1])
-            if color is not None:
-                self.color = tmp
             if ret == -1:
                 raise SDLError()
         else:
@@ -269,30 +671,33 @@ class Renderer(object):
                 ptlist[off] = SDL_Point(points[x], points[x + 1])
                 x += 2
                 off += 1
-            if color is not None:
-                tmp = self.color
-                self.color = color
+            self._use_color(color)
             ptr = cast(ptlist, POINTER(SDL_Point))
             ret = render.SDL_RenderDrawPoints(self.sdlrenderer, ptr, count)
-            if color is not None:
-                self.color = tmp
             if ret == -1:
                 raise SDLError()
 
     def draw_rect(self, rects, color=None):
-        """Draws one or multiple rectangles on the renderer."""
+        """Draws one or multiple rectangles on the renderer.
+
+        rects can be a single (x, y, w, h) rect, a sequence of rects or a
+        contiguous int32 buffer of shape (N, 4), such as a NumPy array,
+        which is passed to SDL without any per-element conversion.
+        """
+        if self._batch is not None:
+            return self._batch.draw_rect(rects, color)
+        rlist = _geometry_buffer(rects, rect.SDL_Rect)
+        if rlist is not None:
+            return self._render_array(render.SDL_RenderDrawRects, rlist,
+                                      color)
         SDL_Rect = rect.SDL_Rect
         # ((x, y, w, h), ...)
         if type(rects[0]) == int:
             # single rect
-            if color is not None:
-                tmp = self.color
-                self.color = color
+            self._use_color(color)
             x, y, w, h = rects
             ret = render.SDL_RenderDrawRect(
                 self.sdlrenderer, SDL_Rect(x, y, w, h))
-            if color is not None:
-                self.color = tmp
             if ret == -1:
                 raise SDLError()
         else:
@@ -301,30 +706,33 @@ class Renderer(object):
             rlist = (SDL_Rect * len(rects))()
             for idx, r in enumerate(rects):
                 rlist[idx] = SDL_Rect(*r)
-            if color is not None:
-                tmp = self.color
-                self.color = color
+            self._use_color(color)
             ptr = cast(rlist, POINTER(SDL_Rect))
             ret = render.SDL_RenderDrawRects(self.sdlrenderer, ptr, len(rects))
-            if color is not None:
-                self.color = tmp
             if ret == -1:
                 raise SDLError()
 
     def fill(self, rects, color=None):
-        """Fills one or multiple rectangular areas on the renderer."""
+        """Fills one or multiple rectangular areas on the renderer.
+
+        rects can be a single (x, y, w, h) rect, a sequence of rects or a
+        contiguous int32 buffer of shape (N, 4), such as a NumPy array,
+        which is passed to SDL without any per-element conversion.
+        """
+        if self._batch is not None:
+            return self._batch.fill(rects, color)
+        rlist = _geometry_buffer(rects, rect.SDL_Rect)
+        if rlist is not None:
+            return self._render_array(render.SDL_RenderFillRects, rlist,
+                                      color)
         SDL_Rect = rect.SDL_Rect
         # ((x, y, w, h), ...)
         if type(rects[0]) == int:
             # single rect
-            if color is not None:
-                tmp = self.color
-                self.color = color
+            self._use_color(color)
             x, y, w, h = rects
             ret = render.SDL_RenderFillRect(
                 self.sdlrenderer, SDL_Rect(x, y, w, h))
-            if color is not None:
-                self.color = tmp
             if ret == -1:
                 raise SDLError()
         else:
@@ -333,22 +741,311 @@ class Renderer(object):
             rlist = (SDL_Rect * len(rects))()
             for idx, r in enumerate(rects):
                 rlist[idx] = SDL_Rect(*r)
-            if color is not None:
-                tmp = self.color
-                self.color = color
+            self._use_color(color)
             ptr = cast(rlist, POINTER(SDL_Rect))
             ret = render.SDL_RenderFillRects(self.sdlrenderer, ptr, len(rects))
-            if color is not None:
-                self.color = tmp
             if ret == -1:
                 raise SDLError()
 
 
+class RenderBatch(object):
+    """A deferred draw-command buffer for a :class:`Renderer`.
+
+    Drawing commands are recorded into preallocated ctypes arrays of
+    `SDL_Rect` and `SDL_Point` and executed on :meth:`flush`. Consecutive
+    fills, rects or points sharing the same color are merged into a single
+    SDL_RenderFillRects, SDL_RenderDrawRects or SDL_RenderDrawPoints call,
+    and the draw color is set through the render state cache of the
+    renderer, so that it only changes when needed.
+
+    A RenderBatch is usually obtained through :meth:`Renderer.batch` and
+    used as a context manager, but it can also be fed and flushed directly.
+    """
+
+    _CLEAR = 0
+    _FILL = 1
+    _RECT = 2
+    _POINT = 3
+    _LINE = 4
+    _COPY = 5
+
+    def __init__(self, renderer, capacity=1024):
+        """Create a new RenderBatch for the given Renderer.
+
+        Args:
+            renderer (Renderer): the renderer the commands are flushed to.
+            capacity (int): the initial number of rects and points the
+                buffer can hold. It is doubled whenever it runs out of space.
+        """
+        self.renderer = renderer
+        self._commands = []
+        self._nrects = 0
+        self._npoints = 0
+        self._depth = 0
+        self._alloc_rects(max(capacity, 1))
+        self._alloc_points(max(capacity, 1))
+
+    def __enter__(self):
+        """Start recording the renderer's drawing operations."""
+        self._depth += 1
+        self.renderer._batch = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Stop recording and flush, once the outermost block exits."""
+        self._depth -= 1
+        if self._depth:
+            return
+        self.renderer._batch = None
+        if exc_type is None:
+            self.flush()
+        else:
+            self.reset()
+
+    def __len__(self):
+        """The number of SDL calls the recorded commands will issue."""
+        return len(self._commands)
+
+    def _alloc_rects(self, capacity):
+        """Allocate (or grow) the rect buffer, keeping its contents."""
+        rects = (rect.SDL_Rect * capacity)()
+        if self._nrects:
+            memmove(rects, self._rects, self._nrects * sizeof(rect.SDL_Rect))
+        self._rects = rects
+        # flat int view sharing memory with the rects, for slice assignment
+        self._rectvals = (c_int * (capacity * 4)).from_buffer(rects)
+        self._rectcap = capacity
+
+    def _alloc_points(self, capacity):
+        """Allocate (or grow) the point buffer, keeping its contents."""
+        points = (rect.SDL_Point * capacity)()
+        if self._npoints:
+            memmove(points, self._points,
+                    self._npoints * sizeof(rect.SDL_Point))
+        self._points = points
+        self._pointvals = (c_int * (capacity * 2)).from_buffer(points)
+        self._pointcap = capacity
+
+    def _reserve_rects(self, count):
+        """Reserve count rects, returning the index of the first one."""
+        start = self._nrects
+        needed = start + count
+        if needed > self._rectcap:
+            capacity = self._rectcap
+            while capacity < needed:
+                capacity *= 2
+            self._alloc_rects(capacity)
+        self._nrects = needed
+        return start
+
+    def _reserve_points(self, count):
+        """Reserve count points, returning the index of the first one."""
+        start = self._npoints
+        needed = start + count
+        if needed > self._pointcap:
+            capacity = self._pointcap
+            while capacity < needed:
+                capacity *= 2
+            self._alloc_points(capacity)
+        self._npoints = needed
+        return start
+
+    def _append(self, op, color, start, count, extra=None):
+        """Append a command, merging it with the previous one if possible.
+
+        Commands without a color get the current color of the renderer.
+        """
+        if color is None:
+            color = self.renderer._current_color()
+        else:
+            color = _color_key(color)
+        commands = self._commands
+        if commands and op in (self._FILL, self._RECT, self._POINT):
+            last = commands[-1]
+            if last[0] == op and last[1] == color and \
+                    last[2] + last[3] == start:
+                last[3] += count
+                return
+        commands.append([op, color, start, count, extra])
+
+    def _add_rects(self, rects):
+        """Store one or multiple rects, returning (start, count)."""
+        rlist = _geometry_buffer(rects, rect.SDL_Rect)
+        if rlist is not None:
+            count = len(rlist)
+            start = self._reserve_rects(count)
+            memmove(addressof(self._rects) + start * sizeof(rect.SDL_Rect),
+                    rlist, sizeof(rlist))
+            return start, count
+        if type(rects[0]) == int:
+            start = self._reserve_rects(1)
+            self._rectvals[start * 4:start * 4 + 4] = rects
+            return start, 1
+        rects = list(iter_nested(rects))
+        count = len(rects)
+        start = self._reserve_rects(count)
+        vals = self._rectvals
+        offset = start * 4
+        for r in rects:
+            x, y, w, h = r
+            vals[offset:offset + 4] = (x, y, w, h)
+            offset += 4
+        return start, count
+
+    def _add_points(self, points):
+        """Store a flat (x1, y1, x2, y2, ...) sequence of points."""
+        ptlist = _geometry_buffer(points, rect.SDL_Point)
+        if ptlist is not None:
+            count = len(ptlist)
+            start = self._reserve_points(count)
+            memmove(addressof(self._points) + start * sizeof(rect.SDL_Point),
+                    ptlist, sizeof(ptlist))
+            return start, count
+        pcount = len(points)
+        if (pcount % 2) != 0:
+            raise ValueError("points does not contain a valid set of points")
+        count = pcount // 2
+        start = self._reserve_points(count)
+        self._pointvals[start * 2:start * 2 + pcount] = points
+        return start, count
+
+    def clear(self, color=None):
+        """Record a :meth:`Renderer.clear` operation."""
+        self._append(self._CLEAR, color, 0, 0)
+
+    def fill(self, rects, color=None):
+        """Record a :meth:`Renderer.fill` operation."""
+        start, count = self._add_rects(rects)
+        self._append(self._FILL, color, start, count)
+
+    def draw_rect(self, rects, color=None):
+        """Record a :meth:`Renderer.draw_rect` operation."""
+        start, count = self._add_rects(rects)
+        self._append(self._RECT, color, start, count)
+
+    def draw_point(self, points, color=None):
+        """Record a :meth:`Renderer.draw_point` operation."""
+        start, count = self._add_points(points)
+        self._append(self._POINT, color, start, count)
+
+    def draw_line(self, points, color=None):
+        """Record a :meth:`Renderer.draw_line` operation.
+
+        Connected lines cannot be merged with each other, as that would
+        connect their end and start points, so every call issues its own
+        SDL_RenderDrawLines.
+        """
+        start, count = self._add_points(points)
+        if count < 2:
+            self._npoints = start
+            raise ValueError("points must contain more that one point")
+        self._append(self._LINE, color, start, count)
+
+    def copy(
+        self, src, srcrect=None, dstrect=None, angle=0, center=None,
+        flip=render.SDL_FLIP_NONE
+    ):
+        """Record a :meth:`Renderer.copy` operation."""
+        if isinstance(src, TextureSprite):
+            texture = src.texture
+            angle = angle or src.angle
+            if center is None:
+                center = src.center
+            flip = flip or src.flip
+        elif isinstance(src, render.SDL_Texture):
+            texture = src
+        else:
+            raise TypeError("src must be a TextureSprite or SDL_Texture")
+        # srcrect and dstrect are stored side by side in the rect buffer
+        start = self._reserve_rects(2)
+        vals = self._rectvals
+        if srcrect is not None:
+            vals[start * 4:start * 4 + 4] = tuple(srcrect)
+        if dstrect is not None:
+            vals[start * 4 + 4:start * 4 + 8] = tuple(dstrect)
+        if center is not None:
+            if isinstance(center, rect.SDL_Point):
+                center = center.x, center.y
+            pstart = self._reserve_points(1)
+            self._pointvals[pstart * 2:pstart * 2 + 2] = center
+        else:
+            pstart = -1
+        self._append(self._COPY, None, start, 1, (
+            texture, srcrect is not None, dstrect is not None, angle, pstart,
+            flip))
+
+    def reset(self):
+        """Discard all recorded commands, keeping the allocated buffers."""
+        del self._commands[:]
+        self._nrects = 0
+        self._npoints = 0
+
+    def flush(self):
+        """Execute the recorded commands on the renderer and reset.
+
+        Raises:
+            SDLError if any of the SDL calls fail.
+        """
+        if not self._commands:
+            return
+        renderer = self.renderer
+        sdlrenderer = renderer.sdlrenderer
+        rects = addressof(self._rects)
+        points = addressof(self._points)
+        rsize = sizeof(rect.SDL_Rect)
+        psize = sizeof(rect.SDL_Point)
+        LP_SDL_Rect = POINTER(rect.SDL_Rect)
+        LP_SDL_Point = POINTER(rect.SDL_Point)
+        calls = {
+            self._FILL: (render.SDL_RenderFillRects, rects, rsize,
+                         LP_SDL_Rect),
+            self._RECT: (render.SDL_RenderDrawRects, rects, rsize,
+                         LP_SDL_Rect),
+            self._POINT: (render.SDL_RenderDrawPoints, points, psize,
+                          LP_SDL_Point),
+            self._LINE: (render.SDL_RenderDrawLines, points, psize,
+                         LP_SDL_Point),
+        }
+        try:
+            for op, color, start, count, extra in self._commands:
+                if op == self._COPY:
+                    texture, hassrc, hasdst, angle, pstart, flip = extra
+                    srcrect = dstrect = center = None
+                    if hassrc:
+                        srcrect = cast(rects + start * rsize, LP_SDL_Rect)
+                    if hasdst:
+                        dstrect = cast(rects + (start + 1) * rsize,
+                                       LP_SDL_Rect)
+                    if pstart >= 0:
+                        center = cast(points + pstart * psize, LP_SDL_Point)
+                    ret = render.SDL_RenderCopyEx(
+                        sdlrenderer, texture, srcrect, dstrect, angle, center,
+                        flip)
+                else:
+                    renderer._set_draw_color(color)
+                    if op == self._CLEAR:
+                        ret = render.SDL_RenderClear(sdlrenderer)
+                    else:
+                        func, address, size, ptrtype = calls[op]
+                        ret = func(sdlrenderer,
+                                   cast(address + start * size, ptrtype),
+                                   count)
+                if ret == -1:
+                    raise SDLError()
+        finally:
+            self.reset()
+
+
 class Sprite(NonIterableRect):
-    """A simple 2D object, implemented as abstract base class."""
+    """A simple 2D object, implemented as abstract base class.
+
+    The attributes of the sprite classes are kept in slots, for faster
+    access. Other attributes can be set as usual and are kept in the
+    instance dictionary.
+    """
 
-    _frame_rect = None
-    _pixel_data = None
+    __slots__ = ("_depth", "_indexes", "_pixel_data", "_frame_rect", "free",
+                 "_parent", "__dict__", "__weakref__")
 
     def __init__(self, data, w, h, free):
         """Create a new sprite.
@@ -358,11 +1055,29 @@ class Sprite(NonIterableRect):
                 Objects with higher `depth` values will be drawn on top of
                 other sprites by the :class:`SpriteRenderSystem`.
         """
+        self._indexes = ()
+        self._depth = 0
+        self._frame_rect = None
         super().__init__(0, 0, w, h)
-        self.depth = 0
         self._pixel_data = data
         self.free = free
 
+    @property
+    def depth(self):
+        """The layer depth on which to draw the sprite."""
+        return self._depth
+
+    @depth.setter
+    def depth(self, value):
+        old = self._depth
+        self._depth = value
+        if value == old:
+            return
+        for ref in self._indexes:
+            index = ref()
+            if index is not None:
+                index._depth_changed(self, old, value)
+
     @property
     def frame_rect(self):
         """:attr: `frame_rect`."""
@@ -390,13 +1105,17 @@ class Sprite(NonIterableRect):
         """The top-left position of the Sprite as tuple."""
         # for compatibility with versions prior to 0.10
         self.topleft = value
+        for ref in self._indexes:
+            index = ref()
+            if index is not None:
+                index._bounds_changed(self)
 
     def __del__(self):
         """Release the bound `SDL_Surface`.
 
         Only if :attr:`sdl2.ext.sprite.SoftwareSprite.free` is `True`.
         """
-        pixel_data = self._pixel_data
+        pixel_data = getattr(self, "_pixel_data", None)
         if getattr(self, "free", None) and pixel_data is not None:
             self._releaser(pixel_data)
         self._pixel_data = None
@@ -406,8 +1125,16 @@ class Sprite(NonIterableRect):
 
 
 class SoftwareSprite(Sprite):
-    """A simple, visible, pixel-based 2D object using software surfaces."""
+    """A simple, visible, pixel-based 2D object using software surfaces.
 
+    Sprites created by a :class:`SpriteFactory` with a
+    :attr:`SpriteFactory.display` set record in fast_blit, whether their
+    surface is blitted onto the display without converting or blending
+    its pixels (see :func:`sdl2.ext.surface.is_fast_blit`). Subsprites
+    take it over from their parent. For other sprites, fast_blit is None.
+    """
+
+    __slots__ = ("fast_blit",)
     _releaser = surface.SDL_FreeSurface
 
     def __init__(self, imgsurface, free=True, area=None):
@@ -426,6 +1153,7 @@ class SoftwareSprite(Sprite):
         else:
             w, h = imgsurface.w, imgsurface.h
         super().__init__(imgsurface, w, h, free)
+        self.fast_blit = None
 
     @property
     def surface(self):
@@ -448,6 +1176,7 @@ class SoftwareSprite(Sprite):
         """
         ssurface = subsurface(self.surface, area)
         ssprite = SoftwareSprite(ssurface, True)
+        ssprite.fast_blit = self.fast_blit
         # Keeps the parent surface alive until subsprite is freed
         if self.free:
             ssprite._parent = self
@@ -457,9 +1186,10 @@ class SoftwareSprite(Sprite):
 class TextureSprite(Sprite):
     """A simple, visible, texture-based 2D object, using a renderer."""
 
+    __slots__ = ("angle", "flip", "cols", "rows", "col_w", "row_h", "col",
+                 "row", "tile_offset_x", "tile_offset_y", "_size",
+                 "_color_mod", "_alpha_mod", "_mods")
     _releaser = render.SDL_DestroyTexture
-    alpha_mod = None
-    color_mod = None
 
     def __init__(self, texture, free=True, area=None, **kwargs):
         """Create a new TextureSprite.
@@ -485,7 +1215,9 @@ class TextureSprite(Sprite):
             alpha_mod (int): integer between 0 and 255, the default alpha_mod
                 for this sprite.
         """
-        self.__dict__.update(kwargs)
+        self._color_mod = self._alpha_mod = self._mods = None
+        for key, value in kwargs.items():
+            object.__setattr__(self, key, value)
         self._pixel_data = texture
         if area:
             w, h = NonIterableRect(area).size
@@ -509,6 +1241,52 @@ class TextureSprite(Sprite):
         """`sdl2.SDL_Texture` containing pixel data."""
         return self._pixel_data
 
+    @property
+    def color_mod(self):
+        """The (r, g, b) color mod of the sprite or None.
+
+        It is applied by a :class:`TextureSpriteRenderSystem` with
+        `texture_order` enabled and used by :meth:`set_color_mod`. Changes
+        are noticed by assigning a new value, not by modifying it in place.
+        """
+        return self._color_mod
+
+    @color_mod.setter
+    def color_mod(self, value):
+        self._color_mod = value
+        self._mods_changed()
+
+    @property
+    def alpha_mod(self):
+        """The alpha mod of the sprite or None, see :attr:`color_mod`."""
+        return self._alpha_mod
+
+    @alpha_mod.setter
+    def alpha_mod(self, value):
+        self._alpha_mod = value
+        self._mods_changed()
+
+    def _mods_changed(self):
+        self._mods = None
+        for ref in getattr(self, "_indexes", ()):
+            index = ref()
+            if index is not None:
+                index._mods_changed(self)
+
+    def _mods_key(self):
+        """Gets the (texture address, (r, g, b), alpha) drawing group.
+
+        Sprites without color_mod or alpha_mod get (255, 255, 255) and 255.
+        """
+        key = self._mods
+        if key is None:
+            color, alpha = self._color_mod, self._alpha_mod
+            key = self._mods = (
+                addressof(self._pixel_data),
+                (255, 255, 255) if color is None else _color_key(color)[:3],
+                255 if alpha is None else alpha)
+        return key
+
     def subsprite(self, area, **kwargs):
         """Create another sprite from part of this sprite's pixel data.
 
@@ -526,7 +1304,13 @@ class TextureSprite(Sprite):
             TextureSprite
         """
         data = self._pixel_data
-        return TextureSprite(data, False, area, **kwargs)
+        ssprite = TextureSprite(data, False, area, **kwargs)
+        # Keeps the parent texture alive until subsprite is freed
+        if self.free:
+            ssprite._parent = self
+        else:
+            ssprite._parent = getattr(self, "_parent", None)
+        return ssprite
 
     @property
     def sdl_center(self):
@@ -657,6 +1441,560 @@ class TextureSprite(Sprite):
         if render.SDL_SetTextureColorMod(self.texture, *color):
             raise SDLError()
 
+    def _texture_area(self, area):
+        """Maps an area of the sprite to the texture, as SDL_Rect or None."""
+        frame = self.frame_rect
+        if area is None:
+            return frame
+        x, y, w, h = area
+        if frame is not None:
+            x += frame.x
+            y += frame.y
+        return rect.SDL_Rect(x, y, w, h)
+
+    def lock(self, area=None):
+        """Lock the pixels of a streaming texture for writing.
+
+        Returns a :class:`TextureLock` to be used as a context manager,
+        which yields a writable view on the locked pixels and unlocks the
+        texture on leaving the ``with`` block. The texture must have been
+        created with SDL_TEXTUREACCESS_STREAMING access.
+
+        The locked pixels are write-only: they do not necessarily contain
+        the current texture contents, so the whole area should be written.
+
+        Args:
+            area (tuple): x, y, w, h area of the sprite to lock. Defaults to
+                the entire sprite.
+
+        Example:
+            >>> with sprite.lock() as pixels:
+            ...     pixels[:] = frame
+
+        Raises:
+            ValueError: if the texture is shared by a :class:`TextureCache`.
+        """
+        self._check_unshared()
+        return TextureLock(self, area)
+
+    def _check_unshared(self):
+        """Raises ValueError, if the texture belongs to a TextureCache."""
+        if isinstance(getattr(self, "_parent", None), _TextureRef):
+            raise ValueError("the texture is shared by a TextureCache")
+
+    def update_from(self, array, area=None, pitch=None):
+        """Upload pixels to the texture with SDL_UpdateTexture.
+
+        The pixels are passed to SDL as they are, without an intermediate
+        copy. A NumPy array must have the (h, w) or (h, w, bytes per pixel)
+        shape of the area, with contiguous rows; its row stride is used as
+        pitch. Other buffers (such as bytes or bytearray) need to be
+        C-contiguous; their pitch defaults to the width of the area times
+        the bytes per pixel of the texture format.
+
+        Unlike :meth:`lock`, this works with static textures as well, but
+        is slower for streaming ones.
+
+        Args:
+            array: the pixel data, in the format of the texture.
+            area (tuple): x, y, w, h area of the sprite to update. Defaults
+                to the entire sprite.
+            pitch (int): the number of bytes per row of the pixels.
+
+        Raises:
+            ValueError: if the texture is shared by a :class:`TextureCache`.
+        """
+        self._check_unshared()
+        fmt = Uint32()
+        if render.SDL_QueryTexture(self.texture, byref(fmt), None, None,
+                                   None) != 0:
+            raise SDLError()
+        bpp = _bytes_per_pixel(fmt.value)
+        w, h = self.size if area is None else area[2:]
+        data, pitch = _pixel_buffer(array, w, h, bpp, pitch)
+        ret = render.SDL_UpdateTexture(self.texture, self._texture_area(area),
+                                       data, pitch)
+        if ret != 0:
+            raise SDLError()
+
+
+def _bytes_per_pixel(pformat):
+    """Gets the bytes per pixel of a packed pixel format."""
+    if pixels.SDL_ISPIXELFORMAT_FOURCC(pformat):
+        raise ValueError("FOURCC (YUV) formats are not supported")
+    return pixels.SDL_BYTESPERPIXEL(pformat)
+
+
+def _pixel_array(w, h, bpp, buf=None, pitch=None):
+    """Creates a NumPy array for w x h pixels, optionally on a buffer.
+
+    The array has one unsigned integer per pixel, or three bytes for 3 byte
+    formats.
+    """
+    if bpp == 3:
+        shape, dtype, strides = (h, w, 3), numpy.uint8, (3, 1)
+    else:
+        shape = (h, w)
+        dtype = {1: numpy.uint8, 2: numpy.uint16, 4: numpy.uint32}[bpp]
+        strides = (bpp,)
+    if buf is None:
+        return numpy.empty(shape, dtype=dtype)
+    return numpy.ndarray(shape, dtype, buf, 0, (pitch,) + strides)
+
+
+def _pixel_buffer(array, w, h, bpp, pitch=None, writable=False):
+    """Gets the SDL argument and pitch for w x h pixels held by array.
+
+    NumPy arrays must have contiguous rows of w * bpp bytes and use their
+    row stride as pitch. Other buffers must be C-contiguous.
+    """
+    if _HASNUMPY and isinstance(array, numpy.ndarray):
+        if (array.shape[0] != h or array[0].nbytes != w * bpp or
+                not array[0].flags.c_contiguous):
+            raise ValueError("array must be of the area's shape, with "
+                             "contiguous rows")
+        if writable and not array.flags.writeable:
+            raise ValueError("array must be writable")
+        if pitch is None:
+            pitch = array.strides[0]
+        return array.ctypes.data, pitch
+    view = memoryview(array)
+    if not view.c_contiguous:
+        raise ValueError("array must be C-contiguous")
+    if pitch is None:
+        pitch = w * bpp
+    if view.nbytes < pitch * (h - 1) + w * bpp:
+        raise ValueError("array is too small for the area")
+    if view.readonly:
+        if writable:
+            raise ValueError("array must be writable")
+        return array, pitch
+    return (c_uint8 * view.nbytes).from_buffer(array), pitch
+
+
+class TextureLock(object):
+    """A locked area of a streaming texture.
+
+    Entering the TextureLock (see :meth:`TextureSprite.lock`) locks the
+    texture and yields a writable view on its pixels, leaving it unlocks
+    the texture and uploads the changes. With NumPy, the view is an array
+    of shape (h, w) for 1, 2 and 4 byte pixel formats, with one unsigned
+    integer per pixel, or (h, w, 3) for 3 byte formats; its row stride is
+    the pitch of the locked pixels, which may be larger than the row
+    width. Without NumPy, it is a flat memoryview of the bytes of all
+    rows, with the pitch attribute holding the bytes per row.
+
+    The view must not be used after the texture got unlocked.
+    """
+    def __init__(self, sprite, area=None):
+        """Create a new TextureLock on an area of the sprite's texture."""
+        self.sprite = sprite
+        self.area = area
+        self.pitch = 0
+        self.pixels = None
+
+    def __enter__(self):
+        """Lock the texture and return a view on its pixels."""
+        sprite = self.sprite
+        texture = sprite.texture
+        fmt, access = Uint32(), c_int()
+        if render.SDL_QueryTexture(texture, byref(fmt), byref(access), None,
+                                   None) != 0:
+            raise SDLError()
+        if access.value != render.SDL_TEXTUREACCESS_STREAMING:
+            raise ValueError("only streaming textures can be locked")
+        bpp = _bytes_per_pixel(fmt.value)
+        w, h = sprite.size if self.area is None else self.area[2:]
+        data, pitch = c_void_p(), c_int()
+        ret = render.SDL_LockTexture(texture, sprite._texture_area(self.area),
+                                     byref(data), byref(pitch))
+        if ret != 0:
+            raise SDLError()
+        self.pitch = pitch.value
+        size = pitch.value * (h - 1) + w * bpp
+        buf = (c_uint8 * size).from_address(data.value)
+        if _HASNUMPY:
+            self.pixels = _pixel_array(w, h, bpp, buf, pitch.value)
+        else:
+            self.pixels = memoryview(buf)
+        return self.pixels
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Unlock the texture."""
+        self.pixels = None
+        render.SDL_UnlockTexture(self.sprite.texture)
+
+
+def _show_frame(sprite, frame):
+    """Sets a shared SDL_Rect as the frame of a sprite, without a copy.
+
+    The sprite's size follows the size of the frame.
+    """
+    sprite._frame_rect = frame
+    if sprite.w != frame.w or sprite.h != frame.h:
+        sprite.size = frame.w, frame.h
+
+
+class SpriteSheet(object):
+    """A table of the frames (source rects) on a sprite's pixel data.
+
+    The frames are computed once, into a ctypes array of SDL_Rect
+    structures (the table attribute), along with a SDL_Rect view per
+    frame (the rects attribute). Sprites switch frames by getting one of
+    these views assigned, so that changing frames allocates nothing. The
+    same sheet can be shared by sprites, animation clips and tile maps.
+
+    Frames are looked up by index or, for frames passed as mapping, by
+    name.
+    """
+    def __init__(self, sprite, frames):
+        """Creates a new SpriteSheet from explicit frame metadata.
+
+        Args:
+            sprite (Sprite): the sprite containing the frames.
+            frames: the (x, y, w, h) areas of the frames on the sprite's
+                pixel data, as sequence of rect-like objects, or as
+                mapping of frame names to them.
+
+        Raises:
+            ValueError: if frames is empty.
+        """
+        if not len(frames):
+            raise ValueError("frames must not be empty")
+        if hasattr(frames, "keys"):
+            names = list(frames.keys())
+            frames = [frames[name] for name in names]
+        else:
+            names = []
+        self.sprite = sprite
+        self.names = dict((name, i) for i, name in enumerate(names))
+        self.cols = None
+        self.table = table = (rect.SDL_Rect * len(frames))()
+        for i, frame in enumerate(frames):
+            table[i] = to_sdl_rect(frame)
+        self.rects = [table[i] for i in range(len(table))]
+
+    @classmethod
+    def grid(cls, sprite, frame_w, frame_h=None, count=None, margin=0,
+             spacing=0):
+        """Creates a SpriteSheet of equally sized frames on a grid.
+
+        The frames are counted left to right, top to bottom, starting at
+        the frame_rect of the sprite, if it has one.
+
+        Args:
+            sprite (Sprite): the sprite containing the frames.
+            frame_w, frame_h (int): the size of a frame in pixels. frame_h
+                defaults to frame_w.
+            count (int): the number of frames to use, if not all.
+            margin (int): the pixels around the grid.
+            spacing (int): the pixels between the frames.
+
+        Raises:
+            ValueError: if not a single frame fits onto the sprite.
+        """
+        if frame_h is None:
+            frame_h = frame_w
+        if frame_w <= 0 or frame_h <= 0:
+            raise ValueError("frame_w and frame_h must be greater than 0")
+        ox, oy = margin, margin
+        w, h = sprite.size
+        frame = sprite.frame_rect
+        if frame is not None:
+            ox += frame.x
+            oy += frame.y
+        cols = (w - 2 * margin + spacing) // (frame_w + spacing)
+        rows = (h - 2 * margin + spacing) // (frame_h + spacing)
+        frames = [(ox + col * (frame_w + spacing),
+                   oy + row * (frame_h + spacing), frame_w, frame_h)
+                  for row in range(rows) for col in range(cols)]
+        if count is not None:
+            frames = frames[:count]
+        if not frames:
+            raise ValueError("no frame fits onto the sprite")
+        sheet = cls(sprite, frames)
+        sheet.cols = cols
+        return sheet
+
+    def __len__(self):
+        return len(self.rects)
+
+    def __getitem__(self, key):
+        """Gets the shared SDL_Rect of a frame by index or name."""
+        if not isinstance(key, int):
+            key = self.names[key]
+        return self.rects[key]
+
+    def index(self, name):
+        """Gets the index of a named frame."""
+        return self.names[name]
+
+    def apply(self, sprite, key):
+        """Shows a frame (by index or name) on a sprite.
+
+        The sprite gets the shared SDL_Rect of the frame as frame_rect and
+        the size of the frame. It must use the same pixel data as the
+        sheet's sprite.
+        """
+        _show_frame(sprite, self[key])
+
+    def subsprite(self, key=0, **kwargs):
+        """Creates a sprite showing a frame (by index or name).
+
+        The sprite is a subsprite of the sheet's sprite sharing its pixel
+        data. Texture sprites also share the frame's SDL_Rect.
+
+        Args:
+            key: the index or name of the frame to show.
+            kwargs (dict): additional kwargs are passed forward to the
+                sprite initialization.
+
+        Returns:
+            Sprite
+        """
+        frame = self[key]
+        sprite = self.sprite.subsprite(
+            (frame.x, frame.y, frame.w, frame.h), **kwargs)
+        if isinstance(sprite, TextureSprite):
+            sprite._frame_rect = frame
+        return sprite
+
+    def clip(self, keys=None, durations=100, mode="loop"):
+        """Creates an AnimationClip of frames of the sheet.
+
+        The clip shares the SDL_Rect structures of the sheet.
+
+        Args:
+            keys: the indices or names of the frames of the clip, in the
+                order to play them. All frames by default.
+            durations: the duration of every frame in milliseconds, or a
+                sequence with a duration per frame.
+            mode (str): see :class:`sdl2.ext.animation.AnimationClip`.
+
+        Returns:
+            sdl2.ext.animation.AnimationClip
+        """
+        from .animation import AnimationClip
+        if keys is None:
+            return AnimationClip(self, durations, mode)
+        return AnimationClip([self[key] for key in keys], durations, mode)
+
+
+def _copy_sprite(sprite):
+    """Creates a shallow copy of a sprite, sharing its pixel data.
+
+    The copy does not free the pixel data and is not part of the trackers
+    (such as a SpriteIndex) of the sprite.
+    """
+    cls = type(sprite)
+    handle = cls.__new__(cls)
+    for klass in cls.__mro__:
+        for name in klass.__dict__.get("__slots__", ()):
+            if name in ("__dict__", "__weakref__") or \
+                    not hasattr(sprite, name):
+                continue
+            object.__setattr__(handle, name, getattr(sprite, name))
+    if hasattr(sprite, "__dict__"):
+        handle.__dict__.update(sprite.__dict__)
+    object.__setattr__(handle, "_indexes", ())
+    handle.free = False
+    return handle
+
+
+class _TextureRef(object):
+    """A reference to a texture of a TextureCache.
+
+    The reference is kept as parent of the sprites using the texture and
+    released, when the last of them is garbage collected.
+    """
+
+    __slots__ = ("cache", "entry", "__weakref__")
+
+    def __init__(self, cache, entry):
+        self.cache = cache
+        self.entry = entry
+        entry[3] += 1
+
+    def __del__(self):
+        cache = self.cache
+        if cache is not None:
+            self.cache = None
+            cache._release(self.entry)
+
+
+def _texture_bytes(texture):
+    """Get the approximate memory used by the pixels of a texture."""
+    fmt = Uint32()
+    w = c_int()
+    h = c_int()
+    ret = render.SDL_QueryTexture(texture, byref(fmt), None, byref(w),
+                                  byref(h))
+    if ret == -1:
+        raise SDLError()
+    return w.value * h.value * max(pixels.SDL_BYTESPERPIXEL(fmt.value), 1)
+
+
+def _surface_key(sf):
+    """Get a cache key for a surface, based on a hash of its content."""
+    fmt = sf.format.contents
+    digest = hashlib.sha1()
+    if surface.SDL_MUSTLOCK(sf):
+        surface.SDL_LockSurface(sf)
+        try:
+            digest.update(string_at(sf.pixels, sf.pitch * sf.h))
+        finally:
+            surface.SDL_UnlockSurface(sf)
+    else:
+        digest.update(string_at(sf.pixels, sf.pitch * sf.h))
+    if fmt.palette:
+        palette = fmt.palette.contents
+        digest.update(string_at(palette.colors, palette.ncolors * 4))
+    colorkey = Uint32()
+    if surface.SDL_GetColorKey(sf, byref(colorkey)) != 0:
+        colorkey = None
+    else:
+        colorkey = colorkey.value
+    return ("surface", digest.hexdigest(), sf.w, sf.h, sf.pitch,
+            fmt.format, colorkey)
+
+
+class TextureCache(object):
+    """A cache of textures shared by the sprites created from them.
+
+    A :class:`SpriteFactory` with a TextureCache set as its
+    `texture_cache` attribute creates the texture of an image file
+    (keyed by its resolved path) or surface (keyed by a hash of its
+    pixels) only once per renderer. Further requests get a new
+    TextureSprite on the same texture.
+
+    As all sprites of a cached texture share it, their pixels cannot be
+    modified through :meth:`TextureSprite.lock` or
+    :meth:`TextureSprite.update_from`. :meth:`TextureSprite.set_color_mod`
+    and :meth:`TextureSprite.set_alpha_mod` change the texture for all of
+    them (and the sprites created from it later); per-sprite `color_mod`
+    and `alpha_mod` attributes are applied by a
+    :class:`TextureSpriteRenderSystem` with `texture_order` enabled.
+
+    The sprites of a texture reference it, until all of them (and their
+    subsprites and copies) are garbage collected. Unreferenced textures
+    are kept, so that sprites created again later, e.g. by the next
+    level, can reuse them. Once the textures take more than `max_bytes`,
+    the unreferenced ones are destroyed, least recently used first.
+    Referenced textures are never destroyed by the cache, unless it is
+    closed. The textures left are destroyed, when the cache is garbage
+    collected.
+
+    Attributes:
+        max_bytes (int): the size of the pixels of all textures, from
+            which on unreferenced textures are destroyed.
+        bytes (int): the size of the pixels of the cached textures.
+        hits (int): the number of requests served by a cached texture.
+        misses (int): the number of textures created for the cache.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """Creates a new TextureCache.
+
+        Args:
+            max_bytes (int): the texture memory budget in bytes.
+        """
+        if max_bytes < 0:
+            raise ValueError("max_bytes must not be negative")
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> [key, texture, bytes, references]
+        self._entries = {}
+        # the unreferenced entries, least recently used first
+        self._unused = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _sprite(self, entry):
+        sprite = TextureSprite(entry[1], False)
+        sprite._parent = _TextureRef(self, entry)
+        return sprite
+
+    def _release(self, entry):
+        entry[3] -= 1
+        if entry[3] == 0 and self._entries.get(entry[0]) is entry:
+            self._unused[entry[0]] = entry
+            self._evict()
+
+    def _evict(self):
+        unused = self._unused
+        while self.bytes > self.max_bytes and unused:
+            key, entry = unused.popitem(last=False)
+            del self._entries[key]
+            self.bytes -= entry[2]
+            render.SDL_DestroyTexture(entry[1])
+
+    def get(self, key):
+        """Gets a new sprite on the cached texture of a key.
+
+        Returns:
+            TextureSprite: the sprite or None, if the key is not cached.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self.hits += 1
+        self._unused.pop(key, None)
+        return self._sprite(entry)
+
+    def add(self, key, texture):
+        """Adds a texture to the cache and gets a sprite on it.
+
+        The cache takes over the texture and destroys it, when it is
+        evicted or purged.
+
+        Raises:
+            KeyError: if the key is already cached.
+        """
+        if key in self._entries:
+            raise KeyError("key %r is already cached" % (key,))
+        self.misses += 1
+        entry = [key, texture, _texture_bytes(texture), 0]
+        self._entries[key] = entry
+        self.bytes += entry[2]
+        sprite = self._sprite(entry)
+        self._evict()
+        return sprite
+
+    def references(self, key):
+        """Gets the number of references to the texture of a key."""
+        return self._entries[key][3]
+
+    def close(self):
+        """Destroys all textures of the cache.
+
+        Sprites still using them must not be drawn afterwards, e.g. close
+        the cache before destroying the renderer of its textures.
+        """
+        entries = self._entries
+        self._entries = {}
+        self._unused = OrderedDict()
+        self.bytes = 0
+        for entry in entries.values():
+            render.SDL_DestroyTexture(entry[1])
+
+    def __del__(self):
+        if getattr(self, "_entries", None):
+            self.close()
+
+    def purge(self):
+        """Destroys all unreferenced textures."""
+        max_bytes = self.max_bytes
+        self.max_bytes = 0
+        try:
+            self._evict()
+        finally:
+            self.max_bytes = max_bytes
+
 
 class SpriteFactory(object):
     """A factory class for creating Sprite components."""
@@ -705,51 +2043,298 @@ class SpriteFactory(object):
         else:
             return SoftwareSpriteRenderSystem(*args, **kwargs)
 
+    #: The maximum number of glyphs cached by :meth:`get_char_sprite`.
+    glyph_cache_size = 1024
+
+    #: The Window, Offscreen, SDL_Window or SDL_Surface, to whose surface's
+    #: pixel format all SOFTWARE sprites created by the factory are
+    #: converted, or None to keep the surfaces as they are. See
+    #: :func:`sdl2.ext.surface.optimize_surface`.
+    display = None
+
+    #: If True, run-length encoding is enabled for the surfaces with color
+    #: key, which are converted for the :attr:`display`.
+    colorkey_rle = False
+
+    #: The :class:`TextureCache` sharing the textures of the sprites created
+    #: by :meth:`from_image` and :meth:`from_surface` or None. Only used
+    #: for TEXTURE sprites.
+    texture_cache = None
+
     def load_tileset(self, sprite, tile_size):
-        """..."""
+        """Use a sprite of square tiles as tileset.
+
+        The source rects of the tiles are kept in the `tilesheet`
+        attribute, a :class:`SpriteSheet` shared by the tile maps created
+        with :meth:`create_tilemap`.
+        """
         self._tileset = sprite
         self._tileset_w, self._tileset_h = self._tileset.size
         self._tile_size = tile_size
+        self._glyphs = OrderedDict()
+        self.tilesheet = SpriteSheet.grid(sprite, tile_size)
 
-    def get_char_sprite(self, char, **kwargs):
-        """Get the passed character from the current tileset, as a sprite.
+    def create_tilemap(self, shape=None, tiles=None, colors=False,
+                       alpha=False):
+        """Create a :class:`sdl2.ext.tilemap.TileMap` on the loaded tileset.
 
-        Args:
-            char (str): string of one character to be rendered
-            kwargs (dict): additional kwargs are passed forward to the
-                subsprite functione of the tileset sprite.
+        The arguments are passed to the TileMap, see
+        :class:`sdl2.ext.tilemap.TileMap`. The tileset has to be loaded with
+        :meth:`load_tileset` first.
         """
+        from .tilemap import TileMap
+        return TileMap(self.tilesheet, self._tile_size, shape, tiles,
+                       colors, alpha)
+
+    def _char_area(self, char):
+        """Get the (x, y, w, h) area of a character on the tileset."""
         _id = ord(char)
         tile_size = self._tile_size
         row = _id // (self._tileset_w // tile_size)
         col = _id % (self._tileset_w // tile_size)
-        area = (col * tile_size, row * tile_size, tile_size, tile_size)
-        return self._tileset.subsprite(area, **kwargs)
+        return (col * tile_size, row * tile_size, tile_size, tile_size)
+
+    def get_char_sprite(self, char, shared=False, **kwargs):
+        """Get the passed character from the current tileset, as a sprite.
+
+        The glyphs are cached by character, tile size, color_mod and
+        alpha_mod, up to :attr:`glyph_cache_size` entries. Each call
+        returns a cheap copy of the cached glyph at (0, 0), sharing its
+        source rect, which can be moved independently of the others.
+
+        Args:
+            char (str): string of one character to be rendered
+            shared (bool): if True, the cached glyph itself is returned,
+                e.g. to be positioned and drawn repeatedly. It must not be
+                modified beyond its position.
+            kwargs (dict): additional kwargs are passed forward to the
+                subsprite functione of the tileset sprite. Glyphs with other
+                kwargs than color_mod and alpha_mod are not cached.
+        """
+        color_mod = kwargs.get("color_mod")
+        if color_mod is not None:
+            color_mod = _color_key(color_mod)[:3]
+        alpha_mod = kwargs.get("alpha_mod")
+        if len(kwargs) > ("color_mod" in kwargs) + ("alpha_mod" in kwargs):
+            return self._tileset.subsprite(self._char_area(char), **kwargs)
+        key = char, self._tile_size, color_mod, alpha_mod
+        glyphs = self._glyphs
+        glyph = glyphs.get(key)
+        if glyph is None:
+            glyph = self._tileset.subsprite(self._char_area(char), **kwargs)
+            glyphs[key] = glyph
+            if len(glyphs) > self.glyph_cache_size:
+                glyphs.popitem(last=False)
+        else:
+            glyphs.move_to_end(key)
+        if shared:
+            return glyph
+        handle = _copy_sprite(glyph)
+        # the cached glyph may have been moved by shared users
+        handle.x = handle.y = 0
+        return handle
 
     def from_image(self, fname):
-        """Create a Sprite from the passed image file."""
-        return self.from_surface(load_image(fname), True)
+        """Create a Sprite from the passed image file.
+
+        With a :attr:`texture_cache`, the texture of a file is shared by
+        all sprites created from it and the file is only loaded once.
+        """
+        sprite = self._cached_image(fname)
+        if sprite is None:
+            sprite = self._image_sprite(fname, load_image(fname))
+        return sprite
+
+    def _cached_image(self, fname):
+        """Get a sprite on the cached texture of an image file or None."""
+        cache = self.texture_cache
+        if cache is None or self.sprite_type != TEXTURE:
+            return None
+        return cache.get(self._texture_key("file", os.path.realpath(fname)))
+
+    def _texture_key(self, *key):
+        """Get the TextureCache key of a source for the factory's renderer.
+        """
+        renderer = self.default_args["renderer"]
+        return (addressof(renderer.sdlrenderer.contents),) + key
+
+    def _image_sprite(self, fname, tsurface):
+        """Create a Sprite from the loaded surface of an image file.
+
+        The surface is freed. With a :attr:`texture_cache`, the texture
+        is cached for the file, unless it already is.
+        """
+        cache = self.texture_cache
+        if cache is None or self.sprite_type != TEXTURE:
+            return self.from_surface(tsurface, True)
+        key = self._texture_key("file", os.path.realpath(fname))
+        sprite = cache.get(key)
+        if sprite is None:
+            return cache.add(key, self._create_texture(tsurface, True))
+        surface.SDL_FreeSurface(tsurface)
+        return sprite
+
+    def _create_texture(self, tsurface, free):
+        """Create a texture from a surface with the factory's renderer."""
+        renderer = self.default_args["renderer"]
+        texture = render.SDL_CreateTextureFromSurface(renderer.sdlrenderer,
+                                                      tsurface)
+        if free:
+            surface.SDL_FreeSurface(tsurface)
+        if not texture:
+            raise SDLError()
+        return texture.contents
 
     def from_surface(self, tsurface, free=False):
         """Create a Sprite from the passed SDL_Surface.
 
         If free is set to True, the passed surface will be freed
-        automatically.
+        automatically. With a :attr:`texture_cache`, surfaces of the same
+        content share their texture. With a :attr:`display`, SOFTWARE
+        sprites get a copy of the surface in the display's pixel format.
         """
         if self.sprite_type == TEXTURE:
-            renderer = self.default_args["renderer"]
-            texture = render.SDL_CreateTextureFromSurface(renderer.sdlrenderer,
-                                                          tsurface)
-            if not texture:
-                raise SDLError()
-            sprite = TextureSprite(texture.contents)
+            cache = self.texture_cache
+            if cache is None:
+                return TextureSprite(self._create_texture(tsurface, free))
+            key = self._texture_key(
+                *_surface_key(getattr(tsurface, "contents", tsurface)))
+            sprite = cache.get(key)
+            if sprite is None:
+                return cache.add(key, self._create_texture(tsurface, free))
             if free:
                 surface.SDL_FreeSurface(tsurface)
             return sprite
         elif self.sprite_type == SOFTWARE:
-            return SoftwareSprite(tsurface, free)
+            if self.display is None:
+                return SoftwareSprite(tsurface, free)
+            return self._display_sprite(tsurface, free)
         raise ValueError("sprite_type must be TEXTURE or SOFTWARE")
 
+    def _display_surface(self):
+        """Get the surface of the display to convert sprites for."""
+        target = self.display
+        if isinstance(target, surface.SDL_Surface):
+            return target
+        if isinstance(target, video.SDL_Window):
+            sfc = video.SDL_GetWindowSurface(target)
+            if not sfc:
+                raise SDLError()
+            return sfc.contents
+        if isinstance(target, (Window, Offscreen)):
+            return target.get_surface()
+        raise TypeError("display must be a Window, Offscreen, SDL_Window "
+                        "or SDL_Surface")
+
+    def _display_sprite(self, tsurface, free):
+        """Create a SoftwareSprite converted to the display's format."""
+        target = self._display_surface()
+        if not isinstance(tsurface, surface.SDL_Surface):
+            raise TypeError("surface must be a SDL_Surface")
+        converted = optimize_surface(tsurface, target, self.colorkey_rle)
+        if free:
+            surface.SDL_FreeSurface(tsurface)
+        sprite = SoftwareSprite(converted, True)
+        sprite.fast_blit = is_fast_blit(converted, target)
+        return sprite
+
+    def create_atlas(self, sources, size=(1024, 1024), padding=1):
+        """Pack many images into a few shared atlas textures.
+
+        The images are packed with :func:`sdl2.ext.algorithms.pack_rects`
+        into pages of at most `size` pixels, as few as possible, and a
+        sprite is created for each page. A subsprite of the page, sharing
+        its pixel data, is then returned for every image, so that all of
+        them can be drawn without switching textures.
+
+        Args:
+            sources (dict, iterable): image file names, `SDL_Surface` or
+                `SoftwareSprite` objects. The passed surfaces are not freed.
+            size (tuple): maximum width and height of each atlas page, in
+                pixels. It should not exceed the maximum texture size of
+                the renderer.
+            padding (int): free pixels kept between the packed images, to
+                avoid bleeding when scaling.
+
+        Returns:
+            dict (if `sources` is a dict, with the same keys) or list of
+            sprites, in the same order as `sources`.
+
+        Raises:
+            ValueError if an image is larger than `size`
+            SDLError if an error occurs during the creation of a page
+        """
+        if isinstance(sources, dict):
+            keys = list(sources.keys())
+            items = [sources[key] for key in keys]
+        else:
+            keys = None
+            items = list(sources)
+
+        loaded = []
+        try:
+            surfaces = []
+            for item in items:
+                if isinstance(item, SoftwareSprite):
+                    sfc = item.surface
+                elif isinstance(item, surface.SDL_Surface):
+                    sfc = item
+                else:
+                    sfc = load_image(item)
+                    loaded.append(sfc)
+                if sfc.w > size[0] or sfc.h > size[1]:
+                    raise ValueError("image %r does not fit in an atlas of "
+                                     "size %s" % (item, size))
+                surfaces.append(sfc)
+
+            sprites = [None] * len(surfaces)
+            pending = list(range(len(surfaces)))
+            while pending:
+                positions = pack_rects(
+                    [(surfaces[i].w, surfaces[i].h) for i in pending],
+                    size[0], size[1], padding)
+                placed = [(i, pos) for i, pos in zip(pending, positions)
+                          if pos is not None]
+                pending = [i for i, pos in zip(pending, positions)
+                           if pos is None]
+                atlas = self._create_atlas_page(surfaces, placed)
+                for i, (x, y) in placed:
+                    sprites[i] = atlas.subsprite(
+                        (x, y, surfaces[i].w, surfaces[i].h))
+                    sprites[i]._parent = atlas
+        finally:
+            for sfc in loaded:
+                surface.SDL_FreeSurface(sfc)
+
+        if keys is None:
+            return sprites
+        return dict(zip(keys, sprites))
+
+    def _create_atlas_page(self, surfaces, placed):
+        """Blit the placed surfaces onto a new page and create its sprite."""
+        # only allocate as much as the packed images need
+        width = max(x + surfaces[i].w for i, (x, y) in placed)
+        height = max(y + surfaces[i].h for i, (x, y) in placed)
+        page = surface.SDL_CreateRGBSurface(0, width, height, 32, 0x00FF0000,
+                                            0x0000FF00, 0x000000FF,
+                                            0xFF000000)
+        if not page:
+            raise SDLError()
+        page = page.contents
+        mode = blendmode.SDL_BlendMode()
+        for i, (x, y) in placed:
+            sfc = surfaces[i]
+            # copy the pixels as they are, alpha channel included
+            surface.SDL_GetSurfaceBlendMode(sfc, byref(mode))
+            surface.SDL_SetSurfaceBlendMode(sfc, blendmode.SDL_BLENDMODE_NONE)
+            ret = surface.SDL_BlitSurface(sfc, None, page,
+                                          rect.SDL_Rect(x, y, 0, 0))
+            surface.SDL_SetSurfaceBlendMode(sfc, mode)
+            if ret != 0:
+                surface.SDL_FreeSurface(page)
+                raise SDLError()
+        return self.from_surface(page, True)
+
     def from_object(self, obj):
         """Create a Sprite from an arbitrary object."""
         if self.sprite_type == TEXTURE:
@@ -764,7 +2349,7 @@ class SpriteFactory(object):
             imgsurface = surface.SDL_LoadBMP_RW(rw, True)
             if not imgsurface:
                 raise SDLError()
-            return SoftwareSprite(imgsurface.contents, True)
+            return self.from_surface(imgsurface.contents, True)
         raise ValueError("sprite_type must be TEXTURE or SOFTWARE")
 
     def from_color(
@@ -848,7 +2433,8 @@ class SpriteFactory(object):
 
         A size tuple containing the width and height of the sprite and a
         bpp value, indicating the bits per pixel to be used, need to be
-        provided.
+        provided. With a :attr:`display`, the surface is converted to its
+        pixel format, like in :meth:`from_surface`.
         """
         if masks:
             rmask, gmask, bmask, amask = masks
@@ -858,7 +2444,9 @@ class SpriteFactory(object):
                                                   rmask, gmask, bmask, amask)
         if not imgsurface:
             raise SDLError()
-        return SoftwareSprite(imgsurface.contents, True)
+        if self.display is None:
+            return SoftwareSprite(imgsurface.contents, True)
+        return self._display_sprite(imgsurface.contents, True)
 
     def create_texture_sprite(self, renderer, size,
                               pformat=pixels.SDL_PIXELFORMAT_RGBA8888,
@@ -888,6 +2476,594 @@ class SpriteFactory(object):
         return TextureSprite(texture.contents)
 
 
+class _SpriteTracker(object):
+    """Base class for sprite collections notified by their sprites.
+
+    Sprites hold weak references to the trackers containing them and call
+    their _depth_changed() method, so that inheriting classes can keep
+    their structures up to date without checking every sprite on every
+    frame. Setting the `position` of a sprite calls their
+    _bounds_changed() method as well. Writing `x`, `y`, `w` or `h` is kept
+    as cheap as for any slot and has to be reported through :meth:`move`.
+    Inheriting classes implement _insert() and _discard().
+    """
+    def __init__(self):
+        self._members = {}
+        self._ref = weakref.ref(self)
+
+    def __len__(self):
+        return len(self._members)
+
+    def __contains__(self, sprite):
+        return sprite in self._members
+
+    def _insert(self, sprite):
+        raise NotImplementedError()
+
+    def _discard(self, sprite, entry):
+        raise NotImplementedError()
+
+    def _depth_changed(self, sprite, old, new):
+        pass
+
+    def _bounds_changed(self, sprite):
+        pass
+
+    def _mods_changed(self, sprite):
+        pass
+
+    def add(self, sprite):
+        """Adds a sprite.
+
+        Adding a sprite that is already contained does nothing.
+        """
+        if sprite in self._members:
+            return
+        self._insert(sprite)
+        sprite._indexes = tuple(r for r in sprite._indexes
+                                if r() is not None) + (self._ref,)
+
+    def move(self, sprite):
+        """Updates a sprite, after its position or size changed.
+
+        Changes made through the `position` of the sprite are noticed
+        without it.
+
+        Raises:
+            KeyError: if the sprite is not contained.
+        """
+        if sprite not in self._members:
+            raise KeyError(sprite)
+        self._bounds_changed(sprite)
+
+    def remove(self, sprite):
+        """Removes a sprite.
+
+        Raises:
+            KeyError: if the sprite is not contained.
+        """
+        self._discard(sprite, self._members.pop(sprite))
+        sprite._indexes = tuple(r for r in sprite._indexes
+                                if r is not self._ref)
+
+    def clear(self):
+        """Removes all sprites."""
+        for sprite in list(self._members):
+            self.remove(sprite)
+
+    def sync(self, sprites):
+        """Makes the collection contain exactly the passed sprites.
+
+        Only the added and removed sprites are touched, so that syncing an
+        unchanged collection costs a single membership pass over it.
+        """
+        if not hasattr(sprites, "__len__"):
+            sprites = list(sprites)
+        members = self._members
+        if len(sprites) == len(members) and \
+                all(map(members.__contains__, sprites)):
+            return
+        current = set(sprites)
+        for sprite in [s for s in members if s not in current]:
+            self.remove(sprite)
+        for sprite in sprites:
+            if sprite not in members:
+                self.add(sprite)
+
+
+class SpriteIndex(_SpriteTracker):
+    """A depth-ordered index of sprites.
+
+    The SpriteIndex keeps one bucket of sprites per depth value, together
+    with the sorted list of the depths in use. Sprites are moved between
+    buckets when their `depth` changes and the index can be iterated in
+    drawing order without sorting the sprites again. Within a depth,
+    sprites keep the order in which they were added to it.
+
+    A grouped SpriteIndex, which can only hold TextureSprites, further
+    groups the sprites of each depth by texture and then by color and
+    alpha mod, as a :class:`TextureSpriteRenderSystem` with
+    `texture_order` draws them. Sprites are moved between the groups,
+    when their `color_mod` or `alpha_mod` is set.
+    """
+    def __init__(self, sprites=None, grouped=False):
+        """Creates a new SpriteIndex, optionally filled with sprites."""
+        super(SpriteIndex, self).__init__()
+        self.grouped = grouped
+        # depth -> group key (None, if not grouped) -> sprites
+        self._layers = {}
+        self._depths = []
+        self._order = None
+        if sprites is not None:
+            for sprite in sprites:
+                self.add(sprite)
+
+    def __iter__(self):
+        return iter(self.sprites())
+
+    def _insert(self, sprite, depth=None):
+        if depth is None:
+            depth = sprite.depth
+        key = sprite._mods_key() if self.grouped else None
+        layer = self._layers.get(depth)
+        if layer is None:
+            layer = self._layers[depth] = {}
+            bisect.insort(self._depths, depth)
+        group = layer.get(key)
+        if group is None:
+            group = layer[key] = {}
+        group[sprite] = None
+        self._members[sprite] = depth, key
+        self._order = None
+
+    def _discard(self, sprite, entry):
+        depth, key = entry
+        layer = self._layers[depth]
+        group = layer[key]
+        del group[sprite]
+        if not group:
+            del layer[key]
+            if not layer:
+                del self._layers[depth]
+                self._depths.remove(depth)
+        self._order = None
+
+    def _depth_changed(self, sprite, old, new):
+        entry = self._members.get(sprite)
+        if entry is None:
+            return
+        self._discard(sprite, entry)
+        self._insert(sprite, new)
+
+    def _mods_changed(self, sprite):
+        entry = self._members.get(sprite)
+        if entry is None or not self.grouped or \
+                sprite._mods_key() == entry[1]:
+            return
+        self._discard(sprite, entry)
+        self._insert(sprite, entry[0])
+
+    @property
+    def depths(self):
+        """The depths currently in use, in ascending order."""
+        return tuple(self._depths)
+
+    def layer(self, depth):
+        """Gets the sprites on a specific depth as tuple."""
+        return tuple(sprite for group in self._layers.get(depth, {}).values()
+                     for sprite in group)
+
+    def sprites(self):
+        """Gets all indexed sprites as list, in drawing order.
+
+        The list is cached until the index changes, so it must not be
+        modified.
+        """
+        if self._order is None:
+            layers = self._layers
+            order = []
+            for depth in self._depths:
+                layer = layers[depth]
+                for key in sorted(layer) if len(layer) > 1 else layer:
+                    order.extend(layer[key])
+            self._order = order
+        return self._order
+
+
+class SpatialHash(_SpriteTracker):
+    """A spatial hash of sprite bounds.
+
+    The SpatialHash divides the plane into square cells of `cell_size`
+    pixels and keeps, for each cell, the sprites overlapping it, so that
+    :meth:`query` only visits the sprites near the queried area. Sprites,
+    whose `position` was set or which were passed to :meth:`move`, are
+    marked as moved and re-filed by the next :meth:`update` or
+    :meth:`query` call, so that the cost only depends on the number of
+    moved sprites.
+    """
+    def __init__(self, cell_size=256, sprites=None):
+        """Creates a new SpatialHash, optionally filled with sprites.
+
+        Raises:
+            ValueError: if cell_size is not a positive number.
+        """
+        super(SpatialHash, self).__init__()
+        if cell_size <= 0:
+            raise ValueError("cell_size must be greater than 0")
+        self.cell_size = cell_size
+        self._cells = {}
+        self._serial = 0
+        self._moved = {}
+        if sprites is not None:
+            for sprite in sprites:
+                self.add(sprite)
+
+    def _cell_range(self, x, y, w, h):
+        size = self.cell_size
+        # Empty areas still occupy the cell of their position.
+        return (int(x // size), int(y // size),
+                int((x + max(w, 1) - 1) // size),
+                int((y + max(h, 1) - 1) // size))
+
+    def _file(self, sprite, serial, cells):
+        x1, y1, x2, y2 = cells
+        allcells = self._cells
+        for cy in range(y1, y2 + 1):
+            for cx in range(x1, x2 + 1):
+                cell = allcells.get((cx, cy))
+                if cell is None:
+                    cell = allcells[(cx, cy)] = {}
+                cell[sprite] = serial
+        self._members[sprite] = serial, cells
+
+    def _insert(self, sprite):
+        self._serial += 1
+        cells = self._cell_range(sprite.x, sprite.y, sprite.w, sprite.h)
+        self._file(sprite, self._serial, cells)
+
+    def _unfile(self, sprite, cells):
+        x1, y1, x2, y2 = cells
+        allcells = self._cells
+        for cy in range(y1, y2 + 1):
+            for cx in range(x1, x2 + 1):
+                cell = allcells[(cx, cy)]
+                del cell[sprite]
+                if not cell:
+                    del allcells[(cx, cy)]
+
+    def _discard(self, sprite, entry):
+        self._unfile(sprite, entry[1])
+        self._moved.pop(sprite, None)
+
+    def _bounds_changed(self, sprite):
+        if sprite in self._members:
+            self._moved[sprite] = None
+
+    def update(self):
+        """Re-files the sprites moved since the last call."""
+        moved = self._moved
+        if not moved:
+            return
+        self._moved = {}
+        members = self._members
+        cell_range = self._cell_range
+        for sprite in moved:
+            serial, cells = members[sprite]
+            new = cell_range(sprite.x, sprite.y, sprite.w, sprite.h)
+            if new != cells:
+                self._unfile(sprite, cells)
+                self._file(sprite, serial, new)
+
+    def query(self, area):
+        """Gets the sprites overlapping the passed (x, y, w, h) area.
+
+        The sprites are returned as list, ordered by their depth and then
+        by the order in which they were added, so that the result can be
+        passed to a render system directly.
+        """
+        if self._moved:
+            self.update()
+        x, y, w, h = area
+        x1, y1, x2, y2 = self._cell_range(x, y, w, h)
+        allcells = self._cells
+        found = {}
+        if (x2 - x1 + 1) * (y2 - y1 + 1) > len(allcells):
+            # Cheaper to visit the occupied cells than the queried ones.
+            for (cx, cy), cell in allcells.items():
+                if x1 <= cx <= x2 and y1 <= cy <= y2:
+                    found.update(cell)
+        else:
+            for cy in range(y1, y2 + 1):
+                for cx in range(x1, x2 + 1):
+                    cell = allcells.get((cx, cy))
+                    if cell:
+                        found.update(cell)
+        x2, y2 = x + w, y + h
+        hits = [(s.depth, serial, s) for s, serial in found.items()
+                if s.x < x2 and s.y < y2 and s.x + s.w > x and s.y + s.h > y]
+        hits.sort(key=lambda hit: hit[:2])
+        return [hit[2] for hit in hits]
+
+
+class Camera(object):
+    """A view on a 2D world, used by the TextureSpriteRenderSystem.
+
+    The camera maps world coordinates to the render target: the world
+    point at `position` is drawn at the top-left corner of the output,
+    and everything is scaled by `zoom`.
+    """
+    def __init__(self, position=(0, 0), zoom=1.0, size=None):
+        """Creates a new Camera.
+
+        Args:
+            position (tuple): the top-left world position of the view.
+            zoom (float): the scaling factor from world to output pixels.
+            size (tuple): the (w, h) output size of the view. If None, the
+                output size of the renderer is used.
+
+        Raises:
+            ValueError: if zoom is not a positive number.
+        """
+        self.x, self.y = position
+        self.size = size
+        self.zoom = zoom
+
+    @property
+    def zoom(self):
+        """The scaling factor from world to output pixels."""
+        return self._zoom
+
+    @zoom.setter
+    def zoom(self, value):
+        if value <= 0:
+            raise ValueError("zoom must be greater than 0")
+        self._zoom = value
+
+    @property
+    def position(self):
+        """The top-left world position of the view as tuple."""
+        return self.x, self.y
+
+    @position.setter
+    def position(self, value):
+        self.x, self.y = value
+
+    def view(self, size=None):
+        """Gets the visible world area as (x, y, w, h) tuple.
+
+        size is the output size to use, if the camera has none set.
+        """
+        w, h = self.size or size
+        zoom = self._zoom
+        return self.x, self.y, w / zoom, h / zoom
+
+    def to_world(self, x, y):
+        """Converts an output position to world coordinates."""
+        return self.x + x / self._zoom, self.y + y / self._zoom
+
+    def to_screen(self, x, y):
+        """Converts a world position to output coordinates."""
+        return (x - self.x) * self._zoom, (y - self.y) * self._zoom
+
+
+class StaticLayer(_SpriteTracker):
+    """A group of TextureSprites baked into a single texture.
+
+    The sprites are drawn once into a texture created with
+    SDL_TEXTUREACCESS_TARGET, which can then be drawn with a single copy
+    per frame through the :attr:`sprite` returned by :meth:`bake`, e.g.
+    for map layers that rarely change. Adding, removing or changing the
+    depth of a member sprite marks its area as dirty, and the next
+    :meth:`bake` call only redraws the dirty areas. Setting the
+    `position` of a sprite marks its old and new area; a sprite moved or
+    resized through `x`, `y`, `w` or `h` needs a :meth:`move` call.
+    Changes the layer cannot notice, such as a new frame_rect or color
+    mod, need an explicit :meth:`invalidate`.
+
+    The layer texture has to be invalidated and baked again, if the
+    renderer loses its targets (SDL_RENDER_TARGETS_RESET event).
+    """
+    def __init__(self, renderer, sprites=None, area=None,
+                 pformat=pixels.SDL_PIXELFORMAT_RGBA8888):
+        """Creates a new StaticLayer.
+
+        Args:
+            renderer (Renderer): the renderer to draw the layer with.
+            sprites (iterable): the TextureSprites to put on the layer.
+            area (tuple): the (x, y, w, h) area covered by the layer. If
+                None, the layer grows to the bounding box of its sprites.
+            pformat (int): the pixel format of the layer texture.
+
+        Attributes:
+            sprite (TextureSprite): the sprite of the layer texture, placed
+                at the top-left of the layer area; None before the first
+                :meth:`bake`.
+        """
+        super(StaticLayer, self).__init__()
+        if not isinstance(renderer, Renderer):
+            raise TypeError("renderer must be a Renderer")
+        self.renderer = renderer
+        self.pformat = pformat
+        self.sprite = None
+        if area is not None:
+            r = NonIterableRect(area)
+            area = r.x, r.y, r.w, r.h
+        self._area = area
+        self._fixed = area is not None
+        self._serial = 0
+        self._damage = []
+        self._full = True
+        if sprites is not None:
+            for sprite in sprites:
+                self.add(sprite)
+
+    @staticmethod
+    def _bounds(sprite):
+        return sprite.x, sprite.y, sprite.w, sprite.h
+
+    def _insert(self, sprite):
+        self._serial += 1
+        bounds = self._bounds(sprite)
+        self._members[sprite] = self._serial, bounds
+        self._damage.append(bounds)
+
+    def _discard(self, sprite, entry):
+        self._damage.append(entry[1])
+
+    def _depth_changed(self, sprite, old, new):
+        entry = self._members.get(sprite)
+        if entry is not None:
+            self._damage.append(entry[1])
+
+    def _bounds_changed(self, sprite):
+        entry = self._members.get(sprite)
+        if entry is None:
+            return
+        bounds = self._bounds(sprite)
+        if bounds != entry[1]:
+            self._damage.extend((entry[1], bounds))
+            self._members[sprite] = entry[0], bounds
+
+    @property
+    def area(self):
+        """The (x, y, w, h) area covered by the layer."""
+        if not self._fixed:
+            self._fit()
+        return self._area
+
+    @property
+    def dirty(self):
+        """Indicates, whether the layer needs to be baked again."""
+        return self._full or bool(self._damage)
+
+    def invalidate(self, sprite=None):
+        """Marks a member sprite or, if None, the whole layer as dirty."""
+        if sprite is None:
+            self._full = True
+        else:
+            self._damage.append(self._members[sprite][1])
+
+    def _fit(self):
+        """Grows the layer area to the bounding box of its sprites."""
+        boxes = [entry[1] for entry in self._members.values()]
+        if self._area is not None:
+            boxes.append(self._area)
+        if not boxes:
+            return
+        x = min(b[0] for b in boxes)
+        y = min(b[1] for b in boxes)
+        x2 = max(b[0] + b[2] for b in boxes)
+        y2 = max(b[1] + b[3] for b in boxes)
+        area = x, y, max(x2 - x, 1), max(y2 - y, 1)
+        if area != self._area:
+            self._area = area
+            self._full = True
+
+    def _create_texture(self):
+        renderer = self.renderer
+        w, h = self._area[2:]
+        texture = render.SDL_CreateTexture(
+            renderer.sdlrenderer, self.pformat,
+            render.SDL_TEXTUREACCESS_TARGET, w, h)
+        if not texture:
+            raise SDLError()
+        if render.SDL_SetTextureBlendMode(
+                texture, blendmode.SDL_BLENDMODE_BLEND) != 0:
+            render.SDL_DestroyTexture(texture)
+            raise SDLError()
+        self.sprite = TextureSprite(texture.contents)
+
+    def _draw(self, clip):
+        """Redraws the sprites overlapping a layer-relative clip area."""
+        renderer = self.renderer
+        sdlrenderer = renderer.sdlrenderer
+        ax, ay = self._area[:2]
+        cx, cy, cw, ch = clip
+        cx2, cy2 = cx + cw, cy + ch
+        renderer.clip_rect = clip
+        renderer.fill(clip, Color(0, 0, 0, 0))
+        # the sprites are copied without a batch
+        renderer._flush_batch()
+        members = self._members
+        hits = [(s.depth, entry[0], s) for s, entry in members.items()
+                if s.x - ax < cx2 and s.y - ay < cy2 and
+                s.x + s.w - ax > cx and s.y + s.h - ay > cy]
+        hits.sort(key=lambda hit: hit[:2])
+        r = rect.SDL_Rect()
+        originals = {}
+        try:
+            for _, _, sprite in hits:
+                texture = sprite.texture
+                key = addressof(texture)
+                if key not in originals:
+                    originals[key] = texture, _texture_mods(texture)
+                color = sprite.color_mod or (255, 255, 255)
+                alpha = 255 if sprite.alpha_mod is None else sprite.alpha_mod
+                if (render.SDL_SetTextureColorMod(texture, *color) or
+                        render.SDL_SetTextureAlphaMod(texture, alpha)):
+                    raise SDLError()
+                r.x, r.y = sprite.x - ax, sprite.y - ay
+                r.w, r.h = sprite.w, sprite.h
+                if render.SDL_RenderCopyEx(
+                        sdlrenderer, texture, sprite.frame_rect, r,
+                        sprite.angle, sprite.sdl_center, sprite.flip) == -1:
+                    raise SDLError()
+        finally:
+            # leave shared textures as they would be without the layer
+            for texture, (color, alpha) in originals.values():
+                render.SDL_SetTextureColorMod(texture, *color)
+                render.SDL_SetTextureAlphaMod(texture, alpha)
+
+    def bake(self):
+        """Redraws the dirty areas of the layer.
+
+        Returns:
+            TextureSprite: the :attr:`sprite` of the layer, or None if the
+            layer has neither sprites nor an area.
+        """
+        if not self._fixed:
+            self._fit()
+        if self._area is None or not self.dirty:
+            return self.sprite
+        ax, ay, aw, ah = self._area
+        if self.sprite is None or self.sprite.size != (aw, ah):
+            self._create_texture()
+            self._full = True
+        if self._full:
+            clips = [(0, 0, aw, ah)]
+        else:
+            clips = []
+            for x, y, w, h in self._damage:
+                x1, y1 = max(x - ax, 0), max(y - ay, 0)
+                x2, y2 = min(x - ax + w, aw), min(y - ay + h, ah)
+                clips.append((x1, y1, x2 - x1, y2 - y1))
+            clips = _merge_rects(clips)
+        self._damage = []
+        self._full = False
+        renderer = self.renderer
+        target, clip = renderer.target, renderer.clip_rect
+        mode = renderer.blendmode
+        try:
+            renderer.target = self.sprite
+            renderer.blendmode = blendmode.SDL_BLENDMODE_NONE
+            for area in clips:
+                self._draw(area)
+        finally:
+            renderer.blendmode = mode
+            renderer.target = target
+            renderer.clip_rect = clip
+        self.sprite.position = ax, ay
+        return self.sprite
+
+
+def _depth_key(sprite):
+    return sprite.depth
+
+
+def _group_key(sprite):
+    return sprite.depth, sprite._mods_key()
+
+
 class SpriteRenderSystem(System):
     """A rendering system for Sprite components.
 
@@ -899,7 +3075,8 @@ class SpriteRenderSystem(System):
     def __init__(self):
         super(SpriteRenderSystem, self).__init__()
         self.componenttypes = (Sprite,)
-        self._sortfunc = lambda e: e.depth
+        self._sortfunc = _depth_key
+        self._index = SpriteIndex()
 
     def render(self, sprites, x=None, y=None):
         """Renders the passed sprites.
@@ -909,9 +3086,21 @@ class SpriteRenderSystem(System):
         """
         pass
 
+    def _ordered(self, components):
+        """Gets the components in drawing order.
+
+        With the default sort function, the sprites are kept in a
+        :class:`SpriteIndex` that is only updated for added or removed
+        sprites and depth changes, instead of being sorted again.
+        """
+        if self._sortfunc is not _depth_key:
+            return sorted(components, key=self._sortfunc)
+        self._index.sync(components)
+        return self._index.sprites()
+
     def process(self, world, components):
         """Draws the passed SoftSprite objects on the Window's surface."""
-        self.render(sorted(components, key=self._sortfunc))
+        self.render(self._ordered(components))
 
     @property
     def sortfunc(self):
@@ -944,9 +3133,33 @@ class SoftwareSpriteRenderSystem(SpriteRenderSystem):
     drawing context, so that GL operations, such as texture handling or
     using SDL renderers is not possible.
     """
-    def __init__(self, window):
-        """Creates a new SoftwareSpriteRenderSystem for a specific Window."""
+    def __init__(self, window, dirty_rects=False):
+        """Creates a new SoftwareSpriteRenderSystem for a specific Window.
+
+        Args:
+            window (Window, Offscreen, sdl2.SDL_Window): the window to draw
+                on.
+            dirty_rects (bool): if True, only the areas that changed since
+                the last :meth:`render` call (the old and new areas of moved,
+                added, removed or re-framed sprites, plus those passed to
+                :meth:`add_dirty`) are pushed to the screen, through
+                SDL_UpdateWindowSurfaceRects. In this mode, all sprites of a
+                frame must be passed in a single :meth:`render` call, as
+                :meth:`process` does.
+        """
         super(SoftwareSpriteRenderSystem, self).__init__()
+        self.dirty_rects = dirty_rects
+        self.updated_rects = []
+        self._areas = {}
+        self._damage = []
+        self._full_update = True
+        if isinstance(window, Offscreen):
+            # nothing to push to the screen, the surface is the output
+            self.window = None
+            self._offscreen = window  # Keeps the surface alive
+            self.surface = window.surface
+            self.componenttypes = (SoftwareSprite,)
+            return
         if isinstance(window, Window):
             self.window = window.window
         elif isinstance(window, video.SDL_Window):
@@ -970,6 +3183,8 @@ class SoftwareSpriteRenderSystem(SpriteRenderSystem):
         SoftwareSprite, x and y denote the absolute position of the
         SoftwareSprite, if set.
         """
+        if self.dirty_rects:
+            return self._render_dirty(sprites, x, y)
         r = rect.SDL_Rect(0, 0, 0, 0)
         try:
             _iter = (sprite for sprite in sprites)
@@ -995,7 +3210,91 @@ class SoftwareSpriteRenderSystem(SpriteRenderSystem):
                 # pass the frame_rect as argument instead of None
             surface.SDL_BlitSurface(
                 sprites.surface, frame_rect, self.surface, r)
-        video.SDL_UpdateWindowSurface(self.window)
+        if self.window is not None:
+            video.SDL_UpdateWindowSurface(self.window)
+
+    def add_dirty(self, area):
+        """Mark an (x, y, w, h) area of the window to be updated.
+
+        Only needed with `dirty_rects` enabled, for changes that the render
+        system cannot notice, such as drawing directly on the window surface
+        or modifying the pixels of a sprite in place.
+        """
+        r = NonIterableRect(area)
+        self._damage.append((r.x, r.y, r.w, r.h))
+
+    def invalidate(self):
+        """Update the entire window on the next :meth:`render` call."""
+        self._full_update = True
+
+    def _render_dirty(self, sprites, x=None, y=None):
+        """Blit the sprites and update the changed areas of the window."""
+        r = rect.SDL_Rect(0, 0, 0, 0)
+        blit_surface = surface.SDL_BlitSurface
+        imgsurface = self.surface
+        damage = self._damage
+        previous = self._areas
+        areas = {}
+        try:
+            _iter = (sprite for sprite in sprites)
+            x = x or 0
+            y = y or 0
+            for sprite in _iter:
+                r.x = x + sprite.x
+                r.y = y + sprite.y
+                frame_rect = sprite.frame_rect or None
+                blit_surface(sprite.surface, frame_rect, imgsurface, r)
+                # r now holds the clipped area that was actually blitted
+                area = (r.x, r.y, r.w, r.h)
+                state = (area, sprite._pixel_data, frame_rect and (
+                    frame_rect.x, frame_rect.y, frame_rect.w, frame_rect.h))
+                old = previous.pop(sprite, None)
+                if old != state:
+                    damage.append(area)
+                    if old is not None:
+                        damage.append(old[0])
+                areas[sprite] = state
+        except TypeError:
+            r.x = sprites.x
+            r.y = sprites.y
+            if x is not None and y is not None:
+                r.x = x
+                r.y = y
+            frame_rect = sprites.frame_rect or None
+            blit_surface(sprites.surface, frame_rect, imgsurface, r)
+            area = (r.x, r.y, r.w, r.h)
+            damage.append(area)
+            # a single sprite leaves the tracking of the others untouched
+            areas = previous
+            old = areas.pop(sprites, None)
+            if old is not None:
+                damage.append(old[0])
+            areas[sprites] = (area, sprites._pixel_data, frame_rect and (
+                frame_rect.x, frame_rect.y, frame_rect.w, frame_rect.h))
+            previous = {}
+        # sprites which are gone leave their old area behind
+        damage.extend(state[0] for state in previous.values())
+        self._areas = areas
+
+        if self._full_update:
+            self._full_update = False
+            self._damage = []
+            self.updated_rects = [(0, 0, imgsurface.w, imgsurface.h)]
+            if self.window is None:
+                return
+            if video.SDL_UpdateWindowSurface(self.window) != 0:
+                raise SDLError()
+            return
+        self.updated_rects = _merge_rects(damage)
+        self._damage = []
+        count = len(self.updated_rects)
+        if not count or self.window is None:
+            return
+        rlist = (rect.SDL_Rect * count)()
+        for idx, area in enumerate(self.updated_rects):
+            rlist[idx] = rect.SDL_Rect(*area)
+        if video.SDL_UpdateWindowSurfaceRects(self.window, rlist, count) != 0:
+            raise SDLError()
 
 
 class TextureSpriteRenderSystem(SpriteRenderSystem):
@@ -1004,15 +3303,43 @@ class TextureSpriteRenderSystem(SpriteRenderSystem):
     The TextureSpriteRenderSystem class uses a SDL_Renderer as drawing
     device to display TextureSprite objects.
     """
-    def __init__(self, target, present=True, *args, **kwargs):
+    def __init__(self, target, present=True, texture_order=False,
+                 camera=None, *args, **kwargs):
         """Creates a new TextureSpriteRenderSystem.
 
-        target can be a Window, SDL_Window, Renderer or SDL_Renderer.
-        If it is a Window or SDL_Window instance, a Renderer will be
-        created to acquire the SDL_Renderer.
+        target can be a Window, Offscreen, SDL_Window, Renderer or
+        SDL_Renderer. If it is a Window, Offscreen or SDL_Window instance, a
+        Renderer will be created to acquire the SDL_Renderer.
+
+        If texture_order is True, :meth:`process` groups the sprites of
+        each depth by texture and then by color and alpha mod, to reduce
+        the texture and state changes of the SDL backend. The draw order
+        between different depths is kept, but sprites sharing the same
+        depth may be drawn in any order. In that mode, the `color_mod` and
+        `alpha_mod` of the sprites are also applied while rendering.
+
+        If a :class:`Camera` is passed, sprites are drawn relative to its
+        position and zoom, and :meth:`process` keeps the sprites in the
+        :class:`SpatialHash` of the spatial_hash attribute, to only visit
+        the ones in view. The spatial hash is only synced with the passed
+        components, when the :attr:`sdl2.ext.ebs.World.revision` of the
+        world changed (or for every call without a World). Sprites moved
+        by writing `x`, `y`, `w` or `h` instead of setting their
+        `position` have to be passed to ``spatial_hash.move()``.
+
+        The texture_changes and mod_changes attributes hold the number of
+        texture switches and color/alpha mod changes of the last
+        :meth:`render` call.
         """
         super(TextureSpriteRenderSystem, self).__init__()
-        if isinstance(target, (Window, video.SDL_Window)):
+        self.texture_order = texture_order
+        self.texture_changes = 0
+        self.mod_changes = 0
+        self.camera = camera
+        self.spatial_hash = SpatialHash()
+        self._groups = SpriteIndex(grouped=True)
+        self._revisions = {}
+        if isinstance(target, (Window, Offscreen, video.SDL_Window)):
             # Create a Renderer for the window and use that one.
             target = Renderer(target)
         if isinstance(target, Renderer):
@@ -1025,7 +3352,83 @@ class TextureSpriteRenderSystem(SpriteRenderSystem):
         self.sdlrenderer = sdlrenderer
         self.componenttypes = (TextureSprite,)
         self.present = present
-        self.max_x, self.max_y = get_display_mode()
+        self.max_x, self.max_y = self._output_size()
+
+    def _output_size(self):
+        """Gets the (logical) output size of the renderer."""
+        w, h = c_int(), c_int()
+        render.SDL_RenderGetLogicalSize(self.sdlrenderer, byref(w), byref(h))
+        if w.value == 0 or h.value == 0:
+            if render.SDL_GetRendererOutputSize(self.sdlrenderer, byref(w),
+                                                byref(h)) != 0:
+                raise SDLError()
+        return w.value, h.value
+
+    def _apply_mods(self, sprite, mods):
+        """Set the color and alpha mod of a sprite on its texture.
+
+        Sprites without color_mod or alpha_mod are drawn with (255, 255,
+        255) and 255, to not take over the mods of other sprites sharing
+        the texture. mods maps texture addresses to a [texture, original
+        mods, current mods] list for the textures used during the current
+        render call; the mods of a texture are read from SDL once, so that
+        SDL is only called on changes and they can be restored afterwards.
+        """
+        texture, color_mod, alpha_mod = sprite._mods_key()
+        entry = mods.get(texture)
+        if entry is None:
+            original = _texture_mods(sprite.texture)
+            entry = mods[texture] = [sprite.texture, original, original]
+        current = entry[2]
+        if color_mod != current[0]:
+            if render.SDL_SetTextureColorMod(sprite.texture, *color_mod):
+                raise SDLError()
+            self.mod_changes += 1
+            current = color_mod, current[1]
+        if alpha_mod != current[1]:
+            if render.SDL_SetTextureAlphaMod(sprite.texture, alpha_mod):
+                raise SDLError()
+            self.mod_changes += 1
+            current = current[0], alpha_mod
+        entry[2] = current
+
+    def _sync(self, tracker, world, components):
+        """Syncs a sprite tracker with the components, if the world changed
+        since its last sync."""
+        revision = getattr(world, "revision", None)
+        if revision is None or revision != self._revisions.get(tracker):
+            tracker.sync(components)
+            self._revisions[tracker] = revision
+
+    def process(self, world, components):
+        """Draws the passed TextureSprite objects.
+
+        With a camera set, only the sprites in its view are drawn. With
+        texture_order enabled, sprites of the same depth are grouped by
+        texture and color/alpha mod.
+
+        Without a camera, the groups are kept in a grouped
+        :class:`SpriteIndex`, which is only synced with the components when
+        the world changed, so that the sprites are not sorted again on
+        every frame.
+        """
+        camera = self.camera
+        sortfunc = self._sortfunc
+        if camera is not None and sortfunc is _depth_key:
+            self._sync(self.spatial_hash, world, components)
+            sprites = self.spatial_hash.query(
+                camera.view(self._output_size()))
+            if self.texture_order:
+                sprites.sort(key=_group_key)
+        elif not self.texture_order:
+            sprites = self._ordered(components)
+        elif sortfunc is _depth_key:
+            self._sync(self._groups, world, components)
+            sprites = self._groups.sprites()
+        else:
+            sprites = sorted(components,
+                             key=lambda s: (sortfunc(s), s._mods_key()))
+        self.render(sprites)
 
     def render(self, sprites, x=None, y=None, present=None):
         """Draw the passed sprites (or sprite).
@@ -1045,48 +3448,89 @@ class TextureSpriteRenderSystem(SpriteRenderSystem):
         Raises:
             SDLError (if sdl2.render.SDL_RenderCopyEx fails)
         """
-        def out_of_bounds(r):
-            return ((r.x + r.w) > self.max_x) or ((r.y + r.h) > self.max_y)
+        max_x, max_y = self.max_x, self.max_y = self._output_size()
+        if hasattr(self, "_renderer"):
+            # draw the sprites after the batched commands before them
+            self._renderer._flush_batch()
+        camera = self.camera
+        if camera is None:
+            ox = oy = 0
+            zoom = 1
+        else:
+            ox, oy = camera.position
+            zoom = camera.zoom
+
+        def place(r, sx, sy, w, h):
+            # Moves r to the output area of a sprite and tells, whether
+            # it is visible.
+            sx -= ox
+            sy -= oy
+            if zoom == 1:
+                r.x, r.y, r.w, r.h = sx, sy, w, h
+            else:
+                r.x = left = int(floor(sx * zoom))
+                r.y = top = int(floor(sy * zoom))
+                r.w = int(floor((sx + w) * zoom)) - left
+                r.h = int(floor((sy + h) * zoom)) - top
+            return not (r.x >= max_x or r.y >= max_y or
+                        r.x + r.w <= 0 or r.y + r.h <= 0)
 
         r = rect.SDL_Rect(0, 0, 0, 0)
         rcopy = render.SDL_RenderCopyEx
+        apply_mods = self.texture_order
+        mods = {}
+        self.texture_changes = 0
+        self.mod_changes = 0
 
         try:
             _iter = (sprite for sprite in sprites)
             renderer = self.sdlrenderer
             x = x or 0
             y = y or 0
+            last_texture = None
             for sprite in _iter:
-                r.x = x + sprite.x
-                r.y = y + sprite.y
-                r.w, r.h = sprite.size
+                w, h = sprite.size
+                if not place(r, x + sprite.x, y + sprite.y, w, h):
+                    continue
                 # get the frame_rect of a sprite if it has one
                 frame_rect = sprite.frame_rect or None
                 # pass the frame_rect as argument instead of None
-                if out_of_bounds(r):
-                    continue
+                texture = addressof(sprite.texture)
+                if texture != last_texture:
+                    self.texture_changes += 1
+                    last_texture = texture
+                if apply_mods:
+                    self._apply_mods(sprite, mods)
                 if rcopy(
                     renderer, sprite.texture, frame_rect, r, sprite.angle,
                     sprite.sdl_center, sprite.flip
                 ) == -1:
                     raise SDLError()
         except TypeError:
-            r.x = sprites.x
-            r.y = sprites.y
-            r.w, r.h = sprites.size
+            sx, sy = sprites.x, sprites.y
             if x is not None and y is not None:
-                r.x = x
-                r.y = y
+                sx, sy = x, y
+            w, h = sprites.size
+            if not place(r, sx, sy, w, h):
+                return
             # get the frame_rect of a sprite if it has one
             frame_rect = sprites.frame_rect or None
             # pass the frame_rect as argument instead of None
-            if out_of_bounds(r):
-                return
+            self.texture_changes = 1
+            if apply_mods:
+                self._apply_mods(sprites, mods)
             if rcopy(
                 self.sdlrenderer, sprites.texture, frame_rect, r,
                 sprites.angle, sprites.sdl_center, sprites.flip
             ) == -1:
                 raise SDLError()
+        finally:
+            # the sprites' mods must not stick to shared textures
+            for texture, original, current in mods.values():
+                if current[0] != original[0]:
+                    render.SDL_SetTextureColorMod(texture, *original[0])
+                if current[1] != original[1]:
+                    render.SDL_SetTextureAlphaMod(texture, original[1])
         if present is False:
             # Explicitly asked not to render
             return
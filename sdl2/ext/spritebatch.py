@@ -0,0 +1,286 @@
+"""Structure-of-arrays sprite batches."""
+from ctypes import addressof, byref, cast, c_double, c_int, c_void_p
+
+from .. import render
+from ..dll import dll
+from ..stdinc import Uint32
+from .common import SDLError
+from .compat import UnsupportedError
+from .sprite import Renderer, TextureSprite
+
+_HASNUMPY = True
+try:
+    import numpy
+except ImportError:
+    _HASNUMPY = False
+
+__all__ = ["SpriteBatch"]
+
+
+# Bound to take plain addresses, which avoids creating a ctypes object per
+# argument and call.
+_render_copy = dll.get_function("SDL_RenderCopy", [c_void_p] * 4, c_int)
+_render_copy_ex = dll.get_function(
+    "SDL_RenderCopyEx", [c_void_p] * 4 + [c_double, c_void_p, c_int], c_int)
+
+
+class SpriteBatch(object):
+    """A set of quads drawn from a single texture.
+
+    Instead of one Python object per sprite, the SpriteBatch keeps the
+    positions, sizes, source rects (frames), angles and flips of all its
+    quads in parallel NumPy arrays, which can be updated at once, e.g.
+    ``batch.positions += batch.velocities * dt``. Drawing computes all
+    destination rects and the culling in NumPy, but still makes one ctypes
+    call to SDL_RenderCopy (or SDL_RenderCopyEx) per visible quad.
+
+    The positions, sizes, frames, angles and flips attributes are views on
+    the first `len(batch)` entries of the internal arrays. They become
+    stale once quads are added or removed.
+    """
+    def __init__(self, texture, capacity=64):
+        """Creates a new, empty SpriteBatch.
+
+        Args:
+            texture (TextureSprite, sdl2.render.SDL_Texture): the texture
+                to draw the quads from.
+            capacity (int): the initial number of quads the batch can hold
+                before its arrays are grown.
+
+        Raises:
+            UnsupportedError: if NumPy is not available.
+        """
+        if not _HASNUMPY:
+            raise UnsupportedError(SpriteBatch,
+                                   "numpy module could not be loaded")
+        if isinstance(texture, TextureSprite):
+            self._sprite = texture  # Used to prevent GC
+            texture = texture.texture
+        elif not isinstance(texture, render.SDL_Texture):
+            raise TypeError("texture must be a TextureSprite or SDL_Texture")
+        self.texture = texture
+        w, h, flags, access = c_int(), c_int(), Uint32(), c_int()
+        if render.SDL_QueryTexture(texture, byref(flags), byref(access),
+                                   byref(w), byref(h)) != 0:
+            raise SDLError()
+        self.texture_size = w.value, h.value
+        self.drawn = 0
+        self._count = 0
+        self._allocate(max(capacity, 1))
+
+    def _allocate(self, capacity):
+        """(Re)allocates the arrays, keeping the current quads."""
+        count = self._count
+        arrays = (
+            ("_positions", (capacity, 2), numpy.float64),
+            ("_sizes", (capacity, 2), numpy.int32),
+            ("_frames", (capacity, 4), numpy.int32),
+            ("_angles", (capacity,), numpy.float64),
+            ("_flips", (capacity,), numpy.int32),
+        )
+        for name, shape, dtype in arrays:
+            array = numpy.zeros(shape, dtype=dtype)
+            if count:
+                array[:count] = getattr(self, name)[:count]
+            setattr(self, name, array)
+        self._dst = numpy.zeros((capacity, 4), dtype=numpy.int32)
+
+    def _reserve(self, count):
+        """Makes room for count more quads and returns the first index."""
+        start = self._count
+        capacity = len(self._positions)
+        if start + count > capacity:
+            while start + count > capacity:
+                capacity *= 2
+            self._allocate(capacity)
+        self._count = start + count
+        return start
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def positions(self):
+        """The (x, y) float positions of the quads, shape (n, 2)."""
+        return self._positions[:self._count]
+
+    @property
+    def sizes(self):
+        """The (w, h) int32 sizes of the quads, shape (n, 2)."""
+        return self._sizes[:self._count]
+
+    @property
+    def frames(self):
+        """The (x, y, w, h) int32 source rects of the quads, shape (n, 4)."""
+        return self._frames[:self._count]
+
+    @property
+    def angles(self):
+        """The rotation angles of the quads in degrees, shape (n,)."""
+        return self._angles[:self._count]
+
+    @property
+    def flips(self):
+        """The SDL_FLIP_* values of the quads, shape (n,)."""
+        return self._flips[:self._count]
+
+    def add(self, x, y, size=None, frame=None, angle=0.0,
+            flip=render.SDL_FLIP_NONE):
+        """Adds a quad to the batch and returns its index.
+
+        Args:
+            x, y (float): the position of the quad.
+            size (tuple): the (w, h) size of the quad; defaults to the size
+                of the frame.
+            frame (tuple): the (x, y, w, h) source rect on the texture;
+                defaults to the entire texture.
+            angle (float): the rotation angle in degrees.
+            flip (int): a SDL_FLIP_* value.
+        """
+        return self.extend([(x, y)], size, frame, angle, flip)
+
+    def extend(self, positions, sizes=None, frames=None, angles=0.0,
+               flips=render.SDL_FLIP_NONE):
+        """Adds many quads at once and returns the index of the first.
+
+        The arguments are the same as for :meth:`add`, but per-quad arrays
+        (or sequences) are accepted as well as single values, which are
+        used for all added quads.
+        """
+        positions = numpy.asarray(positions, dtype=numpy.float64)
+        if positions.ndim != 2 or positions.shape[1] != 2:
+            raise ValueError("positions must be of shape (n, 2)")
+        count = len(positions)
+        if frames is None:
+            frames = (0, 0) + self.texture_size
+        frames = numpy.broadcast_to(
+            numpy.asarray(frames, dtype=numpy.int32), (count, 4))
+        if sizes is None:
+            sizes = frames[:, 2:]
+        start = self._reserve(count)
+        end = start + count
+        self._positions[start:end] = positions
+        self._sizes[start:end] = sizes
+        self._frames[start:end] = frames
+        self._angles[start:end] = angles
+        self._flips[start:end] = flips
+        return start
+
+    def remove(self, indices):
+        """Removes one or more quads.
+
+        The quads behind the removed ones move up, so that their indices
+        change.
+        """
+        keep = numpy.ones(self._count, dtype=bool)
+        keep[indices] = False
+        count = int(keep.sum())
+        for name in ("_positions", "_sizes", "_frames", "_angles",
+                     "_flips"):
+            array = getattr(self, name)
+            array[:count] = array[:self._count][keep]
+        self._count = count
+
+    def clear(self):
+        """Removes all quads."""
+        self._count = 0
+
+    def move(self, dx, dy):
+        """Moves all quads by the passed (scalar or per-quad) distances."""
+        positions = self.positions
+        positions[:, 0] += dx
+        positions[:, 1] += dy
+
+    def animate(self, frames, ids):
+        """Sets the source rects of all quads from a frame table.
+
+        Args:
+            frames (array-like): (x, y, w, h) source rects, shape (m, 4).
+            ids (array-like): the index into frames for each quad, shape
+                (n,), or a single index for all quads.
+        """
+        self.frames[:] = numpy.asarray(frames, dtype=numpy.int32)[ids]
+
+    def render(self, target, x=0, y=0, camera=None):
+        """Draws the quads that are visible on the target.
+
+        Each visible quad is drawn by its own SDL_RenderCopy (or
+        SDL_RenderCopyEx, if any quad is rotated or flipped) call.
+
+        Args:
+            target (Renderer, sdl2.render.SDL_Renderer): the renderer to
+                draw with.
+            x, y (int): an offset added to all positions.
+            camera (sdl2.ext.sprite.Camera): the view to draw, if any.
+
+        Returns:
+            int: the number of drawn quads, also stored in the drawn
+            attribute.
+
+        Raises:
+            SDLError (if sdl2.render.SDL_RenderCopy fails)
+        """
+        if isinstance(target, Renderer):
+            sdlrenderer = target.sdlrenderer
+            target._flush_batch()
+        elif isinstance(target, render.SDL_Renderer):
+            sdlrenderer = target
+        else:
+            raise TypeError("target must be a Renderer or SDL_Renderer")
+        self.drawn = 0
+        count = self._count
+        if not count:
+            return 0
+        w, h = c_int(), c_int()
+        render.SDL_RenderGetLogicalSize(sdlrenderer, byref(w), byref(h))
+        if w.value == 0 or h.value == 0:
+            if render.SDL_GetRendererOutputSize(sdlrenderer, byref(w),
+                                                byref(h)) != 0:
+                raise SDLError()
+        ox, oy, zoom = -x, -y, 1
+        if camera is not None:
+            ox += camera.x
+            oy += camera.y
+            zoom = camera.zoom
+
+        dst = self._dst[:count]
+        left = self.positions - (ox, oy)
+        if zoom == 1:
+            numpy.floor(left, out=left)
+            dst[:, :2] = left
+            dst[:, 2:] = self.sizes
+        else:
+            right = numpy.floor((left + self.sizes) * zoom)
+            left = numpy.floor(left * zoom)
+            dst[:, :2] = left
+            dst[:, 2:] = right - left
+        visible = numpy.flatnonzero(
+            (dst[:, 0] < w.value) & (dst[:, 1] < h.value) &
+            (dst[:, 0] + dst[:, 2] > 0) & (dst[:, 1] + dst[:, 3] > 0))
+        if not len(visible):
+            return 0
+
+        # addresses of the SDL_Rect structures within the arrays
+        offsets = visible * 16
+        srcs = (offsets + self._frames.ctypes.data).tolist()
+        dsts = (offsets + self._dst.ctypes.data).tolist()
+        if isinstance(sdlrenderer, render.SDL_Renderer):
+            renderer = addressof(sdlrenderer)
+        else:
+            renderer = cast(sdlrenderer, c_void_p).value
+        texture = addressof(self.texture)
+        angles = self._angles[visible]
+        flips = self._flips[visible]
+        if not angles.any() and not flips.any():
+            copy = _render_copy
+            for src, dst in zip(srcs, dsts):
+                if copy(renderer, texture, src, dst) != 0:
+                    raise SDLError()
+        else:
+            copy = _render_copy_ex
+            for src, dst, angle, flip in zip(srcs, dsts, angles.tolist(),
+                                             flips.tolist()):
+                if copy(renderer, texture, src, dst, angle, None, flip) != 0:
+                    raise SDLError()
+        self.drawn = len(visible)
+        return self.drawn
@@ -1,7 +1,15 @@
 """Surface manipulation."""
-from ..surface import SDL_CreateRGBSurfaceFrom
+from ctypes import byref
+from ..stdinc import Uint32
+from ..pixels import SDL_MasksToPixelFormatEnum, SDL_PIXELFORMAT_ARGB8888, \
+    SDL_PIXELFORMAT_UNKNOWN
+from ..surface import SDL_CreateRGBSurfaceFrom, SDL_ConvertSurfaceFormat, \
+    SDL_GetColorKey, SDL_SetSurfaceRLE, SDL_GetSurfaceBlendMode, \
+    SDL_SetSurfaceBlendMode
+from ..blendmode import SDL_BlendMode, SDL_BLENDMODE_NONE
+from .common import SDLError
 
-__all__ = ["subsurface"]
+__all__ = ["subsurface", "optimize_surface", "is_fast_blit"]
 
 def subsurface(surface, area):
     """Creates a surface from a part of another surface.
@@ -17,3 +25,81 @@ def subsurface(surface, area):
                                     surface.pitch, surface_format.Rmask,
                                     surface_format.Gmask, surface_format.Bmask,
                                     surface_format.Amask)[0]
+
+
+def _alpha_format(fmt):
+    """Gets the pixel format with alpha channel closest to fmt."""
+    if fmt.Amask:
+        return fmt.format
+    if fmt.BytesPerPixel == 4:
+        # use the unused byte of the target for the alpha channel, which
+        # SDL blits without converting the color channels
+        rgbmask = fmt.Rmask | fmt.Gmask | fmt.Bmask
+        pformat = SDL_MasksToPixelFormatEnum(32, fmt.Rmask, fmt.Gmask,
+                                             fmt.Bmask,
+                                             ~rgbmask & 0xFFFFFFFF)
+        if pformat != SDL_PIXELFORMAT_UNKNOWN:
+            return pformat
+    return SDL_PIXELFORMAT_ARGB8888
+
+
+def optimize_surface(surface, target, rle=False):
+    """Creates a copy of a surface in the pixel format of another surface.
+
+    Blitting a surface onto one of a different pixel format converts
+    every pixel on the fly. Converting the surfaces of sprites once to
+    the format of the window surface avoids that. Surfaces with an alpha
+    channel keep it, by using the target's format with the alpha channel
+    in its unused byte. Surfaces without one are not alpha blended, even
+    if the target's format has an alpha channel. The color key of the
+    surface is kept.
+
+    Args:
+        surface (SDL_Surface): the surface to convert.
+        target (SDL_Surface): the surface to get the pixel format of, e.g.
+            the one of a window.
+        rle (bool): if True, run-length encoding is enabled for the copy,
+            if it has a color key. This speeds up blitting surfaces with
+            large transparent areas.
+
+    Returns:
+        SDL_Surface: the new surface, which has to be freed by the caller.
+    """
+    sfmt = surface.format.contents
+    tfmt = target.format.contents
+    pformat = _alpha_format(tfmt) if sfmt.Amask else tfmt.format
+    converted = SDL_ConvertSurfaceFormat(surface, pformat, 0)
+    if not converted:
+        raise SDLError()
+    converted = converted.contents
+    if not sfmt.Amask and converted.format.contents.Amask:
+        if SDL_SetSurfaceBlendMode(converted, SDL_BLENDMODE_NONE) != 0:
+            raise SDLError()
+    if rle and SDL_GetColorKey(converted, byref(Uint32())) == 0:
+        if SDL_SetSurfaceRLE(converted, 1) != 0:
+            raise SDLError()
+    return converted
+
+
+def is_fast_blit(surface, target):
+    """Checks, if a surface is blitted onto another without converting
+    or blending its pixels.
+
+    This is the case, if both surfaces use the same bytes per pixel and
+    the same color channels, as :func:`optimize_surface` ensures. The
+    source may have an additional alpha channel, but only if its blend
+    mode is SDL_BLENDMODE_NONE, since every pixel is blended otherwise.
+    """
+    sfmt = surface.format.contents
+    tfmt = target.format.contents
+    if sfmt.Amask:
+        mode = SDL_BlendMode()
+        if SDL_GetSurfaceBlendMode(surface, byref(mode)) != 0:
+            raise SDLError()
+        if mode.value != SDL_BLENDMODE_NONE:
+            return False
+    if sfmt.palette or tfmt.palette:
+        return sfmt.format == tfmt.format
+    return (sfmt.BytesPerPixel == tfmt.BytesPerPixel and
+            sfmt.Rmask == tfmt.Rmask and sfmt.Gmask == tfmt.Gmask and
+            sfmt.Bmask == tfmt.Bmask)
@@ -0,0 +1,223 @@
+"""Tile map rendering routines."""
+from ctypes import byref, c_int
+from math import ceil, floor
+
+from .. import rect, render
+from .common import SDLError
+from .compat import UnsupportedError
+from .sprite import Renderer, SpriteSheet, TextureSprite, _texture_mods
+
+_HASNUMPY = True
+try:
+    import numpy
+except ImportError:
+    _HASNUMPY = False
+
+__all__ = ["TileMap"]
+
+
+def _tile_sheet(tileset, tile_size):
+    """Gets the sprite and the sheet of square tiles of a tileset.
+
+    tileset is a TextureSprite or a SpriteSheet of it, which is used as
+    it is.
+    """
+    if isinstance(tileset, SpriteSheet):
+        sheet, tileset = tileset, tileset.sprite
+    else:
+        sheet = None
+    if not isinstance(tileset, TextureSprite):
+        raise TypeError("tileset must be a TextureSprite or SpriteSheet")
+    if tile_size <= 0:
+        raise ValueError("tile_size must be greater than 0")
+    if sheet is None:
+        sheet = SpriteSheet.grid(tileset, tile_size)
+    return tileset, sheet
+
+
+class TileMap(object):
+    """A grid of tiles drawn from a tileset texture.
+
+    The TileMap stores the tile id of every cell in a 2D NumPy array of
+    shape (rows, cols), optionally along with per-cell color and alpha
+    modulation arrays. The tiles are drawn straight from the tileset
+    texture through a table of source rects, computed once per tile id,
+    so that no Python object is kept or created per cell.
+
+    Tile ids are counted left to right, top to bottom on the tileset, like
+    for :meth:`sdl2.ext.sprite.SpriteFactory.get_char_sprite`, so that
+    ``ord(char)`` can be used as tile id with character tilesets. Cells
+    with an id outside of the tileset, such as -1, are left empty.
+    """
+    def __init__(self, tileset, tile_size, shape=None, tiles=None,
+                 colors=False, alpha=False):
+        """Creates a new TileMap.
+
+        Args:
+            tileset (TextureSprite, SpriteSheet): the sprite containing the
+                tiles, or a sheet of it, whose frames are used as tiles.
+            tile_size (int): the size of a (square) tile's side in pixels.
+            shape (tuple): the (rows, cols) size of the map. Ignored, if
+                tiles is passed.
+            tiles (array-like): the initial 2D tile ids of the map.
+            colors (bool): if True, a (rows, cols, 3) `colors` array holds
+                the color mod of each cell.
+            alpha (bool): if True, a (rows, cols) `alpha` array holds the
+                alpha mod of each cell.
+
+        Attributes:
+            tiles (numpy.ndarray): the int32 tile ids of the cells.
+            sheet (SpriteSheet): the source rects of the tile ids.
+            colors (numpy.ndarray): the uint8 color mods or None.
+            alpha (numpy.ndarray): the uint8 alpha mods or None.
+            x, y (int): the position of the top-left corner of the map.
+            drawn (int): the number of tiles drawn by the last
+                :meth:`render` call.
+
+        Raises:
+            UnsupportedError: if NumPy is not available.
+        """
+        if not _HASNUMPY:
+            raise UnsupportedError(TileMap, "numpy module could not be loaded")
+        tileset, sheet = _tile_sheet(tileset, tile_size)
+        if tiles is None:
+            if shape is None:
+                raise ValueError("either shape or tiles must be passed")
+            tiles = numpy.zeros(shape, dtype=numpy.int32)
+        else:
+            tiles = numpy.array(tiles, dtype=numpy.int32)
+        if tiles.ndim != 2:
+            raise ValueError("tiles must be a 2D array")
+        self.tileset = tileset
+        self.tile_size = tile_size
+        self.tiles = tiles
+        rows, cols = tiles.shape
+        self.colors = None
+        self.alpha = None
+        if colors:
+            self.colors = numpy.full((rows, cols, 3), 255, dtype=numpy.uint8)
+        if alpha:
+            self.alpha = numpy.full((rows, cols), 255, dtype=numpy.uint8)
+        self.x = 0
+        self.y = 0
+        self.drawn = 0
+        self.sheet = sheet
+        self._sources = sheet.rects
+
+    @property
+    def shape(self):
+        """The (rows, cols) size of the map."""
+        return self.tiles.shape
+
+    @property
+    def size(self):
+        """The (w, h) size of the map in pixels."""
+        rows, cols = self.tiles.shape
+        return cols * self.tile_size, rows * self.tile_size
+
+    def visible(self, area):
+        """Gets the cells overlapping an (x, y, w, h) area.
+
+        Returns:
+            tuple: the (row0, row1, col0, col1) cell range, with the
+            end values excluded.
+        """
+        x, y, w, h = area
+        size = self.tile_size
+        rows, cols = self.tiles.shape
+        col0 = min(max(int(floor((x - self.x) / size)), 0), cols)
+        row0 = min(max(int(floor((y - self.y) / size)), 0), rows)
+        col1 = min(max(int(ceil((x + w - self.x) / size)), col0), cols)
+        row1 = min(max(int(ceil((y + h - self.y) / size)), row0), rows)
+        return row0, row1, col0, col1
+
+    def render(self, target, camera=None):
+        """Draws the visible tiles.
+
+        Args:
+            target (Renderer, sdl2.render.SDL_Renderer): the renderer to
+                draw with.
+            camera (sdl2.ext.sprite.Camera): the view to draw, if any.
+                Without camera, the map is drawn at its position on the
+                output.
+
+        Raises:
+            SDLError (if sdl2.render.SDL_RenderCopy fails)
+        """
+        if isinstance(target, Renderer):
+            sdlrenderer = target.sdlrenderer
+            target._flush_batch()
+        elif isinstance(target, render.SDL_Renderer):
+            sdlrenderer = target
+        else:
+            raise TypeError("target must be a Renderer or SDL_Renderer")
+        w, h = c_int(), c_int()
+        render.SDL_RenderGetLogicalSize(sdlrenderer, byref(w), byref(h))
+        if w.value == 0 or h.value == 0:
+            if render.SDL_GetRendererOutputSize(sdlrenderer, byref(w),
+                                                byref(h)) != 0:
+                raise SDLError()
+        if camera is None:
+            ox = oy = 0
+            zoom = 1
+            view = 0, 0, w.value, h.value
+        else:
+            ox, oy = camera.position
+            zoom = camera.zoom
+            view = camera.view((w.value, h.value))
+        row0, row1, col0, col1 = self.visible(view)
+        self.drawn = 0
+        if row0 == row1 or col0 == col1:
+            return
+
+        size = self.tile_size
+        texture = self.tileset.texture
+        sources = self._sources
+        count = len(sources)
+        colors = self.colors
+        alpha = self.alpha
+        # the screen edges of the visible columns and rows
+        xs = [int(floor((self.x + col * size - ox) * zoom))
+              for col in range(col0, col1 + 1)]
+        ys = [int(floor((self.y + row * size - oy) * zoom))
+              for row in range(row0, row1 + 1)]
+        widths = [xs[i + 1] - xs[i] for i in range(len(xs) - 1)]
+        dst = rect.SDL_Rect()
+        rcopy = render.SDL_RenderCopy
+        last_color = last_alpha = None
+        mods = _texture_mods(texture)
+        drawn = 0
+        try:
+            for idx, row in enumerate(self.tiles[row0:row1,
+                                                 col0:col1].tolist()):
+                dst.y = ys[idx]
+                dst.h = ys[idx + 1] - ys[idx]
+                if colors is not None:
+                    crow = colors[row0 + idx, col0:col1].tolist()
+                if alpha is not None:
+                    arow = alpha[row0 + idx, col0:col1].tolist()
+                for col, tid in enumerate(row):
+                    if tid < 0 or tid >= count:
+                        continue
+                    if colors is not None and crow[col] != last_color:
+                        last_color = crow[col]
+                        if render.SDL_SetTextureColorMod(texture,
+                                                         *last_color):
+                            raise SDLError()
+                    if alpha is not None and arow[col] != last_alpha:
+                        last_alpha = arow[col]
+                        if render.SDL_SetTextureAlphaMod(texture,
+                                                         last_alpha):
+                            raise SDLError()
+                    dst.x = xs[col]
+                    dst.w = widths[col]
+                    if rcopy(sdlrenderer, texture, sources[tid], dst) != 0:
+                        raise SDLError()
+                    drawn += 1
+        finally:
+            self.drawn = drawn
+            # leave the tileset as it would be without the map
+            if last_color is not None:
+                render.SDL_SetTextureColorMod(texture, *mods[0])
+            if last_alpha is not None:
+                render.SDL_SetTextureAlphaMod(texture, mods[1])
@@ -2,9 +2,9 @@
 from ctypes import c_int, byref
 from .compat import byteify, stringify
 from .common import SDLError
-from .. import video
+from .. import pixels, surface, video
 
-__all__ = ["Window", "get_display_mode"]
+__all__ = ["Window", "Offscreen", "get_display_mode"]
 
 
 def get_display_mode(index=0):
@@ -129,3 +129,80 @@ class Window(object):
         if not sf:
             raise SDLError()
         return sf.contents
+
+
+class Offscreen(object):
+    """A window-less drawing area, backed by a software surface.
+
+    An Offscreen can be used in place of a Window, where no window can or
+    should be shown, e.g. to render on servers without display or GPU,
+    with the "dummy" video driver. :class:`sdl2.ext.sprite.Renderer`, the
+    sprite render systems and :class:`sdl2.ext.manager.Manager` accept it
+    like a Window; a Renderer created for it draws into its surface with
+    SDL's software renderer.
+
+    The methods for showing and arranging a Window exist, but do nothing.
+    """
+
+    def __init__(self, size, pformat=pixels.SDL_PIXELFORMAT_ARGB8888,
+                 title="Offscreen"):
+        """Create an Offscreen of a specific size.
+
+        The surface uses 32 bit ARGB8888 pixels by default. Any other
+        SDL_PIXELFORMAT_* value can be passed as pformat, its depth is
+        taken from the format.
+
+        Args:
+            size (tuple): the (w, h) size of the drawing area in pixels.
+            pformat (int): the SDL_PIXELFORMAT_* value of the surface.
+            title (str): a title, kept for compatibility with Window.
+
+        Attributes:
+            surface (sdl2.SDL_Surface): the surface holding the pixels.
+        """
+        w, h = size
+        depth = pixels.SDL_BITSPERPIXEL(pformat)
+        sf = surface.SDL_CreateRGBSurfaceWithFormat(0, w, h, depth, pformat)
+        if not sf:
+            raise SDLError()
+        self.surface = sf.contents
+        self.title = title
+
+    def __del__(self):
+        """Releases the surface of the Offscreen."""
+        if getattr(self, "surface", None):
+            surface.SDL_FreeSurface(self.surface)
+            self.surface = None
+
+    @property
+    def size(self):
+        """The size of the drawing area."""
+        return self.surface.w, self.surface.h
+
+    def show(self):
+        """Does nothing."""
+        pass
+
+    def hide(self):
+        """Does nothing."""
+        pass
+
+    def maximize(self):
+        """Does nothing."""
+        pass
+
+    def minimize(self):
+        """Does nothing."""
+        pass
+
+    def refresh(self):
+        """Does nothing, the surface is the final drawing area."""
+        pass
+
+    def get_surface(self):
+        """Get the SDL_Surface holding the pixels of the Offscreen.
+
+        Returns:
+            sdl2.SDL_Surface
+        """
+        return self.surface
@@ -1,9 +1,9 @@
 
 import sys
 import unittest
+from sdl2.ext import algorithms
 
 
-@unittest.skip("not implemented")
 class SDL2ExtAlgorithmsTest(unittest.TestCase):
     __tags__ = ["sdl2ext"]
 
@@ -19,9 +19,35 @@ class SDL2ExtAlgorithmsTest(unittest.TestCase):
     def test_clipline(self):
         pass
 
+    @unittest.skip("not implemented")
     def test_point_on_line(self):
         pass
 
+    def test_pack_rects(self):
+        sizes = [(10, 20), (30, 5), (5, 5), (70, 10), (20, 20), (1, 40)]
+        positions = algorithms.pack_rects(sizes, 64, 64, padding=1)
+        self.assertEqual(len(positions), len(sizes))
+        self.assertIsNone(positions[3])
+        rects = [(x, y, w, h) for (w, h), pos in zip(sizes, positions)
+                 if pos is not None for x, y in (pos,)]
+        self.assertEqual(len(rects), 5)
+        for idx, (x, y, w, h) in enumerate(rects):
+            self.assertTrue(0 <= x and x + w <= 64)
+            self.assertTrue(0 <= y and y + h <= 64)
+            for ox, oy, ow, oh in rects[idx + 1:]:
+                # padding keeps at least one pixel between two rects
+                self.assertFalse(x < ox + ow + 1 and ox < x + w + 1 and
+                                 y < oy + oh + 1 and oy < y + h + 1)
+
+        self.assertEqual(algorithms.pack_rects([(64, 64)], 64, 64),
+                         [(0, 0)])
+        self.assertEqual(algorithms.pack_rects([(65, 1)], 64, 64), [None])
+        self.assertEqual(algorithms.pack_rects([], 64, 64), [])
+        positions = algorithms.pack_rects([(32, 32)] * 5, 64, 64)
+        self.assertEqual(sorted(positions[:4]),
+                         [(0, 0), (0, 32), (32, 0), (32, 32)])
+        self.assertIsNone(positions[4])
+
 
 if __name__ == '__main__':
     sys.exit(unittest.main())
@@ -0,0 +1,119 @@
+import sys
+import unittest
+
+from sdl2.rect import SDL_Rect
+from sdl2.ext.animation import Animation, AnimationClip, AnimationSystem
+from sdl2.ext.sprite import Sprite
+
+
+class MSprite(Sprite):
+
+    def __init__(self, w=0, h=0):
+        super().__init__(None, w, h, True)
+
+
+def frames(count, w=16, h=16):
+    return [(i * w, 0, w, h) for i in range(count)]
+
+
+class SDL2ExtAnimationTest(unittest.TestCase):
+    __tags__ = ["sdl2ext"]
+
+    def test_AnimationClip(self):
+        clip = AnimationClip(frames(3), 50)
+        self.assertEqual(len(clip), 3)
+        self.assertEqual(clip.durations, [50, 50, 50])
+        self.assertEqual(clip.duration, 150)
+        self.assertEqual(clip.starts, [0, 50, 100])
+        self.assertEqual(clip.rects[2], SDL_Rect(32, 0, 16, 16))
+        self.assertEqual(clip.table[1], SDL_Rect(16, 0, 16, 16))
+
+        clip = AnimationClip(frames(4), [10, 20, 30, 40], "pingpong")
+        self.assertEqual(clip.order, [0, 1, 2, 3, 2, 1])
+        self.assertEqual(clip.durations, [10, 20, 30, 40, 30, 20])
+        self.assertEqual(clip.duration, 150)
+
+        table = (SDL_Rect * 2)(SDL_Rect(0, 0, 8, 8), SDL_Rect(8, 0, 8, 8))
+        clip = AnimationClip(table)
+        self.assertIs(clip.table, table)
+
+        self.assertRaises(ValueError, AnimationClip, [])
+        self.assertRaises(ValueError, AnimationClip, frames(2), [10])
+        self.assertRaises(ValueError, AnimationClip, frames(2), 0)
+        self.assertRaises(ValueError, AnimationClip, frames(2), 10, "bounce")
+
+    def test_Animation(self):
+        sprite = MSprite(100, 100)
+        clip = AnimationClip(frames(3), 50)
+        anim = Animation(sprite, clip)
+        self.assertTrue(anim.playing)
+        self.assertEqual(anim.frame, 0)
+        # the sprite shows the first frame and takes its size
+        self.assertIs(sprite.frame_rect, clip.rects[0])
+        self.assertEqual(sprite.size, (16, 16))
+        anim.stop()
+        self.assertFalse(anim.playing)
+        anim.play(restart=False)
+        self.assertTrue(anim.playing)
+        self.assertFalse(Animation(sprite, clip, playing=False).playing)
+
+    def test_AnimationSystem_advance(self):
+        system = AnimationSystem()
+        self.assertEqual(system.componenttypes, (Animation,))
+        self.assertRaises(TypeError, setattr, system, "endfunc", 1)
+        sprite = MSprite()
+        clip = AnimationClip(frames(3), [50, 100, 50])
+        anim = Animation(sprite, clip)
+        slow = Animation(MSprite(), clip, speed=0.5)
+
+        system.advance([anim, slow], 40)
+        self.assertEqual((anim.frame, anim.time), (0, 40))
+        system.advance([anim, slow], 20)
+        self.assertEqual((anim.frame, anim.time), (1, 10))
+        self.assertIs(sprite.frame_rect, clip.rects[1])
+        self.assertEqual((slow.frame, slow.time), (0, 30))
+        # several frames within a single call, wrapping around
+        system.advance([anim, slow], 200)
+        self.assertEqual((anim.frame, anim.time), (1, 10))
+        self.assertEqual((slow.frame, slow.time), (1, 80))
+        anim.stop()
+        system.advance([anim], 100)
+        self.assertEqual((anim.frame, anim.time), (1, 10))
+
+        pingpong = Animation(MSprite(), AnimationClip(frames(3), 10,
+                                                      "pingpong"))
+        seen = []
+        for i in range(6):
+            seen.append(pingpong.frame)
+            system.advance([pingpong], 10)
+        self.assertEqual(seen, [0, 1, 2, 1, 0, 1])
+
+    def test_AnimationSystem_process(self):
+        system = AnimationSystem()
+        ended = []
+        system.endfunc = lambda world, anims: ended.append((world, anims))
+        once = Animation(MSprite(), AnimationClip(frames(3), 10, "once"))
+        looped = Animation(MSprite(), AnimationClip(frames(3), 10))
+        system.dt = 25
+        system.process("world", [once, looped])
+        self.assertEqual(once.frame, 2)
+        self.assertFalse(once.finished)
+        self.assertEqual(ended, [])
+        system.process("world", [once, looped])
+        self.assertEqual(ended, [("world", [once])])
+        self.assertTrue(once.finished)
+        self.assertFalse(once.playing)
+        self.assertEqual(once.frame, 2)
+        self.assertEqual(looped.frame, 2)
+        once.play()
+        self.assertEqual(once.frame, 0)
+        self.assertFalse(once.finished)
+
+        # without a fixed time step, the elapsed ticks are used
+        system.dt = None
+        system.process("world", [looped])
+        self.assertEqual(looped.frame, 2)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -0,0 +1,122 @@
+import sys
+import unittest
+
+from sdl2.ext.broadphase import BroadphaseSystem
+from sdl2.ext.ebs import Entity, World
+from sdl2.ext.rect import Rect
+from sdl2.ext.sprite import Sprite
+
+
+class Box(Rect):
+    pass
+
+
+class BoxEntity(Entity):
+    def __init__(self, world, x, y, w, h):
+        self.box = Box(x, y, w, h)
+
+
+class SDL2ExtBroadphaseTest(unittest.TestCase):
+    __tags__ = ["sdl2ext"]
+
+    def test_BroadphaseSystem(self):
+        system = BroadphaseSystem()
+        self.assertEqual(system.componenttypes, (Sprite,))
+        self.assertEqual(len(system), 0)
+        self.assertEqual(system.pairs, set())
+        self.assertIsNone(system.beginfunc)
+        self.assertIsNone(system.endfunc)
+        self.assertIsNone(system.overlapfunc)
+        for name in ("beginfunc", "endfunc", "overlapfunc"):
+            self.assertRaises(TypeError, setattr, system, name, 1)
+        system = BroadphaseSystem(Box)
+        self.assertEqual(system.componenttypes, (Box,))
+
+    def process(self, world, system):
+        system.process(world, world.components[Box].values())
+
+    def test_BroadphaseSystem_process(self):
+        world = World()
+        world.add_componenttype(Box)
+        system = BroadphaseSystem(Box)
+        events = {"begin": [], "end": [], "overlap": []}
+
+        def callback(name):
+            def func(w, pairs):
+                self.assertIs(w, world)
+                events[name].append(set(pairs))
+            return func
+
+        system.beginfunc = callback("begin")
+        system.endfunc = callback("end")
+        system.overlapfunc = callback("overlap")
+
+        a = BoxEntity(world, 0, 0, 10, 10).box
+        b = BoxEntity(world, 5, 5, 10, 10).box
+        c = BoxEntity(world, 20, 0, 5, 5).box
+        # touching, but not overlapping
+        d = BoxEntity(world, 10, 0, 10, 5).box
+        self.process(world, system)
+        self.assertEqual(len(system), 4)
+        self.assertEqual(len(system.pairs), 1)
+        pair = system.pairs.pop()
+        system.pairs.add(pair)
+        self.assertEqual(set(pair), set((a, b)))
+        self.assertEqual(events["begin"], [set([pair])])
+        self.assertEqual(events["end"], [])
+        self.assertEqual(events["overlap"], [set([pair])])
+
+        # nothing moved
+        self.process(world, system)
+        self.assertEqual(len(events["begin"]), 1)
+        self.assertEqual(events["overlap"][-1], set([pair]))
+
+        # b leaves a and enters c, d moves into a
+        b.topleft = 18, 2
+        d.x = 9
+        self.process(world, system)
+        pairs = set(frozenset(p) for p in system.pairs)
+        self.assertEqual(pairs, set([frozenset((b, c)), frozenset((b, d)),
+                                     frozenset((a, d))]))
+        self.assertEqual(events["end"], [set([pair])])
+        self.assertEqual(set(frozenset(p) for p in events["begin"][-1]),
+                         pairs)
+
+        # moved past each other within a single step
+        c.x = -20
+        self.process(world, system)
+        self.assertNotIn(c, set(p[0] for p in system.pairs) |
+                         set(p[1] for p in system.pairs))
+
+        # deleted entities end their pairs
+        world.delete(world.get_entities(d)[0])
+        self.process(world, system)
+        self.assertEqual(len(system), 3)
+        self.assertEqual(system.pairs, set())
+        self.assertEqual(set(frozenset(p) for p in events["end"][-1]),
+                         set([frozenset((b, d)), frozenset((a, d))]))
+
+        system.clear()
+        self.assertEqual(len(system), 0)
+        self.process(world, system)
+        self.assertEqual(len(system), 3)
+
+    def test_BroadphaseSystem_many(self):
+        system = BroadphaseSystem(Rect)
+        boxes = [Rect((i * 37) % 200, (i * 91) % 200, 3 + i % 20, i % 7)
+                 for i in range(150)]
+        for step in range(5):
+            for i, box in enumerate(boxes):
+                box.x += (i * step) % 9 - 4
+                box.y -= (i + step) % 5 - 2
+            system.process(None, boxes)
+            expected = set(frozenset((a, b)) for i, a in enumerate(boxes)
+                           for b in boxes[i + 1:] if a.colliderect(b))
+            self.assertEqual(set(frozenset(p) for p in system.pairs),
+                             expected)
+            for first, second in system.pairs:
+                self.assertLess(boxes.index(first), boxes.index(second))
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
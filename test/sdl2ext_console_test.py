@@ -0,0 +1,90 @@
+import sys
+import unittest
+
+from sdl2 import ext as sdl2ext
+from sdl2.rect import SDL_Rect
+from sdl2.surface import SDL_CreateRGBSurface, SDL_FillRect
+
+try:
+    import numpy
+    _HASNUMPY = True
+except ImportError:
+    _HASNUMPY = False
+
+
+@unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+class SDL2ExtConsoleTest(unittest.TestCase):
+    __tags__ = ["sdl", "sdl2ext"]
+
+    def setUp(self):
+        sdl2ext.init()
+        self.target = SDL_CreateRGBSurface(0, 32, 16, 32, 0, 0, 0,
+                                           0).contents
+        self.renderer = sdl2ext.Renderer(self.target)
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE,
+                                        renderer=self.renderer)
+        # a 16x16 tileset of 8x8 tiles, where only "#" (35) has a
+        # (fully white) glyph
+        tiles = SDL_CreateRGBSurface(0, 128, 128, 32, 0xFF000000, 0xFF0000,
+                                     0xFF00, 0xFF).contents
+        SDL_FillRect(tiles, SDL_Rect(3 * 8, 2 * 8, 8, 8), 0xFFFFFFFF)
+        self.tileset = factory.from_surface(tiles, True)
+        sdl2ext.sprite.render.SDL_SetTextureBlendMode(
+            self.tileset.texture, sdl2ext.sprite.blendmode.SDL_BLENDMODE_BLEND)
+
+    def tearDown(self):
+        sdl2ext.quit()
+
+    def pixel(self, x, y):
+        view = sdl2ext.PixelView(self.target)
+        value = view[y][x] & 0xFFFFFF
+        del view
+        return value
+
+    def test_Console(self):
+        self.assertRaises(TypeError, sdl2ext.Console, None, self.tileset, 8,
+                          4, 2)
+        self.assertRaises(ValueError, sdl2ext.Console, self.renderer,
+                          self.tileset, 8, 0, 2)
+        console = sdl2ext.Console(self.renderer, self.tileset, 8, 4, 2)
+        self.assertEqual(console.shape, (2, 4))
+        self.assertEqual(console.sprite.size, (32, 16))
+        self.assertTrue((console.glyphs == ord(" ")).all())
+        console.put(1, 0, "#", fg=(255, 0, 0))
+        self.assertEqual(console.glyphs[0, 1], 35)
+        self.assertEqual(console.fg[0, 1], 0xFF0000FF)
+        console.write(2, 1, "####", bg=(0, 0, 255))
+        self.assertEqual(console.glyphs[1].tolist(), [32, 32, 35, 35])
+        self.assertEqual(console.bg[1].tolist(),
+                         [0xFF, 0xFF, 0xFFFF, 0xFFFF])
+        console.clear()
+        self.assertTrue((console.glyphs == ord(" ")).all())
+        self.assertTrue((console.bg == 0xFF).all())
+
+    def test_Console_present(self):
+        console = sdl2ext.Console(self.renderer, self.tileset, 8, 4, 2,
+                                  bg=(0, 0, 255))
+        self.assertEqual(console.present(), 8)
+        self.assertEqual(self.pixel(0, 0), 0x0000FF)
+        self.assertEqual(self.pixel(31, 15), 0x0000FF)
+        self.assertEqual(console.present(), 0)
+
+        console.put(1, 0, "#", fg=(255, 0, 0))
+        console.put(3, 1, " ", bg=(0, 255, 0))
+        self.assertEqual(console.present(), 2)
+        self.assertEqual(self.pixel(8, 0), 0xFF0000)
+        self.assertEqual(self.pixel(24, 8), 0x00FF00)
+        self.assertEqual(self.pixel(0, 0), 0x0000FF)
+        self.assertEqual(sdl2ext.sprite._texture_mods(self.tileset.texture),
+                         ((255, 255, 255), 255))
+
+        # unchanged cells are not redrawn
+        console.put(1, 0, "#", fg=(255, 0, 0))
+        self.assertEqual(console.present(), 0)
+        console.invalidate()
+        self.assertEqual(console.present(), 8)
+        self.assertEqual(self.pixel(8, 0), 0xFF0000)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -206,6 +206,27 @@ class SDL2ExtEBSTest(unittest.TestCase):
         # The next should have no effect
         w.delete_entities((e1, e2))
 
+    def test_World_revision(self):
+        w = World()
+        self.assertEqual(w.revision, 0)
+        e1 = PositionEntity(w, 1, 1)
+        revision = w.revision
+        self.assertGreater(revision, 0)
+        # changing a component's data is not a change of the components
+        e1.position.x = 5
+        self.assertEqual(w.revision, revision)
+        e2 = MovingEntity(w)
+        self.assertGreater(w.revision, revision)
+        revision = w.revision
+        del e2.movement
+        self.assertGreater(w.revision, revision)
+        revision = w.revision
+        w.delete(e1)
+        self.assertGreater(w.revision, revision)
+        revision = w.revision
+        w.delete_entities((e2,))
+        self.assertGreater(w.revision, revision)
+
     def test_World_get_entities(self):
         w = World()
         e1 = PositionEntity(w, 1, 1)
@@ -0,0 +1,149 @@
+from ctypes import addressof
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+from sdl2 import ext as sdl2ext
+from sdl2.surface import SDL_CreateRGBSurface
+
+RESOURCES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "resources")
+
+
+class SDL2ExtLoaderTest(unittest.TestCase):
+    __tags__ = ["sdl", "sdl2ext"]
+
+    def setUp(self):
+        sdl2ext.init()
+        target = SDL_CreateRGBSurface(0, 8, 8, 32, 0, 0, 0, 0).contents
+        self.renderer = sdl2ext.Renderer(target)
+        self.factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE,
+                                             renderer=self.renderer)
+        self.imgname = os.path.join(RESOURCES, "surfacetest.bmp")
+        # copies of the image, loaded as distinct files
+        self.tmpdir = tempfile.mkdtemp()
+        self.imgnames = []
+        for i in range(5):
+            fname = os.path.join(self.tmpdir, "image%d.bmp" % i)
+            shutil.copy(self.imgname, fname)
+            self.imgnames.append(fname)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        sdl2ext.quit()
+
+    def wait(self, loader, count):
+        # waits until count files are decoded, without resolving them
+        deadline = time.time() + 10
+        while loader._decoded.qsize() < count:
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.01)
+
+    def test_AsyncImageLoader(self):
+        self.assertRaises(ValueError, sdl2ext.AsyncImageLoader,
+                          self.factory, max_uploads=0)
+        self.assertRaises(ValueError, sdl2ext.AsyncImageLoader,
+                          self.factory, max_bytes=0)
+        with sdl2ext.AsyncImageLoader(self.factory, 1, max_uploads=1) \
+                as loader:
+            resolved = []
+            futures = [loader.load(self.imgnames[i]) for i in range(3)]
+            futures[0].add_done_callback(resolved.append)
+            self.assertEqual(loader.pending, 3)
+            self.wait(loader, 3)
+            self.assertFalse(any(f.done() for f in futures))
+            self.assertEqual(resolved, [])
+            # a single sprite per call
+            self.assertEqual(loader.process(), 1)
+            self.assertEqual(loader.pending, 2)
+            self.assertEqual(resolved, [futures[0]])
+            sprite = futures[0].result()
+            self.assertIsInstance(sprite, sdl2ext.TextureSprite)
+            self.assertEqual(sprite.size, (32, 32))
+            self.assertEqual(loader.process(), 1)
+            self.assertEqual(loader.process(), 1)
+            self.assertEqual(loader.process(), 0)
+            self.assertEqual(loader.pending, 0)
+            self.assertTrue(all(f.done() for f in futures))
+
+            failed = loader.load(os.path.join(RESOURCES, "missing.bmp"))
+            cancelled = loader.load(self.imgname)
+            self.assertTrue(cancelled.cancel())
+            loader.flush(10)
+            self.assertEqual(loader.pending, 0)
+            self.assertIsNotNone(failed.exception())
+            self.assertTrue(cancelled.cancelled())
+
+    def test_AsyncImageLoader_max_bytes(self):
+        loader = sdl2ext.AsyncImageLoader(self.factory, max_uploads=None,
+                                          max_bytes=32 * 32 * 4 * 2)
+        futures = [loader.load(fname) for fname in self.imgnames]
+        self.wait(loader, 5)
+        self.assertEqual(loader.process(), 2)
+        self.assertEqual(loader.process(), 2)
+        self.assertEqual(loader.process(), 1)
+        self.assertTrue(all(f.done() for f in futures))
+        # a surface exceeding the budget is processed on its own
+        loader.max_bytes = 100
+        future = loader.load(self.imgname)
+        self.wait(loader, 1)
+        self.assertEqual(loader.process(), 1)
+        self.assertTrue(future.done())
+        loader.close()
+
+    def test_AsyncImageLoader_in_flight(self):
+        loader = sdl2ext.AsyncImageLoader(self.factory)
+        future = loader.load(self.imgname)
+        self.assertIs(loader.load(self.imgname), future)
+        self.assertIsNot(loader.load(self.imgname, "SDL"), future)
+        self.assertEqual(loader.pending, 2)
+        loader.flush(10)
+        self.assertIsNot(loader.load(self.imgname), future)
+        loader.flush(10)
+        self.assertEqual(loader.pending, 0)
+        loader.close()
+
+    def test_AsyncImageLoader_close(self):
+        loader = sdl2ext.AsyncImageLoader(self.factory, max_workers=1)
+        decoded = []
+        original = loader._decode
+
+        def decode(future, key, fname, enforce):
+            if not future.cancelled():
+                decoded.append(fname)
+                time.sleep(0.05)
+            original(future, key, fname, enforce)
+        loader._decode = decode
+        futures = [loader.load(fname) for fname in self.imgnames]
+        loader.close()
+        # only the file being decoded is waited for
+        self.assertLessEqual(len(decoded), 1)
+        self.assertTrue(all(f.cancelled() for f in futures))
+        self.assertEqual(loader.pending, 0)
+
+    def test_AsyncImageLoader_texture_cache(self):
+        self.factory.texture_cache = cache = sdl2ext.TextureCache()
+        loader = sdl2ext.AsyncImageLoader(self.factory)
+        future = loader.load(self.imgname)
+        self.assertIs(loader.load(self.imgname), future)
+        # cached while being decoded, the cached texture is used
+        direct = self.factory.from_image(self.imgname)
+        loader.flush(10)
+        self.assertEqual(addressof(future.result().texture),
+                         addressof(direct.texture))
+        self.assertEqual((cache.misses, cache.hits), (1, 1))
+        # cached files resolve right away
+        again = loader.load(self.imgname)
+        self.assertTrue(again.done())
+        self.assertEqual(loader.pending, 0)
+        key = self.factory._texture_key("file",
+                                        os.path.realpath(self.imgname))
+        self.assertEqual(cache.references(key), 3)
+        loader.close()
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -0,0 +1,79 @@
+import gc
+import sys
+import unittest
+
+from sdl2 import ext as sdl2ext
+from sdl2.ext import manager
+from sdl2.util import sdl2_path
+
+try:
+    import numpy
+    _HASNUMPY = True
+except ImportError:
+    _HASNUMPY = False
+
+
+class _FillScene(manager.SceneBase):
+    ignore_regular_update = False
+
+    def __init__(self, **kwargs):
+        self.updates = 0
+
+    def on_update(self):
+        self.updates += 1
+        self.renderer.fill((0, 0, 8, 8), sdl2ext.Color(255, 0, 0))
+
+
+class SDL2ExtManagerTest(unittest.TestCase):
+    __tags__ = ["sdl", "sdl2ext"]
+
+    def setUp(self):
+        sdl2ext.init()
+        self.manager = manager.Manager(
+            width=64, height=48, tile_size=8, limit_fps=1000,
+            resources_path=sdl2_path("resources"), headless=True)
+
+    def tearDown(self):
+        del self.manager
+        gc.collect()
+        sdl2ext.quit()
+
+    def test_Manager_headless(self):
+        mgr = self.manager
+        self.assertTrue(mgr.headless)
+        self.assertIsInstance(mgr.window, sdl2ext.Offscreen)
+        self.assertEqual(mgr.window.size, (64, 48))
+        self.assertEqual((mgr.cols, mgr.rows), (8, 6))
+
+        mgr.set_scene(_FillScene)
+        view = sdl2ext.PixelView(mgr.window.get_surface())
+        mgr.run(frames=2)
+        self.assertEqual(mgr.scene.updates, 2)
+        self.assertEqual(view[4][4] & 0xFFFFFF, 0xFF0000)
+        self.assertEqual(view[20][20] & 0xFFFFFF, 0x0)
+        del view
+
+    @unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+    def test_Manager_create_console(self):
+        mgr = self.manager
+        console = mgr.create_console(bg=(0, 0, 255))
+        self.assertIsInstance(console, sdl2ext.Console)
+        self.assertEqual(console.shape, (mgr.rows, mgr.cols))
+        self.assertEqual(console.sprite.size, (64, 48))
+        self.assertEqual(console.present(), 48)
+        console.put(0, 0, "#", fg=(255, 0, 0))
+        self.assertEqual(console.present(), 1)
+
+        view = sdl2ext.PixelView(mgr.window.get_surface())
+        first = [view[y][x] & 0xFFFFFF for y in range(8) for x in range(8)]
+        second = [view[y][x] & 0xFFFFFF for y in range(8)
+                  for x in range(8, 16)]
+        del view
+        # the glyph is drawn in red on the blue background of its cell
+        self.assertTrue(any(value & 0xFF0000 for value in first))
+        self.assertTrue(all(value & 0x00FF00 == 0 for value in first))
+        self.assertEqual(set(second), {0x0000FF})
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
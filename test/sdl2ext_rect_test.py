@@ -0,0 +1,233 @@
+import sys
+import unittest
+import weakref
+
+from sdl2.rect import SDL_Rect
+from sdl2.ext.rect import CompactRect, NonIterableRect, QuadTree, Rect, \
+    RectArray, UniformGrid, to_sdl_rect
+from sdl2.ext.sprite import Sprite
+
+try:
+    import numpy
+    _HASNUMPY = True
+except ImportError:
+    _HASNUMPY = False
+
+
+class MSprite(Sprite):
+
+    def __init__(self, x, y, w, h):
+        super().__init__(None, w, h, True)
+        self.position = x, y
+
+
+class SDL2ExtRectTest(unittest.TestCase):
+    __tags__ = ["sdl2ext"]
+
+    def test_Rect(self):
+        r = Rect(1, 2, 10, 20)
+        self.assertEqual(tuple(r), (1, 2, 10, 20))
+        self.assertEqual(r.center, (6, 12))
+        r.topleft = 5, 5
+        self.assertEqual(r.bottomright, (15, 25))
+        # plain rects keep accepting further attributes
+        r.name = "rect"
+        self.assertEqual(r.name, "rect")
+        self.assertIsNotNone(weakref.ref(r)())
+        # NonIterableRect objects only keep their coordinates
+        plain = NonIterableRect(1, 2, 10, 20)
+        self.assertRaises(AttributeError, setattr, plain, "name", "rect")
+        self.assertRaises(TypeError, weakref.ref, plain)
+
+    def test_CompactRect(self):
+        r = CompactRect(1, 2, 10, 20)
+        self.assertFalse(hasattr(r, "__dict__"))
+        self.assertRaises(AttributeError, setattr, r, "name", "rect")
+        self.assertEqual(tuple(r), (1, 2, 10, 20))
+        self.assertEqual(tuple(CompactRect((1, 2), (10, 20))), tuple(r))
+        self.assertEqual(r.center, (6, 12))
+        r.center = 10, 10
+        self.assertEqual(r.topleft, (5, 0))
+        self.assertEqual(r[3], 20)
+
+        moved = r.move(1, 1)
+        self.assertIsInstance(moved, CompactRect)
+        self.assertEqual(moved.topleft, (6, 1))
+        self.assertEqual(r.topleft, (5, 0))
+        self.assertIsInstance(r.clamp((0, 0, 100, 100)), CompactRect)
+        self.assertIsInstance(r.union(Rect(0, 0, 1, 1)), CompactRect)
+
+        self.assertTrue(r.colliderect(Rect(0, 0, 6, 6)))
+        self.assertTrue(Rect(0, 0, 6, 6).colliderect(r))
+        self.assertFalse(r.colliderect(CompactRect(15, 0, 5, 5)))
+        self.assertEqual(r.collidelistall([Rect(0, 0, 6, 6), (50, 50, 1, 1),
+                                           CompactRect(14, 19, 2, 2)]),
+                         [0, 2])
+        self.assertEqual(tuple(r.clip(CompactRect(0, 0, 8, 8))),
+                         (5, 0, 3, 8))
+        self.assertTrue(Rect(0, 0, 50, 50).contains(r))
+        sdlrect = to_sdl_rect(r)
+        self.assertEqual((sdlrect.x, sdlrect.y, sdlrect.w, sdlrect.h),
+                         (5, 0, 10, 20))
+
+    @unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+    def test_RectArray(self):
+        rects = [Rect(0, 0, 10, 10), CompactRect(5, 5, 10, 10),
+                 Rect(20, 0, 5, 5)]
+        array = RectArray(rects)
+        self.assertEqual(len(array), 3)
+        self.assertEqual(array.array.dtype, numpy.int32)
+        self.assertEqual(array.array.tolist(), [list(r) for r in rects])
+        self.assertEqual([tuple(r) for r in array.to_rects()],
+                         [tuple(r) for r in rects])
+        self.assertIsInstance(array.to_rects(CompactRect)[0], CompactRect)
+        self.assertEqual(tuple(array[1]), (5, 5, 10, 10))
+        self.assertEqual(len(array[1:]), 2)
+        self.assertEqual(array.right.tolist(), [10, 15, 25])
+        self.assertEqual(RectArray((1, 2, 3, 4)).array.tolist(),
+                         [[1, 2, 3, 4]])
+        self.assertEqual(len(RectArray()), 0)
+
+        sdlrects = array.to_sdl_rects()
+        self.assertEqual(len(sdlrects), 3)
+        self.assertEqual(sdlrects[2], SDL_Rect(20, 0, 5, 5))
+        array[2] = (1, 1, 1, 1)
+        self.assertEqual(sdlrects[2], SDL_Rect(1, 1, 1, 1))
+        copied = RectArray(sdlrects)
+        self.assertEqual(copied.array.tolist(), array.array.tolist())
+        copied.x[0] = 100
+        self.assertEqual(sdlrects[0].x, 0)
+
+        moved = array.move(1, [0, 1, 2])
+        self.assertEqual(moved.array[:, :2].tolist(), [[1, 0], [6, 6],
+                                                       [2, 3]])
+        self.assertEqual(array.x.tolist(), [0, 5, 1])
+
+    @unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+    def test_RectArray_collisions(self):
+        rects = [Rect(0, 0, 10, 10), Rect(5, 5, 10, 10), Rect(20, 0, 5, 5),
+                 Rect(10, 0, 10, 5), Rect(8, 8, 0, 0)]
+        array = RectArray(rects)
+        for x, y in ((0, 0), (9, 9), (10, 5), (22, 4), (8, 8)):
+            self.assertEqual(array.collidepoint(x, y).tolist(),
+                             [r.collidepoint(x, y) for r in rects])
+        for other in ((9, 9, 2, 2), Rect(10, 0, 10, 10), (0, 0, 1, 1)):
+            self.assertEqual(array.colliderect(other).tolist(),
+                             [r.colliderect(other) for r in rects])
+            self.assertEqual(array.contains(other).tolist(),
+                             [r.contains(other) for r in rects])
+
+        expected = [[i, j] for i in range(len(rects))
+                    for j in range(i + 1, len(rects))
+                    if rects[i].colliderect(rects[j])]
+        self.assertEqual(array.collide_all_pairs().tolist(), expected)
+        others = [Rect(14, 4, 2, 2), Rect(100, 100, 5, 5), Rect(0, 0, 1, 1)]
+        expected = [[i, j] for i in range(len(rects))
+                    for j in range(len(others))
+                    if rects[i].colliderect(others[j])]
+        self.assertEqual(
+            array.collide_all_pairs(RectArray(others)).tolist(), expected)
+        self.assertEqual(RectArray().collide_all_pairs().shape, (0, 2))
+
+    @unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+    def test_RectArray_geometry(self):
+        rects = [Rect(0, 0, 10, 10), Rect(5, 5, 10, 10), Rect(20, 0, 5, 5),
+                 Rect(-5, 2, 40, 3), Rect(30, 30, 3, 3)]
+        array = RectArray(rects)
+        area = Rect(2, 1, 20, 12)
+        for name in ("clip", "union", "clamp"):
+            result = getattr(array, name)(area)
+            self.assertIsInstance(result, RectArray)
+            self.assertEqual([tuple(r) for r in result.to_rects()],
+                             [tuple(getattr(r, name)(area)) for r in rects])
+        # row-wise operations with another RectArray
+        others = RectArray([area] * len(rects))
+        self.assertEqual(array.clip(others).array.tolist(),
+                         array.clip(area).array.tolist())
+        self.assertEqual(tuple(array.unionall()),
+                         tuple(rects[0].unionall(rects[1:])))
+        self.assertIsNone(RectArray().unionall())
+
+    def check_index(self, index):
+        rects = [Rect(0, 0, 10, 10), Rect(5, 5, 10, 10), Rect(20, 0, 5, 5),
+                 Rect(-50, -50, 200, 10), Rect(900, 900, 50, 50),
+                 Rect(3, 3, 0, 0)]
+        sprite = MSprite(8, 8, 4, 4)
+        index.insert_many(rects)
+        index.insert(sprite)
+        index.insert("area", (100, 100, 20, 20))
+        self.assertEqual(len(index), 8)
+        self.assertIn(sprite, index)
+        self.assertRaises(KeyError, index.insert, sprite)
+
+        def found(result):
+            return set(id(item) for item in result if item != "area")
+
+        def check():
+            items = list(rects) + [sprite]
+            for area in ((0, 0, 12, 12), Rect(-10, -60, 30, 15),
+                         (10, 0, 10, 10), (0, 0, 1000, 1000)):
+                self.assertEqual(
+                    found(index.query_rect(area)),
+                    set(id(r) for r in items if r.colliderect(area)))
+            for x, y in ((0, 0), (9, 9), (10, 10), (-50, -41), (925, 949)):
+                self.assertEqual(
+                    found(index.query_point(x, y)),
+                    set(id(r) for r in items if r.collidepoint(x, y)))
+            pairs = set(frozenset(map(id, pair))
+                        for pair in index.query_pairs()
+                        if "area" not in pair)
+            self.assertEqual(pairs, set(
+                frozenset((id(a), id(b))) for i, a in enumerate(items)
+                for b in items[i + 1:] if a.colliderect(b)))
+
+        check()
+        self.assertEqual(index.query_point(105, 105), ["area"])
+        rects[2].x = 7
+        rects[4].topleft = (4, 4)
+        index.move(rects[2])
+        index.move(rects[4])
+        sprite.x = 30
+        index.move(sprite)
+        index.move("area", (0, 0, 1, 1))
+        self.assertIn("area", index.query_point(0, 0))
+        index.remove("area")
+        check()
+        index.remove(rects[0])
+        del rects[0]
+        check()
+        self.assertRaises(KeyError, index.remove, rects[0].copy())
+        index.clear()
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.query_rect((0, 0, 1000, 1000)), [])
+        self.assertEqual(index.query_pairs(), [])
+
+    def test_UniformGrid(self):
+        self.assertRaises(ValueError, UniformGrid, 0)
+        grid = UniformGrid(16)
+        self.assertEqual(grid.cell_size, 16)
+        self.check_index(grid)
+
+    def test_QuadTree(self):
+        self.assertRaises(ValueError, QuadTree, (0, 0, 0, 10))
+        self.assertRaises(ValueError, QuadTree, (0, 0, 10, 10), 0)
+        tree = QuadTree((0, 0, 128, 128), max_items=1)
+        self.assertEqual(tree.area, (0, 0, 128, 128))
+        self.check_index(tree)
+
+    @unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+    def test_spatial_index_RectArray(self):
+        array = RectArray([(0, 0, 10, 10), (5, 5, 10, 10), (20, 0, 5, 5),
+                           (22, 2, 1, 1)])
+        for index in (UniformGrid(8), QuadTree((0, 0, 32, 32), 1)):
+            index.insert_many(array)
+            self.assertEqual(sorted(index.query_point(6, 6)), [0, 1])
+            self.assertEqual(sorted(sorted(p) for p in index.query_pairs()),
+                             array.collide_all_pairs().tolist())
+            array.x[3] = 0
+            index.move(3, array[3])
+            self.assertEqual(sorted(index.query_rect((0, 0, 1, 3))), [0, 3])
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
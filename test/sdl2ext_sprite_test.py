@@ -1,19 +1,35 @@
 
 from builtins import *
 
-from ctypes import ArgumentError, POINTER, byref
+from ctypes import ArgumentError, POINTER, byref, addressof
+import array
+import os
+from collections import OrderedDict
 import sys
 import unittest
 
 from sdl2.ext.resources import Resources
 from sdl2 import ext as sdl2ext
 from sdl2.surface import (SDL_Surface, SDL_CreateRGBSurface,
-                          SDL_FreeSurface)
+                          SDL_FreeSurface, SDL_BlitSurface, SDL_SetColorKey,
+                          SDL_GetColorKey, SDL_RLEACCEL,
+                          SDL_SetSurfaceBlendMode)
 from sdl2.video import SDL_Window, SDL_WINDOW_HIDDEN, SDL_DestroyWindow
 from sdl2.render import (
     SDL_Renderer, SDL_CreateWindowAndRenderer, SDL_DestroyRenderer,
     SDL_CreateTexture, SDL_Texture, SDL_TEXTUREACCESS_STATIC,
-    SDL_TEXTUREACCESS_STREAMING, SDL_TEXTUREACCESS_TARGET)
+    SDL_TEXTUREACCESS_STREAMING, SDL_TEXTUREACCESS_TARGET,
+    SDL_RenderSetViewport, SDL_RenderSetClipRect, SDL_SetRenderTarget)
+from sdl2.blendmode import SDL_BLENDMODE_BLEND, SDL_BLENDMODE_NONE
+from sdl2.rect import SDL_Rect
+from sdl2.stdinc import Uint32
+from sdl2.pixels import SDL_PIXELFORMAT_RGB24, SDL_PIXELFORMAT_RGB888
+
+try:
+    import numpy
+    _HASNUMPY = True
+except ImportError:
+    _HASNUMPY = False
 
 _ISPYPY = hasattr(sys, "pypy_version_info")
 
@@ -202,6 +218,90 @@ class SDL2ExtSpriteTest(unittest.TestCase):
                                   factory.from_image, 12345)
         dogc()
 
+    @unittest.skipIf(_ISPYPY, "PyPy's ctypes can't do byref(value, offset)")
+    def test_SpriteFactory_create_atlas(self):
+        target = SDL_CreateRGBSurface(0, 64, 64, 32, 0, 0, 0, 0).contents
+        sdl2ext.fill(target, 0x0)
+        renderer = sdl2ext.Renderer(target)
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
+        sfactory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        colors = {"red": 0xFF0000, "green": 0x00FF00, "blue": 0x0000FF}
+        sources = {}
+        for name, color in colors.items():
+            sources[name] = sfactory.create_software_sprite((10, 10))
+            sdl2ext.fill(sources[name], color)
+
+        atlas = factory.create_atlas(sources, size=(32, 32))
+        self.assertEqual(sorted(atlas.keys()), sorted(colors.keys()))
+        textures = set()
+        for name, sprite in atlas.items():
+            self.assertIsInstance(sprite, sdl2ext.TextureSprite)
+            self.assertEqual(sprite.size, (10, 10))
+            textures.add(addressof(sprite.texture))
+        self.assertEqual(len(textures), 1)
+
+        for idx, name in enumerate(("red", "green", "blue")):
+            area = atlas[name].frame_rect
+            renderer.copy(atlas[name], (area.x, area.y, area.w, area.h),
+                          (idx * 20, 0, 10, 10))
+        view = sdl2ext.PixelView(target)
+        self.assertEqual(view[5][5] & 0xFFFFFF, 0xFF0000)
+        self.assertEqual(view[5][25] & 0xFFFFFF, 0x00FF00)
+        self.assertEqual(view[5][45] & 0xFFFFFF, 0x0000FF)
+        self.assertEqual(view[5][15] & 0xFFFFFF, 0x0)
+        del view
+
+        # two pages are needed when the images do not fit in one
+        sprites = factory.create_atlas(list(sources.values()) * 2,
+                                       size=(16, 16))
+        self.assertEqual(len(sprites), 6)
+        self.assertEqual(len(set(addressof(sp.texture) for sp in sprites)), 6)
+        sprites = factory.create_atlas(list(sources.values()) * 2,
+                                       size=(21, 21))
+        self.assertEqual(len(set(addressof(sp.texture) for sp in sprites)), 2)
+        self.assertRaises(ValueError, factory.create_atlas,
+                          list(sources.values()), size=(8, 8))
+
+    def test_SpriteFactory_get_char_sprite(self):
+        target = SDL_CreateRGBSurface(0, 32, 32, 32, 0, 0, 0, 0).contents
+        renderer = sdl2ext.Renderer(target)
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
+        tileset = factory.from_color(0xFFFFFF, (64, 64))
+        factory.load_tileset(tileset, 8)
+
+        at = factory.get_char_sprite("@")
+        self.assertIsInstance(at, sdl2ext.TextureSprite)
+        self.assertEqual(at.size, (8, 8))
+        self.assertEqual(at.frame_rect, SDL_Rect(0, 64 // 8 * 8, 8, 8))
+        at2 = factory.get_char_sprite("@")
+        self.assertIsNot(at, at2)
+        self.assertIs(at.frame_rect, at2.frame_rect)
+        at.position = 10, 10
+        self.assertEqual(at2.position, (0, 0))
+
+        shared = factory.get_char_sprite("@", shared=True)
+        self.assertIs(factory.get_char_sprite("@", shared=True), shared)
+        # copies start at (0, 0), wherever the cached glyph was moved to
+        shared.position = 20, 20
+        self.assertEqual(factory.get_char_sprite("@").position, (0, 0))
+        self.assertEqual(shared.position, (20, 20))
+        red = factory.get_char_sprite("@", shared=True, color_mod=[255, 0, 0])
+        self.assertIsNot(red, shared)
+        self.assertEqual(red.color_mod, [255, 0, 0])
+        self.assertIs(factory.get_char_sprite("@", shared=True,
+                                              color_mod=(255, 0, 0)), red)
+        self.assertIs(factory.get_char_sprite(
+            "@", shared=True, color_mod=sdl2ext.Color(255, 0, 0)), red)
+        # uncached kwargs
+        self.assertIsNot(factory.get_char_sprite("@", shared=True, angle=9),
+                         shared)
+
+        factory.glyph_cache_size = 2
+        factory.get_char_sprite("a")
+        self.assertIsNot(factory.get_char_sprite("@", shared=True), shared)
+        factory.load_tileset(tileset, 16)
+        self.assertEqual(factory.get_char_sprite("@").size, (16, 16))
+
     @unittest.skip("not implemented")
     def test_SpriteFactory_from_object(self):
         window = sdl2ext.Window("Test", size=(1, 1))
@@ -209,6 +309,99 @@ class SDL2ExtSpriteTest(unittest.TestCase):
         tfactory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
         sfactory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
 
+    def test_TextureCache(self):
+        target = SDL_CreateRGBSurface(0, 8, 8, 32, 0, 0, 0, 0).contents
+        renderer = sdl2ext.Renderer(target)
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
+        self.assertIsNone(factory.texture_cache)
+        self.assertRaises(ValueError, sdl2ext.TextureCache, -1)
+        cache = factory.texture_cache = sdl2ext.TextureCache(32 * 32 * 4)
+
+        imgname = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               "resources", "surfacetest.bmp")
+        sprite = factory.from_image(imgname)
+        same = factory.from_image(imgname)
+        self.assertIsNot(sprite, same)
+        self.assertEqual(addressof(sprite.texture), addressof(same.texture))
+        self.assertFalse(sprite.free)
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (1, 1, 1))
+        key = factory._texture_key("file", os.path.realpath(imgname))
+        self.assertIn(key, cache)
+        self.assertEqual(cache.references(key), 2)
+        self.assertEqual(cache.bytes, sprite.w * sprite.h * 4)
+        # subsprites and copies keep the texture referenced
+        sub = sprite.subsprite((0, 0, 2, 2)).subsprite((0, 0, 1, 1))
+        del sprite, same
+        dogc()
+        self.assertEqual(cache.references(key), 1)
+        del sub
+        dogc()
+        self.assertEqual(cache.references(key), 0)
+        self.assertIn(key, cache)
+        cache.purge()
+        self.assertNotIn(key, cache)
+        self.assertEqual(cache.bytes, 0)
+
+        # surfaces are keyed by their content
+        cache.max_bytes = 3 * 400
+        sf = SDL_CreateRGBSurface(0, 10, 10, 32, 0, 0, 0, 0).contents
+        sprites = [factory.from_surface(sf)]
+        sprites.append(factory.from_surface(sf))
+        self.assertEqual(cache.misses, 2)
+        sdl2ext.fill(sf, 0xFF)
+        sprites.append(factory.from_surface(sf))
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(len(cache), 2)
+        self.assertNotEqual(addressof(sprites[1].texture),
+                            addressof(sprites[2].texture))
+        # referenced textures exceed the budget, but are kept
+        sf2 = SDL_CreateRGBSurface(0, 10, 10, 32, 0, 0, 0, 0).contents
+        sdl2ext.fill(sf2, 0xFF00)
+        sprites.append(factory.from_surface(sf2))
+        self.assertEqual(cache.bytes, 1200)
+        sdl2ext.fill(sf2, 0xFF0000)
+        sprites.append(factory.from_surface(sf2))
+        self.assertEqual((len(cache), cache.bytes), (4, 1600))
+        # the least recently used unreferenced texture goes first
+        del sprites[:2]
+        dogc()
+        self.assertEqual((len(cache), cache.bytes), (3, 1200))
+        lastkey = factory._texture_key(*sdl2ext.sprite._surface_key(sf2))
+        del sprites[2]
+        sprites.pop(1)
+        dogc()
+        self.assertEqual(len(cache), 3)
+        sdl2ext.fill(sf, 0xFFFF)
+        sprites.append(factory.from_surface(sf))
+        self.assertEqual((len(cache), cache.bytes), (3, 1200))
+        self.assertNotIn(lastkey, cache)
+
+        # cached textures cannot be written to
+        sprite = sprites[-1]
+        self.assertRaises(ValueError, sprite.lock)
+        self.assertRaises(ValueError, sprite.update_from,
+                          bytearray(10 * 10 * 4))
+        # textures are created per renderer
+        target2 = SDL_CreateRGBSurface(0, 8, 8, 32, 0, 0, 0, 0).contents
+        renderer2 = sdl2ext.Renderer(target2)
+        factory2 = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer2)
+        factory2.texture_cache = cache
+        misses = cache.misses
+        other = factory2.from_surface(sf)
+        self.assertEqual(cache.misses, misses + 1)
+        self.assertNotEqual(addressof(other.texture),
+                            addressof(sprite.texture))
+        del other
+        dogc()
+        # closing destroys all textures, even referenced ones
+        cache.close()
+        self.assertEqual((len(cache), cache.bytes), (0, 0))
+        del sprites, sprite
+        dogc()
+        SDL_FreeSurface(sf)
+        SDL_FreeSurface(sf2)
+        SDL_FreeSurface(target2)
+
     def test_SpriteFactory_from_surface(self):
         window = sdl2ext.Window("Test", size=(1, 1))
         renderer = sdl2ext.Renderer(window)
@@ -232,6 +425,66 @@ class SDL2ExtSpriteTest(unittest.TestCase):
             #                  factory.from_surface, 1234)
         dogc()
 
+    def test_SpriteFactory_display(self):
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        target = SDL_CreateRGBSurface(0, 16, 16, 32, 0xFF0000, 0xFF00, 0xFF,
+                                      0).contents
+        rgb = SDL_CreateRGBSurface(0, 4, 4, 24, 0xFF, 0xFF00, 0xFF0000,
+                                   0).contents
+        sdl2ext.fill(rgb, sdl2ext.Color(255, 0, 0))
+        rgba = SDL_CreateRGBSurface(0, 4, 4, 32, 0xFF, 0xFF00, 0xFF0000,
+                                    0xFF000000).contents
+        self.assertIsNone(factory.from_surface(rgb).fast_blit)
+        self.assertFalse(sdl2ext.is_fast_blit(rgb, target))
+
+        factory.display = target
+        sprite = factory.from_surface(rgb)
+        self.assertIsNot(sprite.surface, rgb)
+        self.assertTrue(sprite.free)
+        self.assertTrue(sprite.fast_blit)
+        fmt = sprite.surface.format.contents
+        self.assertEqual(fmt.format, target.format.contents.format)
+        SDL_BlitSurface(sprite.surface, None, target, None)
+        view = sdl2ext.PixelView(target)
+        self.assertEqual(view[0][0] & 0xFFFFFF, 0xFF0000)
+        del view
+
+        # subsprites and the other constructors share the conversion
+        self.assertTrue(sprite.subsprite((0, 0, 2, 2)).fast_blit)
+        for sprite in (factory.create_software_sprite((4, 4), bpp=24),
+                       factory.from_color(0xFF0000, (4, 4), bpp=16)):
+            fmt = sprite.surface.format.contents
+            self.assertEqual(fmt.format, target.format.contents.format)
+            self.assertTrue(sprite.fast_blit)
+
+        # the alpha channel is kept in the unused byte of the target, but
+        # alpha blending makes the blit slow
+        sprite = factory.from_surface(rgba)
+        fmt = sprite.surface.format.contents
+        self.assertEqual((fmt.Rmask, fmt.Amask), (0xFF0000, 0xFF000000))
+        self.assertFalse(sprite.fast_blit)
+        SDL_SetSurfaceBlendMode(sprite.surface, SDL_BLENDMODE_NONE)
+        self.assertTrue(sdl2ext.is_fast_blit(sprite.surface, target))
+
+        # color keyed surfaces keep their key and may be RLE encoded
+        SDL_SetColorKey(rgb, 1, 0)
+        factory.colorkey_rle = True
+        sprite = factory.from_surface(rgb)
+        key = Uint32()
+        self.assertEqual(SDL_GetColorKey(sprite.surface, byref(key)), 0)
+        SDL_BlitSurface(sprite.surface, None, target, None)
+        self.assertTrue(sprite.surface.flags & SDL_RLEACCEL)
+
+        for display in (sdl2ext.Offscreen((8, 8)), "window"):
+            factory.display = display
+            if display == "window":
+                self.assertRaises(TypeError, factory.from_surface, rgba)
+            else:
+                self.assertTrue(factory.from_surface(rgb).fast_blit)
+        self.assertRaises(TypeError, factory.from_surface, None)
+        SDL_FreeSurface(rgb)
+        SDL_FreeSurface(rgba)
+
     def test_SpriteFactory_from_text(self):
         sfactory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
         fm = sdl2ext.FontManager(RESOURCES.get_path("tuffy.ttf"))
@@ -281,9 +534,60 @@ class SDL2ExtSpriteTest(unittest.TestCase):
     def test_SpriteRenderSystem_render(self):
         pass
 
-    @unittest.skip("not implemented")
     def test_SpriteRenderSystem_process(self):
-        pass
+        class RecordingSystem(sdl2ext.SpriteRenderSystem):
+            def render(self, sprites, x=None, y=None):
+                self.rendered = list(sprites)
+
+        system = RecordingSystem()
+        sprites = [MSprite() for _ in range(4)]
+        for depth, sprite in zip((3, 1, 2, 1), sprites):
+            sprite.depth = depth
+        system.process(None, sprites)
+        self.assertEqual(system.rendered,
+                         [sprites[1], sprites[3], sprites[2], sprites[0]])
+        sprites[0].depth = -1
+        system.process(None, sprites)
+        self.assertEqual(system.rendered[0], sprites[0])
+        extra = MSprite()
+        extra.depth = 2
+        system.process(None, sprites[1:] + [extra])
+        self.assertEqual(system.rendered,
+                         [sprites[1], sprites[3], sprites[2], extra])
+        system.sortfunc = lambda e: -e.depth
+        system.process(None, sprites)
+        self.assertEqual(system.rendered[-1], sprites[0])
+
+    def test_SpriteIndex(self):
+        index = sdl2ext.SpriteIndex()
+        a, b, c = MSprite(), MSprite(), MSprite()
+        b.depth = 5
+        c.depth = -2
+        index.add(a)
+        index.add(b)
+        index.add(c)
+        index.add(a)
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.depths, (-2, 0, 5))
+        self.assertEqual(list(index), [c, a, b])
+        order = index.sprites()
+        self.assertIs(index.sprites(), order)
+        a.depth = 10
+        self.assertEqual(index.depths, (-2, 5, 10))
+        self.assertEqual(list(index), [c, b, a])
+        b.depth = -2
+        self.assertEqual(index.layer(-2), (c, b))
+        index.remove(c)
+        self.assertNotIn(c, index)
+        self.assertEqual(list(index), [b, a])
+        c.depth = 100
+        self.assertEqual(index.depths, (-2, 10))
+        self.assertRaises(KeyError, index.remove, c)
+        index.sync([c, a])
+        self.assertEqual(list(index), [a, c])
+        index.clear()
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.depths, ())
 
     def test_SoftwareSpriteRenderSystem(self):
         self.assertRaises(TypeError, sdl2ext.SoftwareSpriteRenderSystem)
@@ -349,6 +653,45 @@ class SDL2ExtSpriteTest(unittest.TestCase):
         self.check_pixels(view, 20, 20, sp2, 0x00FF00, (0x0, 0xFF0000), 1, 2)
         del view
 
+    @unittest.skipIf(_ISPYPY, "PyPy's ctypes can't do byref(value, offset)")
+    def test_SoftwareSpriteRenderSystem_dirty_rects(self):
+        sf1 = SDL_CreateRGBSurface(0, 4, 4, 32, 0, 0, 0, 0)
+        sp1 = sdl2ext.SoftwareSprite(sf1.contents, True)
+        sdl2ext.fill(sp1, 0xFF0000)
+        sf2 = SDL_CreateRGBSurface(0, 3, 3, 32, 0, 0, 0, 0)
+        sp2 = sdl2ext.SoftwareSprite(sf2.contents, True)
+        sdl2ext.fill(sp2, 0x00FF00)
+        sp2.position = 10, 10
+
+        window = sdl2ext.Window("Test", size=(20, 20))
+        renderer = sdl2ext.SoftwareSpriteRenderSystem(window,
+                                                      dirty_rects=True)
+        renderer.render([sp1, sp2])
+        self.assertEqual(renderer.updated_rects, [(0, 0, 20, 20)])
+        renderer.render([sp1, sp2])
+        self.assertEqual(renderer.updated_rects, [])
+        # old and new area overlap and are merged
+        sp1.position = 2, 0
+        sdl2ext.fill(renderer.surface, 0x0)
+        renderer.render([sp1, sp2])
+        self.assertEqual(renderer.updated_rects, [(0, 0, 6, 4)])
+        view = sdl2ext.PixelView(renderer.surface)
+        self.check_pixels(view, 20, 20, sp1, 0xFF0000, (0x0, 0x00FF00))
+        del view
+        # sp2 is clipped by the window and then removed
+        sp2.position = 18, 18
+        renderer.render([sp1, sp2])
+        self.assertEqual(sorted(renderer.updated_rects),
+                         [(10, 10, 3, 3), (18, 18, 2, 2)])
+        renderer.render([sp1])
+        self.assertEqual(renderer.updated_rects, [(18, 18, 2, 2)])
+        renderer.add_dirty((0, 10, 5, 5))
+        renderer.render([sp1])
+        self.assertEqual(renderer.updated_rects, [(0, 10, 5, 5)])
+        renderer.invalidate()
+        renderer.render([sp1])
+        self.assertEqual(renderer.updated_rects, [(0, 0, 20, 20)])
+
     @unittest.skipIf(_ISPYPY, "PyPy's ctypes can't do byref(value, offset)")
     def test_SoftwareSpriteRenderSystem_process(self):
         sf1 = SDL_CreateRGBSurface(0, 5, 10, 32, 0, 0, 0, 0)
@@ -386,10 +729,347 @@ class SDL2ExtSpriteTest(unittest.TestCase):
     def test_TextureSpriteRenderSystem_process(self):
         pass
 
+    @unittest.skipIf(_ISPYPY, "PyPy's ctypes can't do byref(value, offset)")
+    def test_TextureSpriteRenderSystem_texture_order(self):
+        target = SDL_CreateRGBSurface(0, 64, 64, 32, 0, 0, 0, 0).contents
+        renderer = sdl2ext.Renderer(target)
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
+        red = factory.from_color(0xFF0000, (16, 16))
+        blue = factory.from_color(0x0000FF, (16, 16))
+        sprites = []
+        for idx in range(8):
+            sprite = (red, blue)[idx % 2].subsprite((0, 0, 4, 4))
+            sprite.position = idx * 4, 0
+            sprite.depth = idx // 4
+            sprites.append(sprite)
+        sprites[6].alpha_mod = 128
+
+        spriterenderer = sdl2ext.TextureSpriteRenderSystem(renderer)
+        self.assertFalse(spriterenderer.texture_order)
+        spriterenderer.process("fakeworld", sprites)
+        self.assertEqual(spriterenderer.texture_changes, 8)
+        self.assertEqual(spriterenderer.mod_changes, 0)
+
+        spriterenderer = sdl2ext.TextureSpriteRenderSystem(
+            renderer, texture_order=True)
+        spriterenderer.process("fakeworld", sprites)
+        # one switch per texture and depth; the alpha mod of sprite 6 is
+        # set and reset for the other sprites of its texture
+        self.assertEqual(spriterenderer.texture_changes, 4)
+        self.assertEqual(spriterenderer.mod_changes, 2)
+        view = sdl2ext.PixelView(target)
+        for idx in range(8):
+            self.assertEqual(view[1][idx * 4 + 1] & 0xFFFFFF,
+                             (0xFF0000, 0x0000FF)[idx % 2])
+        del view
+
+        # sprites without mods do not take over the ones of other sprites
+        # sharing their texture, also in later frames
+        white = factory.from_color(0xFFFFFF, (16, 16))
+        green = white.subsprite((0, 0, 4, 4), color_mod=(0, 255, 0))
+        plain = white.subsprite((0, 0, 4, 4))
+        plain.position = 4, 8
+        green.position = 0, 8
+        for frame in range(2):
+            spriterenderer.process("fakeworld", [green, plain])
+            view = sdl2ext.PixelView(target)
+            self.assertEqual(view[9][1] & 0xFFFFFF, 0x00FF00)
+            self.assertEqual(view[9][5] & 0xFFFFFF, 0xFFFFFF)
+            del view
+        self.assertEqual(spriterenderer.mod_changes, 2)
+        # the shared texture gets its own mods back
+        self.assertEqual(sdl2ext.sprite._texture_mods(white.texture),
+                         ((255, 255, 255), 255))
+        white.set_color_mod((0, 0, 255))
+        spriterenderer.render(green)
+        self.assertEqual(sdl2ext.sprite._texture_mods(white.texture),
+                         ((0, 0, 255), 255))
+
+    def test_TextureSpriteRenderSystem_texture_groups(self):
+        target = SDL_CreateRGBSurface(0, 16, 16, 32, 0, 0, 0, 0).contents
+        renderer = sdl2ext.Renderer(target)
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
+        red = factory.from_color(0xFF0000, (4, 4))
+        blue = factory.from_color(0x0000FF, (4, 4))
+        sprites = [(red, blue)[idx % 2].subsprite((0, 0, 2, 2))
+                   for idx in range(6)]
+        sprites[5].depth = -1
+
+        index = sdl2ext.SpriteIndex(sprites, grouped=True)
+        order = index.sprites()
+        self.assertEqual(order[0], sprites[5])
+        # the sprites of a depth are grouped by texture
+        textures = [addressof(s.texture) for s in order[1:]]
+        self.assertEqual(sum(a != b for a, b in zip(textures, textures[1:])),
+                         1)
+        self.assertEqual(sorted(index.layer(0), key=sprites.index),
+                         sprites[:5])
+        self.assertIs(index.sprites(), order)
+        # changing a mod moves the sprite to another group
+        sprites[2].alpha_mod = 100
+        order = index.sprites()
+        self.assertEqual(len(order), 6)
+        keys = [s._mods_key() for s in order[1:]]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual([key[2] for key in keys].count(100), 1)
+
+        spriterenderer = sdl2ext.TextureSpriteRenderSystem(
+            renderer, texture_order=True)
+        world = sdl2ext.World()
+        for sprite in sprites:
+            entity = sdl2ext.Entity(world)
+            entity.texturesprite = sprite
+        components = world.get_components(sdl2ext.TextureSprite)
+        spriterenderer.process(world, components)
+        order = spriterenderer._groups.sprites()
+        textures = [addressof(s.texture) for s in order]
+        self.assertEqual(spriterenderer.texture_changes,
+                         1 + sum(a != b for a, b in zip(textures,
+                                                        textures[1:])))
+        self.assertLessEqual(spriterenderer.texture_changes, 3)
+        # the grouped order is reused as long as nothing changed
+        spriterenderer.process(world, components)
+        self.assertIs(spriterenderer._groups.sprites(), order)
+        sprites[1].color_mod = (0, 255, 0)
+        spriterenderer.process(world, components)
+        self.assertIsNot(spriterenderer._groups.sprites(), order)
+
+    def test_TextureSpriteRenderSystem_camera(self):
+        target = SDL_CreateRGBSurface(0, 32, 32, 32, 0, 0, 0, 0).contents
+        renderer = sdl2ext.Renderer(target)
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
+        red = factory.from_color(0xFF0000, (8, 8))
+        sprites = []
+        for idx in range(100):
+            sprite = red.subsprite((0, 0, 8, 8))
+            sprite.position = (idx % 10) * 16, (idx // 10) * 16
+            sprites.append(sprite)
+
+        class RecordingSystem(sdl2ext.TextureSpriteRenderSystem):
+            def render(self, sprites, x=None, y=None, present=None):
+                self.rendered = list(sprites)
+                super(RecordingSystem, self).render(sprites, x, y, present)
+
+        camera = sdl2ext.Camera((36, 36))
+        spriterenderer = RecordingSystem(renderer, camera=camera)
+        self.assertEqual((spriterenderer.max_x, spriterenderer.max_y),
+                         (32, 32))
+        spriterenderer.process("fakeworld", sprites)
+        # The sprites at 32 and 64 (partially) and 48 (fully) are visible
+        # on each axis.
+        self.assertEqual(len(spriterenderer.rendered), 9)
+        view = sdl2ext.PixelView(target)
+        self.assertEqual(view[0][0] & 0xFFFFFF, 0xFF0000)
+        self.assertEqual(view[0][4] & 0xFFFFFF, 0x0)
+        self.assertEqual(view[12][12] & 0xFFFFFF, 0xFF0000)
+        del view
+
+        sprites[0].position = 40, 40
+        sdl2ext.fill(target, 0x0)
+        spriterenderer.process("fakeworld", sprites)
+        self.assertEqual(len(spriterenderer.rendered), 10)
+        view = sdl2ext.PixelView(target)
+        self.assertEqual(view[4][4] & 0xFFFFFF, 0xFF0000)
+        del view
+
+        camera.zoom = 2
+        camera.position = 4, 4
+        sdl2ext.fill(target, 0x0)
+        spriterenderer.process("fakeworld", sprites[1:])
+        self.assertEqual(spriterenderer.rendered,
+                         [sprites[1], sprites[10], sprites[11]])
+        view = sdl2ext.PixelView(target)
+        self.assertEqual(view[0][0] & 0xFFFFFF, 0x0)
+        self.assertEqual(view[15][15] & 0xFFFFFF, 0x0)
+        self.assertEqual(view[0][24] & 0xFFFFFF, 0xFF0000)
+        self.assertEqual(view[0][23] & 0xFFFFFF, 0x0)
+        self.assertEqual(view[24][0] & 0xFFFFFF, 0xFF0000)
+        self.assertEqual(view[31][31] & 0xFFFFFF, 0xFF0000)
+        del view
+
+    def test_TextureSpriteRenderSystem_camera_world(self):
+        target = SDL_CreateRGBSurface(0, 32, 32, 32, 0, 0, 0, 0).contents
+        renderer = sdl2ext.Renderer(target)
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
+        red = factory.from_color(0xFF0000, (8, 8))
+        world = sdl2ext.World()
+        entities = []
+        for idx in range(1000):
+            entity = sdl2ext.Entity(world)
+            entity.texturesprite = red.subsprite((0, 0, 8, 8))
+            entity.texturesprite.position = (idx % 50) * 16, (idx // 50) * 16
+            entities.append(entity)
+        components = world.components[sdl2ext.TextureSprite]
+        system = sdl2ext.TextureSpriteRenderSystem(
+            renderer, camera=sdl2ext.Camera((0, 0)))
+        system.process(world, components.values())
+        self.assertEqual(len(system.spatial_hash), 1000)
+
+        # count the cells computed and the sprites synced: sprites out of
+        # view are not visited anymore
+        grid = system.spatial_hash
+        calls = {"cells": 0, "sync": 0}
+
+        def cell_range(*args):
+            calls["cells"] += 1
+            return sdl2ext.SpatialHash._cell_range(grid, *args)
+
+        def sync(sprites):
+            calls["sync"] += 1
+            return sdl2ext.SpatialHash.sync(grid, sprites)
+
+        grid._cell_range = cell_range
+        grid.sync = sync
+        system.process(world, components.values())
+        self.assertEqual(calls, {"cells": 1, "sync": 0})
+        self.assertEqual(system.texture_changes, 1)
+
+        # a moved sprite only costs its own cells
+        entities[-1].texturesprite.position = 0, 0
+        system.process(world, components.values())
+        self.assertEqual(calls, {"cells": 3, "sync": 0})
+        self.assertEqual(system.texture_changes, 1)
+        view = sdl2ext.PixelView(target)
+        self.assertEqual(view[0][0] & 0xFFFFFF, 0xFF0000)
+        del view
+
+        # removed components are noticed through the world's revision
+        del entities[0].texturesprite
+        system.process(world, components.values())
+        self.assertEqual(calls["sync"], 1)
+        self.assertEqual(len(grid), 999)
+
+    def test_SpatialHash(self):
+        self.assertRaises(ValueError, sdl2ext.SpatialHash, 0)
+        grid = sdl2ext.SpatialHash(10)
+        a, b, c = MSprite(5, 5), MSprite(30, 5), MSprite(5, 5)
+        b.position = 20, 0
+        c.position = 100, 100
+        c.depth = -1
+        for sprite in (a, b, c):
+            grid.add(sprite)
+        self.assertEqual(len(grid), 3)
+        self.assertEqual(grid.query((0, 0, 10, 10)), [a])
+        self.assertEqual(grid.query((0, 0, 200, 200)), [c, a, b])
+        self.assertEqual(grid.query((45, 0, 10, 10)), [b])
+        self.assertEqual(grid.query((50, 0, 10, 10)), [])
+        # setting the position is noticed, writing x, y, w or h needs
+        # move()
+        c.position = 2, 2
+        self.assertEqual(grid.query((0, 0, 10, 10)), [c, a])
+        c.w = 100
+        a.x = 90
+        self.assertEqual(grid.query((90, 0, 10, 10)), [])
+        grid.move(c)
+        grid.move(a)
+        grid.update()
+        self.assertEqual(grid.query((90, 0, 10, 10)), [c, a])
+        a.x = 0
+        grid.move(a)
+        self.assertRaises(KeyError, grid.move, MSprite(1, 1))
+        grid.remove(c)
+        self.assertEqual(grid.query((0, 0, 10, 10)), [a])
+        c.x = 0
+        grid.sync([a, c])
+        self.assertEqual(grid.query((0, 0, 200, 200)), [c, a])
+        grid.clear()
+        self.assertEqual(grid.query((0, 0, 200, 200)), [])
+
+    def test_StaticLayer(self):
+        target = SDL_CreateRGBSurface(0, 32, 32, 32, 0, 0, 0, 0).contents
+        renderer = sdl2ext.Renderer(target)
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
+        self.assertRaises(TypeError, sdl2ext.StaticLayer, None)
+        red = factory.from_color(0xFF0000, (8, 8))
+        white = factory.from_color(0xFFFFFF, (8, 8))
+        tiles = []
+        for idx in range(4):
+            tile = red.subsprite((0, 0, 8, 8))
+            tile.position = 4 + (idx % 2) * 8, 4 + (idx // 2) * 8
+            tiles.append(tile)
+        top = white.subsprite((0, 0, 4, 4))
+        top.position = 8, 8
+        top.depth = 1
+        top.color_mod = (0, 255, 0)
+
+        layer = sdl2ext.StaticLayer(renderer, tiles + [top])
+        self.assertTrue(layer.dirty)
+        self.assertEqual(layer.area, (4, 4, 16, 16))
+        sprite = layer.bake()
+        self.assertFalse(layer.dirty)
+        self.assertIs(layer.bake(), sprite)
+        self.assertEqual(sprite.area, (4, 4, 20, 20))
+
+        def draw():
+            sdl2ext.fill(target, 0x0)
+            renderer.copy(sprite, dstrect=(sprite.x, sprite.y, 16, 16))
+            return sdl2ext.PixelView(target)
+
+        view = draw()
+        self.assertEqual(view[3][3] & 0xFFFFFF, 0x0)
+        self.assertEqual(view[4][4] & 0xFFFFFF, 0xFF0000)
+        self.assertEqual(view[9][9] & 0xFFFFFF, 0x00FF00)
+        self.assertEqual(view[19][19] & 0xFFFFFF, 0xFF0000)
+        del view
+        # the color mod is not left on the shared texture
+        self.assertEqual(sdl2ext.sprite._texture_mods(white.texture),
+                         ((255, 255, 255), 255))
+
+        top.x = 12
+        self.assertFalse(layer.dirty)
+        layer.move(top)
+        self.assertTrue(layer.dirty)
+        layer.bake()
+        top.position = 14, 14
+        self.assertTrue(layer.dirty)
+        self.assertIs(layer.bake(), sprite)
+        view = draw()
+        self.assertEqual(view[9][9] & 0xFFFFFF, 0xFF0000)
+        self.assertEqual(view[15][15] & 0xFFFFFF, 0x00FF00)
+        del view
+
+        top.color_mod = None
+        layer.invalidate(top)
+        layer.bake()
+        view = draw()
+        self.assertEqual(view[15][15] & 0xFFFFFF, 0xFFFFFF)
+        del view
+
+        layer.remove(top)
+        layer.remove(tiles[0])
+        layer.bake()
+        view = draw()
+        self.assertEqual(view[4][4] & 0xFFFFFF, 0x0)
+        self.assertEqual(view[15][15] & 0xFFFFFF, 0xFF0000)
+        del view
+
+        # growing beyond the area creates a new texture
+        tiles[3].x = 30
+        layer.move(tiles[3])
+        self.assertIsNot(layer.bake(), sprite)
+        self.assertEqual(layer.area, (4, 4, 34, 16))
+
+    def test_Camera(self):
+        camera = sdl2ext.Camera((10, 20), zoom=2)
+        self.assertEqual(camera.position, (10, 20))
+        self.assertEqual(camera.view((100, 50)), (10, 20, 50, 25))
+        camera.size = 40, 40
+        self.assertEqual(camera.view((100, 50)), (10, 20, 20, 20))
+        self.assertEqual(camera.to_screen(15, 20), (10, 0))
+        self.assertEqual(camera.to_world(10, 0), (15, 20))
+        with self.assertRaises(ValueError):
+            camera.zoom = 0
+
     def test_Sprite(self):
         sprite = MSprite()
         self.assertIsInstance(sprite, MSprite)
         self.assertIsInstance(sprite, sdl2ext.Sprite)
+        # the known attributes live in slots, others still can be set
+        sprite.depth = 3
+        sprite.frame_rect = SDL_Rect(0, 0, 1, 1)
+        self.assertEqual(vars(sprite), {})
+        sprite.velocity = 1
+        self.assertEqual(vars(sprite), {"velocity": 1})
 
     def test_Sprite_position_xy(self):
         sprite = MSprite()
@@ -537,6 +1217,65 @@ class SDL2ExtSpriteTest(unittest.TestCase):
         SDL_DestroyWindow(window)
         dogc()
 
+    def _streaming_sprite(self, renderer, access=SDL_TEXTUREACCESS_STREAMING):
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
+        return factory.create_texture_sprite(
+            renderer, (5, 3), pformat=SDL_PIXELFORMAT_RGB888, access=access)
+
+    @unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+    def test_TextureSprite_lock(self):
+        target = SDL_CreateRGBSurface(0, 5, 3, 32, 0, 0, 0, 0).contents
+        renderer = sdl2ext.Renderer(target)
+        sprite = self._streaming_sprite(renderer)
+        with sprite.lock() as pixels:
+            self.assertEqual(pixels.shape, (3, 5))
+            self.assertEqual(pixels.dtype, numpy.uint32)
+            self.assertGreaterEqual(pixels.strides[0], 20)
+            pixels[:] = 0x0000FF
+            pixels[1, 2] = 0xFF0000
+        with sprite.lock((3, 0, 2, 1)) as pixels:
+            self.assertEqual(pixels.shape, (1, 2))
+            pixels[:] = 0x00FF00
+        renderer.copy(sprite)
+        view = sdl2ext.PixelView(target)
+        self.assertEqual(view[0][0] & 0xFFFFFF, 0x0000FF)
+        self.assertEqual(view[1][2] & 0xFFFFFF, 0xFF0000)
+        self.assertEqual(view[0][3] & 0xFFFFFF, 0x00FF00)
+        self.assertEqual(view[0][4] & 0xFFFFFF, 0x00FF00)
+        self.assertEqual(view[2][4] & 0xFFFFFF, 0x0000FF)
+        del view
+
+        static = self._streaming_sprite(renderer, SDL_TEXTUREACCESS_STATIC)
+        with self.assertRaises(ValueError):
+            with static.lock():
+                pass
+
+    @unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+    def test_TextureSprite_update_from(self):
+        target = SDL_CreateRGBSurface(0, 5, 3, 32, 0, 0, 0, 0).contents
+        renderer = sdl2ext.Renderer(target)
+        sprite = self._streaming_sprite(renderer, SDL_TEXTUREACCESS_STATIC)
+        frame = numpy.full((3, 5), 0x0000FF, dtype=numpy.uint32)
+        frame[2, 1] = 0xFF0000
+        sprite.update_from(frame)
+        # rows of a larger array, passed with its pitch
+        larger = numpy.full((4, 8), 0x00FF00, dtype=numpy.uint32)
+        sprite.update_from(larger[:2, :2], area=(3, 1, 2, 2))
+        self.assertRaises(ValueError, sprite.update_from, frame[:, ::2])
+        self.assertRaises(ValueError, sprite.update_from, frame[:2])
+        # raw bytes, BGRX in memory
+        sprite.update_from(bytes((255, 255, 255, 0)), area=(0, 0, 1, 1))
+        self.assertRaises(ValueError, sprite.update_from, bytes(4))
+        renderer.copy(sprite)
+        view = sdl2ext.PixelView(target)
+        self.assertEqual(view[0][0] & 0xFFFFFF, 0xFFFFFF)
+        self.assertEqual(view[0][1] & 0xFFFFFF, 0x0000FF)
+        self.assertEqual(view[2][1] & 0xFFFFFF, 0xFF0000)
+        self.assertEqual(view[1][3] & 0xFFFFFF, 0x00FF00)
+        self.assertEqual(view[2][4] & 0xFFFFFF, 0x00FF00)
+        self.assertEqual(view[0][4] & 0xFFFFFF, 0x0000FF)
+        del view
+
     def test_Renderer(self):
         sf = SDL_CreateRGBSurface(0, 10, 10, 32, 0, 0, 0, 0).contents
 
@@ -710,6 +1449,290 @@ class SDL2ExtSpriteTest(unittest.TestCase):
                          0x0000FF, (0x0,))
         del view
 
+    def test_Renderer_read_pixels(self):
+        surface = SDL_CreateRGBSurface(0, 16, 8, 32, 0, 0, 0, 0).contents
+        sdl2ext.fill(surface, 0x0)
+        renderer = sdl2ext.Renderer(surface)
+        renderer.fill((2, 1, 3, 2), 0x0000FF)
+        out = bytearray(3 * 2 * 4)
+        self.assertIs(renderer.read_pixels((2, 1, 3, 2), out,
+                                           SDL_PIXELFORMAT_RGB888), out)
+        self.assertEqual(array.array("I", out).tolist(), [0x0000FF] * 6)
+        self.assertRaises(ValueError, renderer.read_pixels, (0, 0, 4, 4),
+                          out)
+        self.assertRaises(ValueError, renderer.read_pixels, (2, 1, 3, 2),
+                          bytes(24))
+        with renderer.batch():
+            renderer.fill((2, 1, 1, 1), 0x00FF00)
+            renderer.read_pixels((2, 1, 3, 2), out, SDL_PIXELFORMAT_RGB888)
+        self.assertEqual(array.array("I", out)[0], 0x00FF00)
+
+        if not _HASNUMPY:
+            return
+        pixels = renderer.read_pixels(pformat=SDL_PIXELFORMAT_RGB888)
+        self.assertEqual(pixels.shape, (8, 16))
+        self.assertEqual(pixels.dtype, numpy.uint32)
+        self.assertEqual(pixels[1, 2], 0x00FF00)
+        self.assertEqual(pixels[2, 4], 0x0000FF)
+        self.assertEqual(pixels[2, 5], 0x0)
+        # the rows of a larger array are written with its pitch
+        larger = numpy.zeros((4, 32), dtype=numpy.uint32)
+        renderer.read_pixels((3, 1, 2, 2), larger[1:3, 4:6],
+                             SDL_PIXELFORMAT_RGB888)
+        self.assertEqual(larger[1:3, 4:6].tolist(), [[0x0000FF] * 2] * 2)
+        self.assertEqual(int(larger.sum()), 4 * 0x0000FF)
+        rgb = renderer.read_pixels((0, 0, 4, 2), pformat=SDL_PIXELFORMAT_RGB24)
+        self.assertEqual(rgb.shape, (2, 4, 3))
+        self.assertEqual(rgb[1, 2].tolist(), [0, 255, 0])
+        self.assertEqual(rgb[1, 3].tolist(), [0, 0, 255])
+
+    @unittest.skipIf(_ISPYPY, "PyPy's ctypes can't do byref(value, offset)")
+    def test_Renderer_batch(self):
+        surface = SDL_CreateRGBSurface(0, 128, 128, 32, 0, 0, 0, 0).contents
+        sdl2ext.fill(surface, 0x0)
+        renderer = sdl2ext.Renderer(surface)
+        renderer.color = 0xFF0000
+        batch = renderer.batch(capacity=1)
+        self.assertIsInstance(batch, sdl2ext.RenderBatch)
+        self.assertIs(renderer.batch(), batch)
+        with renderer.batch():
+            renderer.fill((5, 5, 10, 10), 0x0000FF)
+            renderer.fill([(20, 15, 8, 10), (40, 40, 4, 4)], 0x0000FF)
+            with renderer.batch():
+                renderer.fill((60, 60, 2, 2), 0x0000FF)
+            # the nested block must not flush
+            self.assertEqual(len(batch), 1)
+            view = sdl2ext.PixelView(surface)
+            self.check_areas(view, 128, 128, [], 0x0000FF, (0x0,))
+            del view
+        self.assertEqual(len(batch), 0)
+        self.assertEqual(renderer.color, sdl2ext.Color(0xFF, 0, 0, 0))
+        view = sdl2ext.PixelView(surface)
+        self.check_areas(view, 128, 128, [
+            (5, 5, 10, 10), (20, 15, 8, 10), (40, 40, 4, 4), (60, 60, 2, 2)],
+            0x0000FF, (0x0,))
+        del view
+
+        sdl2ext.fill(surface, 0x0)
+        with renderer.batch() as batch:
+            renderer.draw_point((1, 1, 3, 3), 0x0000FF)
+            renderer.draw_point((5, 5), 0x0000FF)
+            renderer.fill((10, 10, 2, 2))
+            renderer.draw_point((7, 7), 0x00FF00)
+            self.assertEqual(len(batch), 3)
+        view = sdl2ext.PixelView(surface)
+        self.assertEqual(view[1][1], 0x0000FF)
+        self.assertEqual(view[3][3], 0x0000FF)
+        self.assertEqual(view[5][5], 0x0000FF)
+        self.assertEqual(view[7][7], 0x00FF00)
+        self.assertEqual(view[10][10], 0xFF0000)
+        del view
+
+    def test_Renderer_batch_state(self):
+        surface = SDL_CreateRGBSurface(0, 64, 64, 32, 0, 0, 0, 0).contents
+        sdl2ext.fill(surface, 0x0)
+        renderer = sdl2ext.Renderer(surface)
+        renderer.blendmode = SDL_BLENDMODE_NONE
+        with renderer.batch() as batch:
+            # the color is recorded with the operation
+            renderer.color = 0xFF0000
+            renderer.fill((0, 0, 4, 4))
+            renderer.color = 0x0000FF
+            renderer.fill((4, 0, 4, 4))
+            self.assertEqual(len(batch), 2)
+            # state changes flush the recorded operations first
+            renderer.viewport = (32, 32, 32, 32)
+            self.assertEqual(len(batch), 0)
+            renderer.fill((0, 0, 4, 4), 0x00FF00)
+            renderer.viewport = None
+        view = sdl2ext.PixelView(surface)
+        self.assertEqual(view[0][0], 0xFF0000)
+        self.assertEqual(view[0][4], 0x0000FF)
+        self.assertEqual(view[32][32], 0x00FF00)
+        self.assertEqual(view[10][10], 0x0)
+        del view
+
+        # sprites drawn without the batch keep their place between the
+        # recorded operations
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
+        sprite = factory.from_color(0xFFFFFF, (4, 4))
+        system = sdl2ext.TextureSpriteRenderSystem(renderer, present=False)
+        with renderer.batch():
+            renderer.fill((16, 16, 8, 8), 0xFF0000)
+            system.render(sprite, 16, 16)
+            renderer.fill((18, 18, 2, 2), 0x00FF00)
+        view = sdl2ext.PixelView(surface)
+        self.assertEqual(view[16][16], 0xFFFFFF)
+        self.assertEqual(view[18][18], 0x00FF00)
+        self.assertEqual(view[22][22], 0xFF0000)
+        del view
+
+    @unittest.skipIf(_ISPYPY, "PyPy's ctypes can't do byref(value, offset)")
+    def test_Renderer_geometry_buffer(self):
+        surface = SDL_CreateRGBSurface(0, 128, 128, 32, 0, 0, 0, 0).contents
+        sdl2ext.fill(surface, 0x0)
+        renderer = sdl2ext.Renderer(surface)
+        rects = array.array("i", [5, 5, 10, 10, 20, 15, 8, 10])
+        renderer.fill(rects, 0x0000FF)
+        view = sdl2ext.PixelView(surface)
+        self.check_areas(view, 128, 128, [(5, 5, 10, 10), (20, 15, 8, 10)],
+                         0x0000FF, (0x0,))
+        del view
+        sdl2ext.fill(surface, 0x0)
+        renderer.draw_point(array.array("i", [1, 1, 3, 4]), 0x0000FF)
+        with renderer.batch():
+            renderer.draw_point(array.array("i", [6, 6]), 0x0000FF)
+        view = sdl2ext.PixelView(surface)
+        self.assertEqual(view[1][1], 0x0000FF)
+        self.assertEqual(view[4][3], 0x0000FF)
+        self.assertEqual(view[6][6], 0x0000FF)
+        del view
+        self.assertRaises(ValueError, renderer.fill,
+                          array.array("i", [1, 2, 3]))
+        self.assertRaises(ValueError, renderer.draw_line,
+                          array.array("i", [1, 2]))
+
+        try:
+            import numpy
+        except ImportError:
+            return
+        sdl2ext.fill(surface, 0x0)
+        rects = numpy.array([(5, 5, 10, 10), (40, 40, 4, 4)], numpy.int32)
+        renderer.fill(rects, 0x0000FF)
+        view = sdl2ext.PixelView(surface)
+        self.check_areas(view, 128, 128, [(5, 5, 10, 10), (40, 40, 4, 4)],
+                         0x0000FF, (0x0,))
+        del view
+
+    @unittest.skipIf(_ISPYPY, "PyPy's ctypes can't do byref(value, offset)")
+    def test_Renderer_state_cache(self):
+        surface = SDL_CreateRGBSurface(0, 128, 128, 32, 0, 0, 0, 0).contents
+        sdl2ext.fill(surface, 0x0)
+        renderer = sdl2ext.Renderer(surface)
+        renderer.color = 0xFF0000
+        hits, misses = renderer.cache_hits, renderer.cache_misses
+        for i in range(10):
+            renderer.fill((i * 10, 0, 5, 5), 0x0000FF)
+        self.assertEqual(renderer.cache_misses, misses + 1)
+        self.assertEqual(renderer.cache_hits, hits + 9)
+        self.assertEqual(renderer.color, sdl2ext.Color(0xFF, 0, 0, 0))
+        renderer.fill((0, 10, 5, 5))
+        self.assertEqual(renderer.cache_misses, misses + 2)
+        view = sdl2ext.PixelView(surface)
+        self.assertEqual(view[0][0], 0x0000FF)
+        self.assertEqual(view[0][90], 0x0000FF)
+        self.assertEqual(view[10][0], 0xFF0000)
+        del view
+
+        renderer.blendmode = SDL_BLENDMODE_BLEND
+        misses = renderer.cache_misses
+        renderer.blendmode = SDL_BLENDMODE_BLEND
+        self.assertEqual(renderer.cache_misses, misses)
+        self.assertEqual(renderer.blendmode.value, SDL_BLENDMODE_BLEND)
+
+        renderer.scale = 2, 2
+        renderer.scale = 2.0, 2.0
+        self.assertEqual(renderer.cache_misses, misses + 1)
+        self.assertEqual(renderer.scale, (2.0, 2.0))
+        renderer.scale = 1, 1
+
+        renderer.viewport = (10, 10, 50, 50)
+        self.assertEqual(renderer.viewport, (10, 10, 50, 50))
+        renderer.viewport = None
+        self.assertEqual(renderer.viewport, (0, 0, 128, 128))
+        renderer.clip_rect = (0, 0, 20, 20)
+        self.assertEqual(renderer.clip_rect, (0, 0, 20, 20))
+        renderer.clip_rect = None
+        self.assertIsNone(renderer.clip_rect)
+
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
+        sp = factory.create_texture_sprite(renderer, (8, 8),
+                                           access=SDL_TEXTUREACCESS_TARGET)
+        renderer.target = sp
+        self.assertIs(renderer.target, sp)
+        renderer.clear(0x00FF00)
+        renderer.target = None
+        self.assertIsNone(renderer.target)
+        self.assertRaises(TypeError, setattr, renderer, "target", 1234)
+
+        # the getters are served from the cache, until it is invalidated
+        renderer.viewport = (10, 10, 50, 50)
+        renderer.clip_rect = (0, 0, 20, 20)
+        SDL_RenderSetViewport(renderer.sdlrenderer, None)
+        SDL_RenderSetClipRect(renderer.sdlrenderer, None)
+        SDL_SetRenderTarget(renderer.sdlrenderer, sp.texture)
+        self.assertEqual(renderer.viewport, (10, 10, 50, 50))
+        self.assertEqual(renderer.clip_rect, (0, 0, 20, 20))
+        self.assertIsNone(renderer.target)
+        renderer.invalidate_cache()
+        self.assertEqual(renderer.viewport, (0, 0, 8, 8))
+        self.assertIsNone(renderer.clip_rect)
+        self.assertEqual(addressof(renderer.target), addressof(sp.texture))
+        renderer.target = None
+        self.assertIsNone(renderer.target)
+        self.assertEqual(renderer.viewport, (0, 0, 128, 128))
+
+        # the one-off colors above are left in SDL, but not taken over as
+        # the renderer's color
+        renderer.invalidate_cache()
+        self.assertEqual(renderer.color, sdl2ext.Color(0xFF, 0, 0, 0))
+
+        renderer.blendmode = SDL_BLENDMODE_NONE
+        renderer.color = 0xFF0000
+        renderer.fill((0, 100, 5, 5), 0x00FF00)
+        renderer.invalidate_cache()
+        self.assertEqual(renderer.color, sdl2ext.Color(0xFF, 0, 0, 0))
+        renderer.fill((10, 100, 5, 5))
+        view = sdl2ext.PixelView(surface)
+        self.assertEqual(view[100][0], 0x00FF00)
+        self.assertEqual(view[100][10], 0xFF0000)
+        del view
+
+    def test_SpriteSheet(self):
+        target = SDL_CreateRGBSurface(0, 32, 32, 32, 0, 0, 0, 0).contents
+        renderer = sdl2ext.Renderer(target)
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
+        sprite = factory.create_texture_sprite(renderer, (40, 22))
+
+        sheet = sdl2ext.SpriteSheet.grid(sprite, 16, 8, margin=2,
+                                         spacing=2)
+        self.assertEqual(len(sheet), 4)
+        self.assertEqual(sheet.cols, 2)
+        self.assertEqual(sheet[0], SDL_Rect(2, 2, 16, 8))
+        self.assertEqual(sheet[3], SDL_Rect(20, 12, 16, 8))
+        self.assertIs(sheet[1], sheet.rects[1])
+        self.assertEqual(len(sdl2ext.SpriteSheet.grid(sprite, 10, count=3)),
+                         3)
+        self.assertRaises(ValueError, sdl2ext.SpriteSheet.grid, sprite, 50)
+        self.assertRaises(ValueError, sdl2ext.SpriteSheet.grid, sprite, 0)
+        # grids start at the frame of subsprites
+        sub = sprite.subsprite((8, 4, 20, 10))
+        self.assertEqual(sdl2ext.SpriteSheet.grid(sub, 10)[1],
+                         SDL_Rect(18, 4, 10, 10))
+
+        named = sdl2ext.SpriteSheet(sprite, OrderedDict(
+            [("idle", (0, 0, 10, 10)), ("run", (10, 0, 20, 10))]))
+        self.assertEqual(named.index("run"), 1)
+        self.assertEqual(named["run"], SDL_Rect(10, 0, 20, 10))
+        self.assertIsNone(named.cols)
+        self.assertRaises(KeyError, named.__getitem__, "jump")
+        self.assertRaises(ValueError, sdl2ext.SpriteSheet, sprite, [])
+
+        # frames are switched by sharing the sheet's SDL_Rect structures
+        frame = named.subsprite("idle")
+        self.assertIs(frame.frame_rect, named["idle"])
+        self.assertEqual(frame.size, (10, 10))
+        frame.position = 5, 6
+        named.apply(frame, "run")
+        self.assertIs(frame.frame_rect, named["run"])
+        self.assertEqual(frame.area, (5, 6, 25, 16))
+
+        clip = sheet.clip()
+        self.assertIs(clip.rects, sheet.rects)
+        self.assertIs(clip.table, sheet.table)
+        clip = named.clip(["run", "idle"], 50)
+        self.assertIs(clip.rects[0], named["run"])
+
 
 if __name__ == '__main__':
     sys.exit(unittest.main())
@@ -0,0 +1,113 @@
+import sys
+import unittest
+
+from sdl2 import ext as sdl2ext
+from sdl2.rect import SDL_Rect
+from sdl2.render import SDL_FLIP_HORIZONTAL
+from sdl2.surface import SDL_CreateRGBSurface, SDL_FillRect
+
+try:
+    import numpy
+    _HASNUMPY = True
+except ImportError:
+    _HASNUMPY = False
+
+
+@unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+class SDL2ExtSpriteBatchTest(unittest.TestCase):
+    __tags__ = ["sdl", "sdl2ext"]
+
+    def setUp(self):
+        sdl2ext.init()
+        self.target = SDL_CreateRGBSurface(0, 32, 32, 32, 0, 0, 0,
+                                           0).contents
+        self.renderer = sdl2ext.Renderer(self.target)
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE,
+                                        renderer=self.renderer)
+        # two 8x8 frames: red and white
+        frames = SDL_CreateRGBSurface(0, 16, 8, 32, 0xFF0000, 0xFF00, 0xFF,
+                                      0).contents
+        SDL_FillRect(frames, SDL_Rect(0, 0, 8, 8), 0xFF0000)
+        SDL_FillRect(frames, SDL_Rect(8, 0, 8, 8), 0xFFFFFF)
+        self.sprite = factory.from_surface(frames, True)
+
+    def tearDown(self):
+        sdl2ext.quit()
+
+    def pixel(self, x, y):
+        view = sdl2ext.PixelView(self.target)
+        value = view[y][x] & 0xFFFFFF
+        del view
+        return value
+
+    def test_SpriteBatch(self):
+        self.assertRaises(TypeError, sdl2ext.SpriteBatch, None)
+        batch = sdl2ext.SpriteBatch(self.sprite, capacity=2)
+        self.assertEqual(len(batch), 0)
+        self.assertEqual(batch.texture_size, (16, 8))
+        self.assertEqual(batch.add(1, 2), 0)
+        self.assertEqual(batch.frames.tolist(), [[0, 0, 16, 8]])
+        self.assertEqual(batch.sizes.tolist(), [[16, 8]])
+        self.assertEqual(batch.extend([(0, 0), (1, 1), (2, 2)],
+                                      frames=(8, 0, 8, 8), angles=[0, 90, 0]),
+                         1)
+        self.assertEqual(len(batch), 4)
+        self.assertEqual(batch.sizes[1:].tolist(), [[8, 8]] * 3)
+        self.assertEqual(batch.angles.tolist(), [0, 0, 90, 0])
+        self.assertEqual(batch.positions[0].tolist(), [1, 2])
+
+        batch.move(1, [0, 1, 2, 3])
+        self.assertEqual(batch.positions.tolist(),
+                         [[2, 2], [1, 1], [2, 3], [3, 5]])
+        batch.animate([(0, 0, 8, 8), (8, 0, 8, 8)], [0, 1, 1, 0])
+        self.assertEqual(batch.frames[:, 0].tolist(), [0, 8, 8, 0])
+
+        batch.remove([0, 2])
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(batch.positions.tolist(), [[1, 1], [3, 5]])
+        batch.clear()
+        self.assertEqual(len(batch), 0)
+        self.assertRaises(ValueError, batch.extend, [1, 2])
+
+    def test_SpriteBatch_render(self):
+        batch = sdl2ext.SpriteBatch(self.sprite.texture)
+        frames = [(0, 0, 8, 8), (8, 0, 8, 8)]
+        batch.extend([(0, 0), (8.5, 0), (40, 0), (-8, 0)], frames=frames[0])
+        batch.animate(frames, [0, 1, 1, 1])
+        self.assertEqual(batch.render(self.renderer), 2)
+        self.assertEqual(batch.drawn, 2)
+        self.assertEqual(self.pixel(0, 0), 0xFF0000)
+        self.assertEqual(self.pixel(7, 7), 0xFF0000)
+        self.assertEqual(self.pixel(8, 0), 0xFFFFFF)
+        self.assertEqual(self.pixel(16, 0), 0x0)
+
+        sdl2ext.fill(self.target, 0x0)
+        self.assertEqual(batch.render(self.renderer, x=8, y=8), 3)
+        self.assertEqual(self.pixel(8, 8), 0xFF0000)
+        self.assertEqual(self.pixel(0, 8), 0xFFFFFF)
+
+        sdl2ext.fill(self.target, 0x0)
+        camera = sdl2ext.Camera((4, 0), zoom=2)
+        self.assertEqual(batch.render(self.renderer, camera=camera), 2)
+        self.assertEqual(self.pixel(0, 0), 0xFF0000)
+        self.assertEqual(self.pixel(7, 15), 0xFF0000)
+        self.assertEqual(self.pixel(8, 0), 0x0)
+        self.assertEqual(self.pixel(9, 0), 0xFFFFFF)
+        self.assertEqual(self.pixel(24, 15), 0xFFFFFF)
+
+        # rotated and flipped quads
+        sdl2ext.fill(self.target, 0x0)
+        batch.clear()
+        batch.add(0, 0, flip=SDL_FLIP_HORIZONTAL)
+        batch.add(0, 16, size=(8, 16), angle=90)
+        self.assertEqual(batch.render(self.renderer), 2)
+        self.assertEqual(self.pixel(0, 0), 0xFFFFFF)
+        self.assertEqual(self.pixel(15, 7), 0xFF0000)
+        self.assertEqual(self.pixel(4, 21), 0xFF0000)
+        self.assertEqual(self.pixel(4, 26), 0xFFFFFF)
+
+        self.assertRaises(TypeError, batch.render, None)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
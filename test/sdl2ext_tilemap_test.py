@@ -0,0 +1,113 @@
+import sys
+import unittest
+
+from sdl2 import ext as sdl2ext
+from sdl2.rect import SDL_Rect
+from sdl2.surface import SDL_CreateRGBSurface, SDL_FillRect
+
+try:
+    import numpy
+    _HASNUMPY = True
+except ImportError:
+    _HASNUMPY = False
+
+
+@unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+class SDL2ExtTileMapTest(unittest.TestCase):
+    __tags__ = ["sdl", "sdl2ext"]
+
+    def setUp(self):
+        sdl2ext.init()
+        self.target = SDL_CreateRGBSurface(0, 32, 32, 32, 0, 0, 0,
+                                           0).contents
+        self.renderer = sdl2ext.Renderer(self.target)
+        self.factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE,
+                                             renderer=self.renderer)
+        # two 8x8 tiles: red and white
+        tiles = SDL_CreateRGBSurface(0, 16, 8, 32, 0xFF0000, 0xFF00, 0xFF,
+                                     0).contents
+        SDL_FillRect(tiles, SDL_Rect(0, 0, 8, 8), 0xFF0000)
+        SDL_FillRect(tiles, SDL_Rect(8, 0, 8, 8), 0xFFFFFF)
+        self.tileset = self.factory.from_surface(tiles, True)
+
+    def tearDown(self):
+        sdl2ext.quit()
+
+    def pixel(self, x, y):
+        view = sdl2ext.PixelView(self.target)
+        value = view[y][x] & 0xFFFFFF
+        del view
+        return value
+
+    def test_TileMap(self):
+        self.assertRaises(TypeError, sdl2ext.TileMap, None, 8, (2, 2))
+        self.assertRaises(ValueError, sdl2ext.TileMap, self.tileset, 0,
+                          (2, 2))
+        self.assertRaises(ValueError, sdl2ext.TileMap, self.tileset, 8)
+        self.assertRaises(ValueError, sdl2ext.TileMap, self.tileset, 8,
+                          tiles=[1, 2])
+        tilemap = sdl2ext.TileMap(self.tileset, 8, (3, 5), colors=True,
+                                  alpha=True)
+        self.assertEqual(tilemap.shape, (3, 5))
+        self.assertEqual(tilemap.size, (40, 24))
+        self.assertEqual(tilemap.tiles.dtype, numpy.int32)
+        self.assertEqual(tilemap.colors.shape, (3, 5, 3))
+        self.assertEqual(tilemap.alpha.shape, (3, 5))
+        self.assertEqual(tilemap.visible((0, 0, 16, 16)), (0, 2, 0, 2))
+        self.assertEqual(tilemap.visible((4, 4, 16, 16)), (0, 3, 0, 3))
+        self.assertEqual(tilemap.visible((100, 0, 16, 16)), (0, 2, 5, 5))
+
+    def test_TileMap_render(self):
+        tilemap = sdl2ext.TileMap(self.tileset, 8,
+                                  tiles=[[0, 1, -1], [1, 0, 2]],
+                                  colors=True)
+        tilemap.colors[1, 0] = 0, 255, 0
+        tilemap.render(self.renderer)
+        self.assertEqual(tilemap.drawn, 4)
+        self.assertEqual(self.pixel(0, 0), 0xFF0000)
+        self.assertEqual(self.pixel(8, 0), 0xFFFFFF)
+        self.assertEqual(self.pixel(16, 0), 0x0)
+        self.assertEqual(self.pixel(0, 8), 0x00FF00)
+        self.assertEqual(self.pixel(8, 8), 0xFF0000)
+        self.assertEqual(self.pixel(16, 8), 0x0)
+        self.assertEqual(sdl2ext.sprite._texture_mods(self.tileset.texture),
+                         ((255, 255, 255), 255))
+
+        sdl2ext.fill(self.target, 0x0)
+        tilemap.x, tilemap.y = 20, 20
+        tilemap.render(self.renderer)
+        self.assertEqual(tilemap.drawn, 4)
+        self.assertEqual(self.pixel(20, 20), 0xFF0000)
+        self.assertEqual(self.pixel(28, 28), 0xFF0000)
+
+        sdl2ext.fill(self.target, 0x0)
+        camera = sdl2ext.Camera((28, 20), zoom=2)
+        tilemap.render(self.renderer, camera)
+        self.assertEqual(tilemap.drawn, 2)
+        self.assertEqual(self.pixel(0, 0), 0xFFFFFF)
+        self.assertEqual(self.pixel(15, 15), 0xFFFFFF)
+        self.assertEqual(self.pixel(0, 16), 0xFF0000)
+        self.assertEqual(self.pixel(16, 0), 0x0)
+
+    def test_SpriteFactory_create_tilemap(self):
+        self.factory.load_tileset(self.tileset, 8)
+        tilemap = self.factory.create_tilemap((4, 4))
+        self.assertIsInstance(tilemap, sdl2ext.TileMap)
+        self.assertIs(tilemap.tileset, self.tileset)
+        self.assertEqual(tilemap.tile_size, 8)
+        self.assertIsNone(tilemap.colors)
+        self.assertIs(tilemap.sheet, self.factory.tilesheet)
+
+    def test_TileMap_SpriteSheet(self):
+        sheet = sdl2ext.SpriteSheet.grid(self.tileset, 8)
+        tilemap = sdl2ext.TileMap(sheet, 8, tiles=[[1, 0]])
+        self.assertIs(tilemap.tileset, self.tileset)
+        self.assertIs(tilemap.sheet, sheet)
+        self.assertIs(tilemap._sources[1], sheet[1])
+        tilemap.render(self.renderer)
+        self.assertEqual(self.pixel(0, 0), 0xFFFFFF)
+        self.assertEqual(self.pixel(8, 0), 0xFF0000)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -4,7 +4,7 @@ import sys
 import unittest
 
 from sdl2 import ext as sdl2ext
-from sdl2 import surface, video
+from sdl2 import pixels, surface, video
 from sdl2.util import get_cfg
 
 from sdl2.util.test_utils import interactive, doprint
@@ -101,6 +101,61 @@ class SDL2ExtWindowTest(unittest.TestCase):
         sf = window.get_surface()
         self.assertIsInstance(sf, surface.SDL_Surface)
 
+    def test_Offscreen(self):
+        offscreen = sdl2ext.Offscreen((40, 30))
+        self.assertEqual(offscreen.size, (40, 30))
+        sf = offscreen.get_surface()
+        self.assertIsInstance(sf, surface.SDL_Surface)
+        self.assertEqual(sf.format.contents.format,
+                         pixels.SDL_PIXELFORMAT_ARGB8888)
+        offscreen.show()
+        offscreen.refresh()
+        offscreen.hide()
+
+        renderer = sdl2ext.Renderer(offscreen)
+        renderer.fill((2, 3, 4, 5), 0xFF0000)
+        view = sdl2ext.PixelView(sf)
+        self.assertEqual(view[3][2] & 0xFFFFFF, 0xFF0000)
+        self.assertEqual(view[0][0] & 0xFFFFFF, 0x0)
+        del view
+
+        for pformat in (pixels.SDL_PIXELFORMAT_RGB565,
+                        pixels.SDL_PIXELFORMAT_RGB24,
+                        pixels.SDL_PIXELFORMAT_RGB888):
+            offscreen = sdl2ext.Offscreen((4, 4), pformat)
+            fmt = offscreen.get_surface().format.contents
+            self.assertEqual(fmt.format, pformat)
+            self.assertEqual(fmt.BytesPerPixel,
+                             pixels.SDL_BYTESPERPIXEL(pformat))
+
+    def test_Offscreen_render_systems(self):
+        offscreen = sdl2ext.Offscreen((40, 30))
+        system = sdl2ext.TextureSpriteRenderSystem(offscreen)
+        self.assertEqual((system.max_x, system.max_y), (40, 30))
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE,
+                                        renderer=system._renderer)
+        system.render(factory.from_color(0x00FF00, (4, 4)), 10, 10)
+        view = sdl2ext.PixelView(offscreen.get_surface())
+        self.assertEqual(view[10][10] & 0xFFFFFF, 0x00FF00)
+        del view
+
+        offscreen = sdl2ext.Offscreen((40, 30))
+        system = sdl2ext.SoftwareSpriteRenderSystem(offscreen,
+                                                    dirty_rects=True)
+        self.assertIsNone(system.window)
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        sprite = factory.from_color(0x0000FF, (4, 4))
+        sprite.position = 5, 6
+        system.render([sprite])
+        system.render([sprite])
+        self.assertEqual(system.updated_rects, [])
+        sprite.position = 6, 6
+        system.render([sprite])
+        self.assertEqual(system.updated_rects, [(5, 6, 5, 4)])
+        view = sdl2ext.PixelView(offscreen.get_surface())
+        self.assertEqual(view[6][9] & 0xFFFFFF, 0x0000FF)
+        del view
+
 
 if __name__ == '__main__':
     sys.exit(unittest.main())